@@ -1,5 +1,6 @@
 import csv
 import utilities
+from code_interning import intern_code
 from drg_code_extract import DRGCodeExtract
 from rev_code_extract import RevCodeExtract
 from proc_code_extract import ProcCodeExtract
@@ -36,4 +37,5 @@ class BillingCodeExtract:
         self.records_processed += rec_cnt
         valid_service_codes.update(valid_codes)
 
-        return valid_service_codes
+        # the calcs build their lookup keys from interned codes - share the objects
+        return {(intern_code(code), intern_code(code_type)) for code, code_type in valid_service_codes}
@@ -2,6 +2,7 @@ import os
 from datetime import datetime
 from constants import FIELD_DELIM, MAX_FILE_SIZE, rate_template
 from io import BytesIO, BufferedWriter
+from rate_record import RateRecord
 
 class BufferedRateFileWriter:
     def __init__(self, target_directory: str, file_prefix: str):
@@ -23,17 +24,20 @@ class BufferedRateFileWriter:
         self.current_file_size = 0
         self.buffer = BytesIO()
 
-    def write(self, rate_record_dict: dict) -> None:
+    def write(self, rate_record: RateRecord | dict) -> None:
         """
         line = FIELD_DELIM.join(
             str(rate_record_dict.get(field, ""))
             for field in rate_template.keys()
         ) + FIELD_DELIM + rate_record_dict["full_term_display_id"] + "\n"
         """
-        line = FIELD_DELIM.join(
-            str(rate_record_dict.get(field, ""))
-            for field in rate_template.keys()
-        ) + FIELD_DELIM + "\n"
+        if isinstance(rate_record, RateRecord):
+            line = rate_record.to_line()
+        else:
+            line = FIELD_DELIM.join(
+                str(rate_record.get(field, ""))
+                for field in rate_template.keys()
+            ) + FIELD_DELIM + "\n"
         
         encoded_line = line.encode("utf-8")
         line_size = len(encoded_line)
@@ -66,8 +70,8 @@ class BufferedRateFileWriter:
 
     def flush_cache(self, rate_cache: dict) -> None:
         for group_dict in rate_cache.values():
-            for rate_dict in group_dict.values():
-                self.write(rate_dict)
+            for rate_record in group_dict.values():
+                self.write(rate_record)
         self.flush()
 
     def close_all_files(self):
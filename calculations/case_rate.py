@@ -1,7 +1,8 @@
 from context import Context
-from constants import DEFAULT_EXP_DATE, rate_template
+from constants import DEFAULT_EXP_DATE
 from provider_bundle import ProviderBundle
-from rate_storage import store_rate_record
+from rate_batch import RateBatch
+from rate_storage import store_rate_batch
 from rate_group_key_factory import RateGroupKeyFactory
 from rate_group_utilities import build_rate_group_key_if_needed
 from term_bundle import TermBundle
@@ -13,7 +14,7 @@ def process_case_rate(context: Context, term_bundle: TermBundle, rate_cache: dic
     service_mod_pos_list = term_bundle.service_mod_pos_list or []
     provider_ranges = term_bundle.provider_ranges or {}
 
-    if not service_mod_pos_list and not provider_ranges:
+    if not term_bundle.has_service_filter and not provider_ranges:
         return
 
     rate_key = f"{term_bundle.rate_sheet_code}#case_rate"
@@ -32,40 +33,19 @@ def process_case_rate(context: Context, term_bundle: TermBundle, rate_cache: dic
         fee = term_bundle.base_rate
         fee_type = "negotiated"
 
-    for proc_code, modifier, pos, code_type in service_mod_pos_list:
-        if pos == '' or pos == '11':
-            if rate_type_desc == 'institutional':
-                pos = '21'
-            else:
-                pos = '11'
-        rate_dict = {
-                    "update_type": "A",
-                    "insurer_code": context.insurer_code,
-                    "prov_grp_contract_key": rate_key,
-                    "negotiation_arrangement": "ffs",
-                    "billing_code_type": code_type,
-                    "billing_code_type_ver": "10",
-                    "billing_code": proc_code,
-                    "pos_collection_key": pos,
-                    "negotiated_type": fee_type,
-                    "rate": str(fee),
-                    "modifier": modifier,
-                    "billing_class": rate_type_desc,
-                    "expiration_date": term_date,
-                    "full_term_section_id": section_id,
-                    "calc_bean": calc_bean
-                }
-        code_tuple = (proc_code, modifier, pos)
-        dict_key = (term_bundle.rate_sheet_code, proc_code, modifier, pos, code_type)
-        store_rate_record(rate_cache, dict_key, rate_dict, rate_key, rate_group_key_factory, code_tuple, context.shared_config.valid_service_codes, context.rate_cache_index, term_bundle=term_bundle)
-
+    rate_batch = RateBatch(
+        context.insurer_code, rate_key, fee_type, str(fee), rate_type_desc, term_date,
+        section_id, calc_bean
+    )
+    rate_batch.add_services(service_mod_pos_list, context.shared_config.valid_code_index, '21' if rate_type_desc == 'institutional' else '11')
+    store_rate_batch(rate_cache, rate_batch, context.shared_config.valid_service_codes, context.rate_cache_index, term_bundle=term_bundle)
             
 def process_case_rate_limit(context: Context, term_bundle: TermBundle, rate_cache: dict, rate_group_key_factory: RateGroupKeyFactory) -> None:
 
     service_mod_pos_list = term_bundle.service_mod_pos_list or []
     provider_ranges = term_bundle.provider_ranges or {}
 
-    if not service_mod_pos_list and not provider_ranges:
+    if not term_bundle.has_service_filter and not provider_ranges:
         return
 
     rate_key = f"{term_bundle.rate_sheet_code}#case_rate"
@@ -84,40 +64,18 @@ def process_case_rate_limit(context: Context, term_bundle: TermBundle, rate_cach
         fee = term_bundle.base_rate
         fee_type = "negotiated"
 
-    for proc_code, modifier, pos, code_type in service_mod_pos_list:
-        if pos == '' or pos == '11':
-            if rate_type_desc == 'institutional':
-                pos = '21'
-            else:
-                pos = '11'
-        rate_dict = {
-                    "update_type": "A",
-                    "insurer_code": context.insurer_code,
-                    "prov_grp_contract_key": rate_key,
-                    "negotiation_arrangement": "ffs",
-                    "billing_code_type": code_type,
-                    "billing_code_type_ver": "10",
-                    "billing_code": proc_code,
-                    "pos_collection_key": pos,
-                    "negotiated_type": fee_type,
-                    "rate": str(fee),
-                    "modifier": modifier,
-                    "billing_class": rate_type_desc,
-                    "expiration_date": term_date,
-                    "full_term_section_id": section_id,
-                    "calc_bean": calc_bean
-                }
-
-        code_tuple = (proc_code, modifier, pos)
-        dict_key = (term_bundle.rate_sheet_code, proc_code, modifier, pos, code_type)
-        store_rate_record(rate_cache, dict_key, rate_dict, rate_key, rate_group_key_factory, code_tuple, context.shared_config.valid_service_codes, context.rate_cache_index, term_bundle=term_bundle)
-
+    rate_batch = RateBatch(
+        context.insurer_code, rate_key, fee_type, str(fee), rate_type_desc, term_date,
+        section_id, calc_bean
+    )
+    rate_batch.add_services(service_mod_pos_list, context.shared_config.valid_code_index, '21' if rate_type_desc == 'institutional' else '11')
+    store_rate_batch(rate_cache, rate_batch, context.shared_config.valid_service_codes, context.rate_cache_index, term_bundle=term_bundle)
 def process_cr_ltd_by_pct_of_chg(context: Context, term_bundle: TermBundle, rate_cache: dict, rate_group_key_factory: RateGroupKeyFactory) -> None:
 
     service_mod_pos_list = term_bundle.service_mod_pos_list or []
     provider_ranges = term_bundle.provider_ranges or {}
 
-    if not service_mod_pos_list and not provider_ranges:
+    if not term_bundle.has_service_filter and not provider_ranges:
         return
 
     rate_key = f"{term_bundle.rate_sheet_code}#case_rate"
@@ -132,39 +90,17 @@ def process_cr_ltd_by_pct_of_chg(context: Context, term_bundle: TermBundle, rate
     fee = term_bundle.base_rate
     fee_type = "negotiated"
 
-    for proc_code, modifier, pos, code_type in service_mod_pos_list:
-        if pos == '' or pos == '11':
-            if rate_type_desc == 'institutional':
-                pos = '21'
-            else:
-                pos = '11'
-        rate_dict = {
-                    "update_type": "A",
-                    "insurer_code": context.insurer_code,
-                    "prov_grp_contract_key": rate_key,
-                    "negotiation_arrangement": "ffs",
-                    "billing_code_type": code_type,
-                    "billing_code_type_ver": "10",
-                    "billing_code": proc_code,
-                    "pos_collection_key": pos,
-                    "negotiated_type": fee_type,
-                    "rate": str(fee),
-                    "modifier": modifier,
-                    "billing_class": rate_type_desc,
-                    "expiration_date": term_date,
-                    "full_term_section_id": section_id,
-                    "calc_bean": calc_bean
-                }
-
-        code_tuple = (proc_code, modifier, pos)
-        dict_key = (term_bundle.rate_sheet_code, proc_code, modifier, pos, code_type)
-        store_rate_record(rate_cache, dict_key, rate_dict, rate_key, rate_group_key_factory, code_tuple, context.shared_config.valid_service_codes, context.rate_cache_index, term_bundle=term_bundle)
-
+    rate_batch = RateBatch(
+        context.insurer_code, rate_key, fee_type, str(fee), rate_type_desc, term_date,
+        section_id, calc_bean
+    )
+    rate_batch.add_services(service_mod_pos_list, context.shared_config.valid_code_index, '21' if rate_type_desc == 'institutional' else '11')
+    store_rate_batch(rate_cache, rate_batch, context.shared_config.valid_service_codes, context.rate_cache_index, term_bundle=term_bundle)
 def process_case_rate_two_lev_per_diem_limit(context: Context, term_bundle: TermBundle, rate_cache: dict, rate_group_key_factory: RateGroupKeyFactory) -> None:
     service_mod_pos_list = term_bundle.service_mod_pos_list or []
     provider_ranges = term_bundle.provider_ranges or {}
 
-    if not service_mod_pos_list and not provider_ranges:
+    if not term_bundle.has_service_filter and not provider_ranges:
         return
 
     rate_key = f"{term_bundle.rate_sheet_code}#case_rate"
@@ -184,40 +120,18 @@ def process_case_rate_two_lev_per_diem_limit(context: Context, term_bundle: Term
         fee = max(x for x in [term_bundle.base_rate, term_bundle.base_rate1] if x is not None)
         fee_type = "negotiated"
 
-    for proc_code, modifier, pos, code_type in service_mod_pos_list:
-        if pos == '' or pos == '11':
-            if rate_type_desc == 'institutional':
-                pos = '21'
-            else:
-                pos = '11'
-
-        rate_dict = {
-                    "update_type": "A",
-                    "insurer_code": context.insurer_code,
-                    "prov_grp_contract_key": rate_key,
-                    "negotiation_arrangement": "ffs",
-                    "billing_code_type": code_type,
-                    "billing_code_type_ver": "10",
-                    "billing_code": proc_code,
-                    "pos_collection_key": pos,
-                    "negotiated_type": fee_type,
-                    "rate": str(fee),
-                    "modifier": modifier,
-                    "billing_class": rate_type_desc,
-                    "expiration_date": term_date,
-                    "full_term_section_id": section_id,
-                    "calc_bean": calc_bean
-                }
-
-        code_tuple = (proc_code, modifier, pos)
-        dict_key = (term_bundle.rate_sheet_code, proc_code, modifier, pos, code_type)
-        store_rate_record(rate_cache, dict_key, rate_dict, rate_key, rate_group_key_factory, code_tuple, context.shared_config.valid_service_codes, context.rate_cache_index, term_bundle=term_bundle)
+    rate_batch = RateBatch(
+        context.insurer_code, rate_key, fee_type, str(fee), rate_type_desc, term_date,
+        section_id, calc_bean
+    )
+    rate_batch.add_services(service_mod_pos_list, context.shared_config.valid_code_index, '21' if rate_type_desc == 'institutional' else '11')
+    store_rate_batch(rate_cache, rate_batch, context.shared_config.valid_service_codes, context.rate_cache_index, term_bundle=term_bundle)
 
 def process_case_rate_three_lev_per_diem_limit(context: Context, term_bundle: TermBundle, rate_cache: dict, rate_group_key_factory: RateGroupKeyFactory) -> None:
     service_mod_pos_list = term_bundle.service_mod_pos_list or []
     provider_ranges = term_bundle.provider_ranges or {}
 
-    if not service_mod_pos_list and not provider_ranges:
+    if not term_bundle.has_service_filter and not provider_ranges:
         return
 
     rate_key = f"{term_bundle.rate_sheet_code}#case_rate"
@@ -237,31 +151,9 @@ def process_case_rate_three_lev_per_diem_limit(context: Context, term_bundle: Te
         fee = max(x for x in [term_bundle.base_rate, term_bundle.base_rate1, term_bundle.base_rate2] if x is not None)
         fee_type = "negotiated"
 
-    for proc_code, modifier, pos, code_type in service_mod_pos_list:
-        if pos == '' or pos == '11':
-            if rate_type_desc == 'institutional':
-                pos = '21'
-            else:
-                pos = '11'
-                
-        rate_dict = {
-                    "update_type": "A",
-                    "insurer_code": context.insurer_code,
-                    "prov_grp_contract_key": rate_key,
-                    "negotiation_arrangement": "ffs",
-                    "billing_code_type": code_type,
-                    "billing_code_type_ver": "10",
-                    "billing_code": proc_code,
-                    "pos_collection_key": pos,
-                    "negotiated_type": fee_type,
-                    "rate": str(fee),
-                    "modifier": modifier,
-                    "billing_class": rate_type_desc,
-                    "expiration_date": term_date,
-                    "full_term_section_id": section_id,
-                    "calc_bean": calc_bean
-                }
-
-        code_tuple = (proc_code, modifier, pos)
-        dict_key = (term_bundle.rate_sheet_code, proc_code, modifier, pos, code_type)
-        store_rate_record(rate_cache, dict_key, rate_dict, rate_key, rate_group_key_factory, code_tuple, context.shared_config.valid_service_codes, context.rate_cache_index, term_bundle=term_bundle)
+    rate_batch = RateBatch(
+        context.insurer_code, rate_key, fee_type, str(fee), rate_type_desc, term_date,
+        section_id, calc_bean
+    )
+    rate_batch.add_services(service_mod_pos_list, context.shared_config.valid_code_index, '21' if rate_type_desc == 'institutional' else '11')
+    store_rate_batch(rate_cache, rate_batch, context.shared_config.valid_service_codes, context.rate_cache_index, term_bundle=term_bundle)
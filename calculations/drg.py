@@ -1,7 +1,9 @@
 from context import Context
-from constants import DEFAULT_EXP_DATE, rate_template
+from constants import DEFAULT_EXP_DATE
+from drg_weight_table import get_drg_weight_table
 from provider_bundle import ProviderBundle
-from rate_storage import store_rate_record
+from rate_batch import RateBatch
+from rate_storage import store_rate_batch
 from rate_group_key_factory import RateGroupKeyFactory
 from rate_group_utilities import build_rate_group_key_if_needed
 from term_bundle import TermBundle
@@ -21,33 +23,13 @@ def process_drg_weighting(context: Context, term_bundle: TermBundle, rate_cache:
     base_rate = term_bundle.base_rate
     fee_type = "negotiated"
 
-    for drg_code, relative_weight, source_type, year in context.shared_config.drg_weights:
-        fee = round(base_rate * float(relative_weight),2)
-        modifier = ''
-        if rate_type_desc == 'institutional':
-            pos = '21'
-        else:
-            pos = '11'
-        rate_dict = {
-                    "update_type": "A",
-                    "insurer_code": context.insurer_code,
-                    "prov_grp_contract_key": rate_key,
-                    "negotiation_arrangement": "ffs",
-                    "billing_code_type": "DRG",
-                    "billing_code_type_ver": "10",
-                    "billing_code": drg_code,
-                    "pos_collection_key": pos,
-                    "negotiated_type": fee_type,
-                    "rate": str(fee),
-                    "modifier": modifier,
-                    "billing_class": rate_type_desc,
-                    "expiration_date": term_date,
-                    "full_term_section_id": section_id,
-                    "calc_bean": calc_bean
-                }
-        code_tuple = (drg_code, modifier, pos)
-        dict_key = (term_bundle.rate_sheet_code, drg_code, modifier, pos, "DRG")
-        store_rate_record(rate_cache, dict_key, rate_dict, rate_key, rate_group_key_factory, code_tuple, context.shared_config.valid_service_codes, context.rate_cache_index, term_bundle=term_bundle)
+    # every DRG's rate comes out of the table in one go
+    rate_batch = RateBatch(
+        context.insurer_code, rate_key, fee_type, None, rate_type_desc, term_date,
+        section_id, calc_bean
+    )
+    rate_batch.set_columns(*get_drg_weight_table(context.shared_config).columns(base_rate, rate_type_desc))
+    store_rate_batch(rate_cache, rate_batch, context.shared_config.valid_service_codes, context.rate_cache_index, term_bundle=term_bundle)
 
 def process_drg_weighting_day_outlier(context: Context, term_bundle: TermBundle, rate_cache: dict, rate_group_key_factory: RateGroupKeyFactory) -> None:
     
@@ -63,30 +45,9 @@ def process_drg_weighting_day_outlier(context: Context, term_bundle: TermBundle,
     base_rate = term_bundle.base_rate
     fee_type = "negotiated"
 
-    for drg_code, relative_weight, source_type, year in context.shared_config.drg_weights:
-        fee = round(base_rate * float(relative_weight),2)
-        modifier = ''
-        if rate_type_desc == 'institutional':
-            pos = '21'
-        else:
-            pos = '11'
-        rate_dict = {
-                    "update_type": "A",
-                    "insurer_code": context.insurer_code,
-                    "prov_grp_contract_key": rate_key,
-                    "negotiation_arrangement": "ffs",
-                    "billing_code_type": "DRG",
-                    "billing_code_type_ver": "10",
-                    "billing_code": drg_code,
-                    "pos_collection_key": pos,
-                    "negotiated_type": fee_type,
-                    "rate": str(fee),
-                    "modifier": modifier,
-                    "billing_class": rate_type_desc,
-                    "expiration_date": term_date,
-                    "full_term_section_id": section_id,
-                    "calc_bean": calc_bean
-                }
-        code_tuple = (drg_code, modifier, pos)
-        dict_key = (term_bundle.rate_sheet_code, drg_code, modifier, pos, "DRG")
-        store_rate_record(rate_cache, dict_key, rate_dict, rate_key, rate_group_key_factory, code_tuple, context.shared_config.valid_service_codes, context.rate_cache_index, term_bundle=term_bundle)
\ No newline at end of file
+    rate_batch = RateBatch(
+        context.insurer_code, rate_key, fee_type, None, rate_type_desc, term_date,
+        section_id, calc_bean
+    )
+    rate_batch.set_columns(*get_drg_weight_table(context.shared_config).columns(base_rate, rate_type_desc))
+    store_rate_batch(rate_cache, rate_batch, context.shared_config.valid_service_codes, context.rate_cache_index, term_bundle=term_bundle)
@@ -1,13 +1,15 @@
+from columnar_fee_schedule import ColumnarFeeSchedule
 from context import Context
 from constants import DEFAULT_EXP_DATE
 from rate_group_key_factory import RateGroupKeyFactory
 from rate_group_utilities import build_rate_group_key_if_needed
+from rate_record import RateRecord
 from rate_storage import store_rate_record
 from term_bundle import TermBundle
 from utilities import get_pos_and_type
 
 def process_fee_schedule(context: Context, term_bundle: TermBundle, rate_cache: dict, rate_group_key_factory: RateGroupKeyFactory) -> None:
-    if term_bundle.service_mod_pos_list:
+    if term_bundle.has_service_filter:
         process_fee_schedule_ranges(context, term_bundle, rate_cache, rate_group_key_factory)
     else:
         process_fee_schedule_full(context, term_bundle, rate_cache, rate_group_key_factory)
@@ -18,10 +20,6 @@ def process_fee_schedule_full(
     rate_cache: dict,
     rate_group_key_factory: RateGroupKeyFactory
 ) -> None:
-    section_id = term_bundle.section_id
-    calc_bean = term_bundle.calc_bean
-    rate_pos, rate_type_desc = get_pos_and_type(section_name='')
-
     # Build schedule list explicitly
     schedule_items = []
     if getattr(term_bundle, "locality_fee_schedule_keys", None):
@@ -31,10 +29,13 @@ def process_fee_schedule_full(
                 schedule_items.append((key, schedule_values))
     else:
         fee_schedule_name = term_bundle.fee_schedule_name
-        schedule_values = context.fee_schedules.get(fee_schedule_name)
+        schedule_values = term_bundle.fee_schedule_values
         if schedule_values:
             schedule_items.append(((fee_schedule_name,), schedule_values))
 
+    # localities sharing a schedule object (see fee_schedule_dedup.py) share its expansion
+    expanded_schedules: dict[int, list] = {}
+
     # Loop through schedule items
     for key_tuple, schedule_values in schedule_items:
         if len(key_tuple) == 3:
@@ -46,56 +47,36 @@ def process_fee_schedule_full(
 
         rate_key = build_rate_group_key_if_needed(term_bundle, rate_key, rate_group_key_factory)
 
-        for modifier, proc_codes in schedule_values.items():
-            for proc_code, proc_details in proc_codes.items():
-                code_type = proc_details.get("proc_code_type", "")
-                allow_amt = round(proc_details.get("allowed", 0), 2)
-                percentage = proc_details.get("percentage", 0)
-
-                if allow_amt > 0:
-                    fee = allow_amt
-                    fee_type = "fee schedule"
-                elif percentage > 0:
-                    fee = round(percentage * 100, 2)
-                    fee_type = "percentage"
-                else:
-                    fee = 0
-                    fee_type = "fee schedule"
-
-                if term_bundle.base_pct_of_charge:
-                    fee = round(allow_amt * term_bundle.base_pct_of_charge, 2)
-
-                dict_key = (term_bundle.rate_sheet_code, proc_code, modifier, rate_pos, code_type)
-                rate_dict = {
-                    "update_type": "A",
-                    "insurer_code": context.insurer_code,
-                    "prov_grp_contract_key": rate_key,
-                    "negotiation_arrangement": "ffs",
-                    "billing_code_type": code_type,
-                    "billing_code_type_ver": "10",
-                    "billing_code": proc_code,
-                    "pos_collection_key": rate_pos,
-                    "negotiated_type": fee_type,
-                    "rate": str(fee),
-                    "modifier": modifier,
-                    "billing_class": rate_type_desc,
-                    "expiration_date": proc_details.get("termdate", DEFAULT_EXP_DATE),
-                    "full_term_section_id": section_id,
-                    "calc_bean": calc_bean
-                }
-
-                code_tuple = (proc_code, modifier, rate_pos)
-                store_rate_record(
-                    rate_cache,
-                    dict_key,
-                    rate_dict,
-                    rate_key,
-                    rate_group_key_factory,
-                    code_tuple,
-                    context.shared_config.valid_service_codes,
-                    context.rate_cache_index,
-                    term_bundle=term_bundle
-                )
+        fee_records = expanded_schedules.get(id(schedule_values))
+        if fee_records is None:
+            fee_records = expanded_schedules[id(schedule_values)] = _expand_fee_schedule_full(context, term_bundle, schedule_values)
+        _store_fee_schedule_records(context, term_bundle, fee_records, rate_key, rate_cache, rate_group_key_factory)
+
+def _expand_fee_schedule_full(context: Context, term_bundle: TermBundle, schedule_values: ColumnarFeeSchedule) -> list[tuple]:
+    rate_pos, _ = get_pos_and_type(section_name='')
+    valid_code_index = context.shared_config.valid_code_index
+    fee_records = []
+
+    for proc_code, modifier, code_type, allowed, percentage, _ in schedule_values.rows():
+        if not valid_code_index.is_valid(proc_code, code_type):
+            continue
+        allow_amt = round(allowed, 2)
+
+        if allow_amt > 0:
+            fee = allow_amt
+            fee_type = "fee schedule"
+        elif percentage > 0:
+            fee = round(percentage * 100, 2)
+            fee_type = "percentage"
+        else:
+            fee = 0
+            fee_type = "fee schedule"
+
+        if term_bundle.base_pct_of_charge:
+            fee = round(allow_amt * term_bundle.base_pct_of_charge, 2)
+
+        fee_records.append((proc_code, modifier, rate_pos, code_type, fee, fee_type))
+    return fee_records
 
 def process_fee_schedule_ranges(
     context: Context,
@@ -115,22 +96,15 @@ def process_standard_fee_schedule_ranges(
     rate_group_key_factory: RateGroupKeyFactory
 ) -> None:
     schedule_name = term_bundle.fee_schedule_name
-    schedule_values = context.fee_schedules.get(schedule_name, {})
+    schedule_values = term_bundle.fee_schedule_values
     if not schedule_values:
         return
 
     raw_key = f"{term_bundle.rate_sheet_code}#{schedule_name}"
     rate_key = build_rate_group_key_if_needed(term_bundle, raw_key, rate_group_key_factory)
 
-    _process_fee_schedule_range_common(
-        context,
-        term_bundle,
-        schedule_name,
-        schedule_values,
-        rate_key,
-        rate_cache,
-        rate_group_key_factory
-    )
+    fee_records = _expand_fee_schedule_ranges(context, term_bundle, schedule_values)
+    _store_fee_schedule_records(context, term_bundle, fee_records, rate_key, rate_cache, rate_group_key_factory)
 
 def process_locality_fee_schedule_ranges(
     context: Context,
@@ -138,6 +112,9 @@ def process_locality_fee_schedule_ranges(
     rate_cache: dict,
     rate_group_key_factory: RateGroupKeyFactory
 ) -> None:
+    # localities sharing a schedule object (see fee_schedule_dedup.py) share its expansion
+    expanded_schedules: dict[int, list] = {}
+
     for key_tuple in term_bundle.locality_fee_schedule_keys:
         schedule_values = context.shared_config.locality_fee_schedules.get(key_tuple, {})
         if not schedule_values:
@@ -147,28 +124,12 @@ def process_locality_fee_schedule_ranges(
         raw_key = f"{term_bundle.rate_sheet_code}#{schedule_name}#{carrier_number}#{locality_number}#locality"
         rate_key = build_rate_group_key_if_needed(term_bundle, raw_key, rate_group_key_factory)
 
-        _process_fee_schedule_range_common(
-            context,
-            term_bundle,
-            schedule_name,
-            schedule_values,
-            rate_key,
-            rate_cache,
-            rate_group_key_factory
-        )
+        fee_records = expanded_schedules.get(id(schedule_values))
+        if fee_records is None:
+            fee_records = expanded_schedules[id(schedule_values)] = _expand_fee_schedule_ranges(context, term_bundle, schedule_values)
+        _store_fee_schedule_records(context, term_bundle, fee_records, rate_key, rate_cache, rate_group_key_factory)
 
-def _process_fee_schedule_range_common(
-    context: Context,
-    term_bundle: TermBundle,
-    schedule_name: str,
-    schedule_values: dict,
-    rate_key: str,
-    rate_cache: dict,
-    rate_group_key_factory: RateGroupKeyFactory
-) -> None:
-    section_id = term_bundle.section_id
-    calc_bean = term_bundle.calc_bean
-    rate_pos, rate_type_desc = get_pos_and_type(section_name="")
+def _expand_fee_schedule_ranges(context: Context, term_bundle: TermBundle, schedule_values: ColumnarFeeSchedule) -> list[tuple]:
     base_pct_of_charge = term_bundle.base_pct_of_charge or 1.0
 
     proc_maps = []
@@ -178,23 +139,24 @@ def _process_fee_schedule_range_common(
 
         if proc_code:
             # 🔹 Explicit service code: simple lookup
-            detail = schedule_values.get(modifier, {}).get(proc_code)
+            detail = schedule_values.get_row(modifier, proc_code)
             if detail:
                 proc_maps.append((proc_code, modifier or "", pos, detail))
         else:
             # 🔸 No service code: expand all for matching mod/POS combos
             if modifier:
-                for code, detail in schedule_values.get(modifier, {}).items():
-                    proc_maps.append((code, modifier, pos, detail))
+                for detail in schedule_values.rows(modifier):
+                    proc_maps.append((detail[0], modifier, pos, detail))
             else:
-                for mod_key, proc_map in schedule_values.items():
-                    for code, detail in proc_map.items():
-                        proc_maps.append((code, "", pos, detail))
+                for detail in schedule_values.rows():
+                    proc_maps.append((detail[0], "", pos, detail))
 
-    for code, mod, pos, detail in proc_maps:
-        code_type = detail.get("proc_code_type", "")
-        allow_amt = round(detail.get("allowed", 0), 2)
-        percentage = detail.get("percentage", 0)
+    valid_code_index = context.shared_config.valid_code_index
+    fee_records = []
+    for code, mod, pos, (_, _, code_type, allowed, percentage, _) in proc_maps:
+        if not valid_code_index.is_valid(code, code_type):
+            continue
+        allow_amt = round(allowed, 2)
 
         if allow_amt > 0:
             fee = round(allow_amt * base_pct_of_charge, 2)
@@ -205,29 +167,34 @@ def _process_fee_schedule_range_common(
         else:
             continue  # skip invalid
 
+        fee_records.append((code, mod, pos, code_type, fee, fee_type))
+    return fee_records
+
+def _store_fee_schedule_records(
+    context: Context,
+    term_bundle: TermBundle,
+    fee_records: list[tuple],
+    rate_key: str,
+    rate_cache: dict,
+    rate_group_key_factory: RateGroupKeyFactory
+) -> None:
+    section_id = term_bundle.section_id
+    calc_bean = term_bundle.calc_bean
+    _, rate_type_desc = get_pos_and_type(section_name="")
+
+    for code, mod, pos, code_type, fee, fee_type in fee_records:
         dict_key = (term_bundle.rate_sheet_code, code, mod, pos, code_type)
-        rate_dict = {
-            "update_type": "A",
-            "insurer_code": context.insurer_code,
-            "prov_grp_contract_key": rate_key,
-            "negotiation_arrangement": "ffs",
-            "billing_code_type": code_type,
-            "billing_code_type_ver": "10",
-            "billing_code": code,
-            "pos_collection_key": pos,
-            "negotiated_type": fee_type,
-            "rate": str(fee),
-            "modifier": mod,
-            "billing_class": rate_type_desc,
-            "expiration_date": detail.get("termdate", DEFAULT_EXP_DATE),
-            "full_term_section_id": section_id,
-            "calc_bean": calc_bean
-        }
+        # schedule entries never carried a "termdate" key, so the expiration date was always the default
+        rate_record = RateRecord(
+            context.insurer_code, rate_key, code_type, code, pos,
+            fee_type, str(fee), mod, rate_type_desc, DEFAULT_EXP_DATE,
+            section_id, calc_bean
+        )
 
         store_rate_record(
             rate_cache,
             dict_key,
-            rate_dict,
+            rate_record,
             rate_key,
             rate_group_key_factory,
             (code, mod, pos),
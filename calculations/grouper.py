@@ -1,8 +1,10 @@
-from constants import GROUPER_COLUMN_MAP, rate_template
+from constants import GROUPER_COLUMN_MAP
 from context import Context
 from rate_group_key_factory import RateGroupKeyFactory
 from rate_group_utilities import build_rate_group_key_if_needed
-from rate_storage import store_rate_record
+from rate_batch import RateBatch
+from rate_record import RateRecord
+from rate_storage import store_rate_batch, store_rate_record
 from term_bundle import TermBundle
 
 def calc_asc_grouper_9lv_no_disc(context: Context, term_bundle: TermBundle, rate_cache: dict, rate_group_key_factory: RateGroupKeyFactory):
@@ -24,34 +26,24 @@ def calc_asc_grouper_9lv_no_disc(context: Context, term_bundle: TermBundle, rate
     term_year_applied: str = term_bundle.code_low
     term_source_type: str = term_bundle.code_high
 
+    valid_code_index = context.shared_config.valid_code_index
     for (proc_code, source_type, year_applied), group_no in amb_surg_codes.items():
+        if not valid_code_index.is_valid(proc_code, proc_code_type):
+            continue
         if source_type != term_source_type or year_applied != term_year_applied:
              continue
         field_name: str = GROUPER_COLUMN_MAP.get(group_no, '')
         fee = term_bundle.term.get(field_name, 0)
         fee_type = "negotiated"
 
-        rate_dict = rate_template.copy()
-        rate_dict.update({
-            "update_type": "A",
-            "insurer_code": context.insurer_code,
-            "prov_grp_contract_key": rate_key,
-            "negotiation_arrangement": "ffs",
-            "billing_code_type": proc_code_type,
-            "billing_code_type_ver": "10",
-            "billing_code": proc_code,
-            "pos_collection_key": pos,
-            "negotiated_type": fee_type,
-            "rate": str(fee),
-            "modifier": modifier,
-            "billing_class": rate_type_desc,
-            "expiration_date": term_date,
-            "full_term_section_id": section_id,
-            "calc_bean": calc_bean
-        })
+        rate_record = RateRecord(
+            context.insurer_code, rate_key, proc_code_type, proc_code, pos,
+            fee_type, str(fee), modifier, rate_type_desc, term_date,
+            section_id, calc_bean
+        )
         code_tuple = (proc_code, modifier, pos)
         dict_key = (term_bundle.rate_sheet_code, proc_code, modifier, pos, proc_code_type)
-        store_rate_record(rate_cache, dict_key, rate_dict, rate_key, rate_group_key_factory, code_tuple, context.shared_config.valid_service_codes, context.rate_cache_index, term_bundle=term_bundle)
+        store_rate_record(rate_cache, dict_key, rate_record, rate_key, rate_group_key_factory, code_tuple, context.shared_config.valid_service_codes, context.rate_cache_index, term_bundle=term_bundle)
 
 def calc_asc_grouper_base(context: Context, term_bundle: TermBundle, rate_cache: dict, rate_group_key_factory: RateGroupKeyFactory):
     fee_schedule_name = term_bundle.fee_schedule_name
@@ -68,30 +60,16 @@ def calc_asc_grouper_base(context: Context, term_bundle: TermBundle, rate_cache:
     proc_code_type = "CPT"
     term_date = "99991231"
 
-    amb_surg_codes = context.shared_config.amb_surg_codes
-    for (proc_code, source_type, year_applied), group_no in amb_surg_codes.items():
-        field_name: str = GROUPER_COLUMN_MAP.get(group_no, '')
-        fee = term_bundle.base_rate
-        fee_type = "negotiated"
+    fee = term_bundle.base_rate
+    fee_type = "negotiated"
 
-        rate_dict = rate_template.copy()
-        rate_dict.update({
-            "update_type": "A",
-            "insurer_code": context.insurer_code,
-            "prov_grp_contract_key": rate_key,
-            "negotiation_arrangement": "ffs",
-            "billing_code_type": proc_code_type,
-            "billing_code_type_ver": "10",
-            "billing_code": proc_code,
-            "pos_collection_key": pos,
-            "negotiated_type": fee_type,
-            "rate": str(fee),
-            "modifier": modifier,
-            "billing_class": rate_type_desc,
-            "expiration_date": term_date,
-            "full_term_section_id": section_id,
-            "calc_bean": calc_bean
-        })
-        code_tuple = (proc_code, modifier, pos)
-        dict_key = (term_bundle.rate_sheet_code, proc_code, modifier, pos, proc_code_type)
-        store_rate_record(rate_cache, dict_key, rate_dict, rate_key, rate_group_key_factory, code_tuple, context.shared_config.valid_service_codes, context.rate_cache_index, term_bundle=term_bundle)
+    rate_batch = RateBatch(
+        context.insurer_code, rate_key, fee_type, str(fee), rate_type_desc, term_date,
+        section_id, calc_bean
+    )
+    amb_surg_codes = context.shared_config.amb_surg_codes
+    valid_code_index = context.shared_config.valid_code_index
+    for proc_code, source_type, year_applied in amb_surg_codes:
+        if valid_code_index.is_valid(proc_code, proc_code_type):
+            rate_batch.add(proc_code, modifier, pos, proc_code_type)
+    store_rate_batch(rate_cache, rate_batch, context.shared_config.valid_service_codes, context.rate_cache_index, term_bundle=term_bundle)
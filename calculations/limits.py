@@ -1,15 +1,16 @@
 from context import Context
-from constants import DEFAULT_EXP_DATE, rate_template
+from constants import DEFAULT_EXP_DATE
 from rate_group_key_factory import RateGroupKeyFactory
 from rate_group_utilities import build_rate_group_key_if_needed
-from rate_storage import store_rate_record
+from rate_batch import RateBatch
+from rate_storage import store_rate_batch
 from term_bundle import TermBundle
 from utilities import get_service_code_type
 
 def process_limit(context: Context, term_bundle: TermBundle, rate_cache: dict, rate_group_key_factory: RateGroupKeyFactory) -> None:
     service_mod_pos_list = term_bundle.service_mod_pos_list or []
     provider_ranges = term_bundle.provider_ranges
-    if not service_mod_pos_list and not provider_ranges:
+    if not term_bundle.has_service_filter and not provider_ranges:
         return
 
     rate_sheet_code = term_bundle.rate_sheet_code
@@ -26,39 +27,17 @@ def process_limit(context: Context, term_bundle: TermBundle, rate_cache: dict, r
     fee = base_rate
     fee_type = "negotiated"
 
-    for proc_code, modifier, pos, code_type in service_mod_pos_list:
-        if pos == '' or pos == '11':
-            if rate_type_desc == 'institutional':
-                pos = '21'
-            else:
-                pos = '11'
-
-        rate_dict = rate_template.copy()
-        rate_dict.update({
-            "update_type": "A",
-            "insurer_code": context.insurer_code,
-            "prov_grp_contract_key": rate_key,
-            "negotiation_arrangement": "ffs",
-            "billing_code_type": code_type,
-            "billing_code_type_ver": "10",
-            "billing_code": proc_code,
-            "pos_collection_key": pos,
-            "negotiated_type": fee_type,
-            "rate": str(fee),
-            "modifier": modifier,
-            "billing_class": rate_type_desc,
-            "expiration_date": term_date,
-            "full_term_section_id": section_id,
-            "calc_bean": calc_bean
-        })
-        code_tuple = (proc_code, modifier, pos)
-        dict_key = (term_bundle.rate_sheet_code, proc_code, modifier, pos, code_type)
-        store_rate_record(rate_cache, dict_key, rate_dict, rate_key, rate_group_key_factory, code_tuple, context.shared_config.valid_service_codes, context.rate_cache_index, term_bundle=term_bundle)
+    rate_batch = RateBatch(
+        context.insurer_code, rate_key, fee_type, str(fee), rate_type_desc, term_date,
+        section_id, calc_bean
+    )
+    rate_batch.add_services(service_mod_pos_list, context.shared_config.valid_code_index, '21' if rate_type_desc == 'institutional' else '11')
+    store_rate_batch(rate_cache, rate_batch, context.shared_config.valid_service_codes, context.rate_cache_index, term_bundle=term_bundle)
 
 def process_limit_allowed(context: Context, term_bundle: TermBundle, rate_cache: dict, rate_group_key_factory: RateGroupKeyFactory) -> None:
     service_mod_pos_list = term_bundle.service_mod_pos_list or []
     provider_ranges = term_bundle.provider_ranges
-    if not service_mod_pos_list and not provider_ranges:
+    if not term_bundle.has_service_filter and not provider_ranges:
         return
 
     rate_sheet_code = term_bundle.rate_sheet_code
@@ -80,40 +59,17 @@ def process_limit_allowed(context: Context, term_bundle: TermBundle, rate_cache:
         fee = base_rate
         fee_type = "negotiated"
 
-    for proc_code, modifier, pos, code_type in service_mod_pos_list:
-        if pos == '' or pos == '11':
-            if rate_type_desc == 'institutional':
-                pos = '21'
-            else:
-                pos = '11'
-
-        rate_dict = rate_template.copy()
-        rate_dict.update({
-            "update_type": "A",
-            "insurer_code": context.insurer_code,
-            "prov_grp_contract_key": rate_key,
-            "negotiation_arrangement": "ffs",
-            "billing_code_type": code_type,
-            "billing_code_type_ver": "10",
-            "billing_code": proc_code,
-            "pos_collection_key": pos,
-            "negotiated_type": fee_type,
-            "rate": str(fee),
-            "modifier": modifier,
-            "billing_class": rate_type_desc,
-            "expiration_date": term_date,
-            "full_term_section_id": section_id,
-            "calc_bean": calc_bean
-        })
-
-        code_tuple = (proc_code, modifier, pos)
-        dict_key = (term_bundle.rate_sheet_code, proc_code, modifier, pos, code_type)
-        store_rate_record(rate_cache, dict_key, rate_dict, rate_key, rate_group_key_factory, code_tuple, context.shared_config.valid_service_codes, context.rate_cache_index, term_bundle=term_bundle)
+    rate_batch = RateBatch(
+        context.insurer_code, rate_key, fee_type, str(fee), rate_type_desc, term_date,
+        section_id, calc_bean
+    )
+    rate_batch.add_services(service_mod_pos_list, context.shared_config.valid_code_index, '21' if rate_type_desc == 'institutional' else '11')
+    store_rate_batch(rate_cache, rate_batch, context.shared_config.valid_service_codes, context.rate_cache_index, term_bundle=term_bundle)
 
 def process_limit_allowed_percent(context: Context, term_bundle: TermBundle, rate_cache: dict, rate_group_key_factory: RateGroupKeyFactory) -> None:
     service_mod_pos_list = term_bundle.service_mod_pos_list or []
     provider_ranges = term_bundle.provider_ranges
-    if not service_mod_pos_list and not provider_ranges:
+    if not term_bundle.has_service_filter and not provider_ranges:
         return
 
     rate_sheet_code = term_bundle.rate_sheet_code
@@ -135,40 +91,18 @@ def process_limit_allowed_percent(context: Context, term_bundle: TermBundle, rat
         fee = base_rate
         fee_type = "negotiated"
 
-    for proc_code, modifier, pos, code_type in service_mod_pos_list:
-        if pos == '' or pos == '11':
-            if rate_type_desc == 'institutional':
-                pos = '21'
-            else:
-                pos = '11'
-
-        rate_dict = rate_template.copy()
-        rate_dict.update({
-            "update_type": "A",
-            "insurer_code": context.insurer_code,
-            "prov_grp_contract_key": rate_key,
-            "negotiation_arrangement": "ffs",
-            "billing_code_type": code_type,
-            "billing_code_type_ver": "10",
-            "billing_code": proc_code,
-            "pos_collection_key": pos,
-            "negotiated_type": fee_type,
-            "rate": str(fee),
-            "modifier": modifier,
-            "billing_class": rate_type_desc,
-            "expiration_date": term_date,
-            "full_term_section_id": section_id,
-            "calc_bean": calc_bean
-        })
-
-        code_tuple = (proc_code, modifier, pos)
-        dict_key = (term_bundle.rate_sheet_code, proc_code, modifier, pos, code_type)
-        store_rate_record(rate_cache, dict_key, rate_dict, rate_key, rate_group_key_factory, code_tuple, context.shared_config.valid_service_code, context.rate_cache_index, term_bundle=term_bundle)
+    rate_batch = RateBatch(
+        context.insurer_code, rate_key, fee_type, str(fee), rate_type_desc, term_date,
+        section_id, calc_bean
+    )
+    rate_batch.add_services(service_mod_pos_list, context.shared_config.valid_code_index, '21' if rate_type_desc == 'institutional' else '11')
+    if rate_batch:
+        store_rate_batch(rate_cache, rate_batch, context.shared_config.valid_service_code, context.rate_cache_index, term_bundle=term_bundle)
 
 def process_limit_allowed_same_dos(context: Context, term_bundle: TermBundle, rate_cache: dict, rate_group_key_factory: RateGroupKeyFactory) -> None:
     service_mod_pos_list = term_bundle.service_mod_pos_list or []
     provider_ranges = term_bundle.provider_ranges
-    if not service_mod_pos_list and not provider_ranges:
+    if not term_bundle.has_service_filter and not provider_ranges:
         return
 
     rate_sheet_code = term_bundle.rate_sheet_code
@@ -190,32 +124,9 @@ def process_limit_allowed_same_dos(context: Context, term_bundle: TermBundle, ra
         fee = base_rate
         fee_type = "negotiated"
 
-    for proc_code, modifier, pos, code_type in service_mod_pos_list:
-        if pos == '' or pos == '11':
-            if rate_type_desc == 'institutional':
-                pos = '21'
-            else:
-                pos = '11'
-
-        rate_dict = rate_template.copy()
-        rate_dict.update({
-            "update_type": "A",
-            "insurer_code": context.insurer_code,
-            "prov_grp_contract_key": rate_key,
-            "negotiation_arrangement": "ffs",
-            "billing_code_type": code_type,
-            "billing_code_type_ver": "10",
-            "billing_code": proc_code,
-            "pos_collection_key": pos,
-            "negotiated_type": fee_type,
-            "rate": str(fee),
-            "modifier": modifier,
-            "billing_class": rate_type_desc,
-            "expiration_date": term_date,
-            "full_term_section_id": section_id,
-            "calc_bean": calc_bean
-        })
-
-        code_tuple = (proc_code, modifier, pos)
-        dict_key = (term_bundle.rate_sheet_code, proc_code, modifier, pos, code_type)
-        store_rate_record(rate_cache, dict_key, rate_dict, rate_key, rate_group_key_factory, code_tuple, context.shared_config.valid_service_codes, context.rate_cache_index, term_bundle=term_bundle)
+    rate_batch = RateBatch(
+        context.insurer_code, rate_key, fee_type, str(fee), rate_type_desc, term_date,
+        section_id, calc_bean
+    )
+    rate_batch.add_services(service_mod_pos_list, context.shared_config.valid_code_index, '21' if rate_type_desc == 'institutional' else '11')
+    store_rate_batch(rate_cache, rate_batch, context.shared_config.valid_service_codes, context.rate_cache_index, term_bundle=term_bundle)
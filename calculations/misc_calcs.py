@@ -4,17 +4,19 @@
 
 from calculations.fee_schedule import process_fee_schedule
 from context import Context
-from constants import DEFAULT_EXP_DATE, rate_template
+from constants import DEFAULT_EXP_DATE
 from rate_group_key_factory import RateGroupKeyFactory
 from rate_group_utilities import build_rate_group_key_if_needed
-from rate_storage import store_rate_record
+from rate_batch import RateBatch
+from rate_record import RateRecord
+from rate_storage import store_rate_batch, store_rate_record
 from term_bundle import TermBundle
 from utilities import get_service_code_type
 
 def process_per_item(context: Context, term_bundle: TermBundle, rate_cache: dict, rate_group_key_factory: RateGroupKeyFactory) -> None:
     service_mod_pos_list = term_bundle.service_mod_pos_list or []
     provider_ranges = term_bundle.provider_ranges
-    if not service_mod_pos_list and not provider_ranges:
+    if not term_bundle.has_service_filter and not provider_ranges:
         return
 
     rate_sheet_code = term_bundle.rate_sheet_code
@@ -35,37 +37,17 @@ def process_per_item(context: Context, term_bundle: TermBundle, rate_cache: dict
         fee = base_rate
         fee_type = "negotiated"
 
-    for proc_code, modifier, pos, code_type in service_mod_pos_list:
-        if pos == '' or pos == '11':
-            pos = '21' if rate_type_desc == 'institutional' else '11'
-
-        rate_dict = rate_template.copy()
-        rate_dict.update({
-            "update_type": "A",
-            "insurer_code": context.insurer_code,
-            "prov_grp_contract_key": rate_key,
-            "negotiation_arrangement": "ffs",
-            "billing_code_type": code_type,
-            "billing_code_type_ver": "10",
-            "billing_code": proc_code,
-            "pos_collection_key": pos,
-            "negotiated_type": fee_type,
-            "rate": str(fee),
-            "modifier": modifier,
-            "billing_class": rate_type_desc,
-            "expiration_date": term_date,
-            "full_term_section_id": section_id,
-            "calc_bean": calc_bean
-        })
-
-        code_tuple = (proc_code, modifier, pos)
-        dict_key = (term_bundle.rate_sheet_code, proc_code, modifier, pos, code_type)
-        store_rate_record(rate_cache, dict_key, rate_dict, rate_key, rate_group_key_factory, code_tuple, context.shared_config.valid_service_codes, context.rate_cache_index, term_bundle=term_bundle)
+    rate_batch = RateBatch(
+        context.insurer_code, rate_key, fee_type, str(fee), rate_type_desc, term_date,
+        section_id, calc_bean
+    )
+    rate_batch.add_services(service_mod_pos_list, context.shared_config.valid_code_index, '21' if rate_type_desc == 'institutional' else '11')
+    store_rate_batch(rate_cache, rate_batch, context.shared_config.valid_service_codes, context.rate_cache_index, term_bundle=term_bundle)
 
 def process_unit_ltd_by_chg(context: Context, term_bundle: TermBundle, rate_cache: dict, rate_group_key_factory: RateGroupKeyFactory) -> None:
     service_mod_pos_list = term_bundle.service_mod_pos_list or []
     provider_ranges = term_bundle.provider_ranges
-    if not service_mod_pos_list and not provider_ranges:
+    if not term_bundle.has_service_filter and not provider_ranges:
         return
 
     rate_sheet_code = term_bundle.rate_sheet_code
@@ -82,37 +64,17 @@ def process_unit_ltd_by_chg(context: Context, term_bundle: TermBundle, rate_cach
     fee = base_pct_of_charge * 100 if base_pct_of_charge > 0 else base_rate
     fee_type = "percentage" if base_pct_of_charge > 0 else "negotiated"
 
-    for proc_code, modifier, pos, code_type in service_mod_pos_list:
-        if pos == '' or pos == '11':
-            pos = '21' if rate_type_desc == 'institutional' else '11'
-
-        rate_dict = rate_template.copy()
-        rate_dict.update({
-            "update_type": "A",
-            "insurer_code": context.insurer_code,
-            "prov_grp_contract_key": rate_key,
-            "negotiation_arrangement": "ffs",
-            "billing_code_type": code_type,
-            "billing_code_type_ver": "10",
-            "billing_code": proc_code,
-            "pos_collection_key": pos,
-            "negotiated_type": fee_type,
-            "rate": str(fee),
-            "modifier": modifier,
-            "billing_class": rate_type_desc,
-            "expiration_date": term_date,
-            "full_term_section_id": section_id,
-            "calc_bean": calc_bean
-        })
-
-        code_tuple = (proc_code, modifier, pos)
-        dict_key = (term_bundle.rate_sheet_code, proc_code, modifier, pos, code_type)
-        store_rate_record(rate_cache, dict_key, rate_dict, rate_key, rate_group_key_factory, code_tuple, context.shared_config.valid_service_codes, context.rate_cache_index, term_bundle=term_bundle)
+    rate_batch = RateBatch(
+        context.insurer_code, rate_key, fee_type, str(fee), rate_type_desc, term_date,
+        section_id, calc_bean
+    )
+    rate_batch.add_services(service_mod_pos_list, context.shared_config.valid_code_index, '21' if rate_type_desc == 'institutional' else '11')
+    store_rate_batch(rate_cache, rate_batch, context.shared_config.valid_service_codes, context.rate_cache_index, term_bundle=term_bundle)
 
 def process_percent_plus_excess(context: Context, term_bundle: TermBundle, rate_cache: dict, rate_group_key_factory: RateGroupKeyFactory) -> None:
     service_mod_pos_list = term_bundle.service_mod_pos_list or []
     provider_ranges = term_bundle.provider_ranges
-    if not service_mod_pos_list and not provider_ranges:
+    if not term_bundle.has_service_filter and not provider_ranges:
         return
 
     rate_sheet_code = term_bundle.rate_sheet_code
@@ -129,37 +91,17 @@ def process_percent_plus_excess(context: Context, term_bundle: TermBundle, rate_
     fee = base_pct_of_charge * 100 if base_pct_of_charge > 0 else base_rate
     fee_type = "percentage" if base_pct_of_charge > 0 else "negotiated"
 
-    for proc_code, modifier, pos, code_type in service_mod_pos_list:
-        if pos == '' or pos == '11':
-            pos = '21' if rate_type_desc == 'institutional' else '11'
-
-        rate_dict = rate_template.copy()
-        rate_dict.update({
-            "update_type": "A",
-            "insurer_code": context.insurer_code,
-            "prov_grp_contract_key": rate_key,
-            "negotiation_arrangement": "ffs",
-            "billing_code_type": code_type,
-            "billing_code_type_ver": "10",
-            "billing_code": proc_code,
-            "pos_collection_key": pos,
-            "negotiated_type": fee_type,
-            "rate": str(fee),
-            "modifier": modifier,
-            "billing_class": rate_type_desc,
-            "expiration_date": term_date,
-            "full_term_section_id": section_id,
-            "calc_bean": calc_bean
-        })
-
-        code_tuple = (proc_code, modifier, pos)
-        dict_key = (term_bundle.rate_sheet_code, proc_code, modifier, pos, code_type)
-        store_rate_record(rate_cache, dict_key, rate_dict, rate_key, rate_group_key_factory, code_tuple, context.shared_config.valid_service_codes, context.rate_cache_index, term_bundle=term_bundle)
+    rate_batch = RateBatch(
+        context.insurer_code, rate_key, fee_type, str(fee), rate_type_desc, term_date,
+        section_id, calc_bean
+    )
+    rate_batch.add_services(service_mod_pos_list, context.shared_config.valid_code_index, '21' if rate_type_desc == 'institutional' else '11')
+    store_rate_batch(rate_cache, rate_batch, context.shared_config.valid_service_codes, context.rate_cache_index, term_bundle=term_bundle)
 
 def process_visit_plus_rate_per_hour(context: Context, term_bundle: TermBundle, rate_cache: dict, rate_group_key_factory: RateGroupKeyFactory) -> None:
     service_mod_pos_list = term_bundle.service_mod_pos_list or []
     provider_ranges = term_bundle.provider_ranges
-    if not service_mod_pos_list and not provider_ranges:
+    if not term_bundle.has_service_filter and not provider_ranges:
         return
 
     rate_sheet_code = term_bundle.rate_sheet_code
@@ -176,37 +118,17 @@ def process_visit_plus_rate_per_hour(context: Context, term_bundle: TermBundle,
     fee = base_pct_of_charge * 100 if base_pct_of_charge > 0 else base_rate
     fee_type = "percentage" if base_pct_of_charge > 0 else "negotiated"
 
-    for proc_code, modifier, pos, code_type in service_mod_pos_list:
-        if pos == '' or pos == '11':
-            pos = '21' if rate_type_desc == 'institutional' else '11'
-
-        rate_dict = rate_template.copy()
-        rate_dict.update({
-            "update_type": "A",
-            "insurer_code": context.insurer_code,
-            "prov_grp_contract_key": rate_key,
-            "negotiation_arrangement": "ffs",
-            "billing_code_type": code_type,
-            "billing_code_type_ver": "10",
-            "billing_code": proc_code,
-            "pos_collection_key": pos,
-            "negotiated_type": fee_type,
-            "rate": str(fee),
-            "modifier": modifier,
-            "billing_class": rate_type_desc,
-            "expiration_date": term_date,
-            "full_term_section_id": section_id,
-            "calc_bean": calc_bean
-        })
-
-        code_tuple = (proc_code, modifier, pos)
-        dict_key = (term_bundle.rate_sheet_code, proc_code, modifier, pos, code_type)
-        store_rate_record(rate_cache, dict_key, rate_dict, rate_key, rate_group_key_factory, code_tuple, context.shared_config.valid_service_codes, context.rate_cache_index, term_bundle=term_bundle)
+    rate_batch = RateBatch(
+        context.insurer_code, rate_key, fee_type, str(fee), rate_type_desc, term_date,
+        section_id, calc_bean
+    )
+    rate_batch.add_services(service_mod_pos_list, context.shared_config.valid_code_index, '21' if rate_type_desc == 'institutional' else '11')
+    store_rate_batch(rate_cache, rate_batch, context.shared_config.valid_service_codes, context.rate_cache_index, term_bundle=term_bundle)
 
 def process_flat_dollar_discount(context: Context, term_bundle: TermBundle, rate_cache: dict, rate_group_key_factory: RateGroupKeyFactory) -> None:
     service_mod_pos_list = term_bundle.service_mod_pos_list or []
     provider_ranges = term_bundle.provider_ranges
-    if not service_mod_pos_list and not provider_ranges:
+    if not term_bundle.has_service_filter and not provider_ranges:
         return
 
     rate_sheet_code = term_bundle.rate_sheet_code
@@ -222,37 +144,17 @@ def process_flat_dollar_discount(context: Context, term_bundle: TermBundle, rate
     fee = base_pct_of_charge * 100
     fee_type = "percentage"
 
-    for proc_code, modifier, pos, code_type in service_mod_pos_list:
-        if pos == '' or pos == '11':
-            pos = '21' if rate_type_desc == 'institutional' else '11'
-
-        rate_dict = rate_template.copy()
-        rate_dict.update({
-            "update_type": "A",
-            "insurer_code": context.insurer_code,
-            "prov_grp_contract_key": rate_key,
-            "negotiation_arrangement": "ffs",
-            "billing_code_type": code_type,
-            "billing_code_type_ver": "10",
-            "billing_code": proc_code,
-            "pos_collection_key": pos,
-            "negotiated_type": fee_type,
-            "rate": str(fee),
-            "modifier": modifier,
-            "billing_class": rate_type_desc,
-            "expiration_date": term_date,
-            "full_term_section_id": section_id,
-            "calc_bean": calc_bean
-        })
-
-        code_tuple = (proc_code, modifier, pos)
-        dict_key = (term_bundle.rate_sheet_code, proc_code, modifier, pos, code_type)
-        store_rate_record(rate_cache, dict_key, rate_dict, rate_key, rate_group_key_factory, code_tuple, context.shared_config.valid_service_codes, context.rate_cache_index, term_bundle=term_bundle)
+    rate_batch = RateBatch(
+        context.insurer_code, rate_key, fee_type, str(fee), rate_type_desc, term_date,
+        section_id, calc_bean
+    )
+    rate_batch.add_services(service_mod_pos_list, context.shared_config.valid_code_index, '21' if rate_type_desc == 'institutional' else '11')
+    store_rate_batch(rate_cache, rate_batch, context.shared_config.valid_service_codes, context.rate_cache_index, term_bundle=term_bundle)
 
 def process_ndc(context: Context, term_bundle: TermBundle, rate_cache: dict, rate_group_key_factory: RateGroupKeyFactory):
     service_mod_pos_list = term_bundle.service_mod_pos_list or []
     provider_ranges = term_bundle.provider_ranges
-    if not service_mod_pos_list and not provider_ranges:
+    if not term_bundle.has_service_filter and not provider_ranges:
         return
 
     rate_sheet_code = term_bundle.rate_sheet_code
@@ -272,31 +174,21 @@ def process_ndc(context: Context, term_bundle: TermBundle, rate_cache: dict, rat
         if rate_type_desc == 'institutional':
             pos = '21'
 
+    valid_code_index = context.shared_config.valid_code_index
     for ndc_code, unit_price in context.shared_config.ndc_codes.items():
+        if not valid_code_index.is_valid(ndc_code, "NDC"):
+            continue
         fee = round(base_pct_of_charge * unit_price, 2) if base_pct_of_charge else unit_price
 
-        rate_dict = rate_template.copy()
-        rate_dict.update({
-            "update_type": "A",
-            "insurer_code": context.insurer_code,
-            "prov_grp_contract_key": rate_key,
-            "negotiation_arrangement": "ffs",
-            "billing_code_type": "NDC",
-            "billing_code_type_ver": "10",
-            "billing_code": ndc_code,
-            "pos_collection_key": pos,
-            "negotiated_type": fee_type,
-            "rate": str(fee),
-            "modifier": modifier,
-            "billing_class": rate_type_desc,
-            "expiration_date": term_date,
-            "full_term_section_id": section_id,
-            "calc_bean": calc_bean
-        })
+        rate_record = RateRecord(
+            context.insurer_code, rate_key, "NDC", ndc_code, pos,
+            fee_type, str(fee), modifier, rate_type_desc, term_date,
+            section_id, calc_bean
+        )
 
         code_tuple = (ndc_code, modifier, pos)
         dict_key = (term_bundle.rate_sheet_code, ndc_code, modifier, pos, "NDC")
-        store_rate_record(rate_cache, dict_key, rate_dict, rate_key, rate_group_key_factory, code_tuple, context.shared_config.valid_service_codes, context.rate_cache_index, term_bundle=term_bundle)
+        store_rate_record(rate_cache, dict_key, rate_record, rate_key, rate_group_key_factory, code_tuple, context.shared_config.valid_service_codes, context.rate_cache_index, term_bundle=term_bundle)
 
 def process_optum_physician_pricer(context: Context, term_bundle: TermBundle, rate_cache: dict, rate_group_key_factory: RateGroupKeyFactory) -> None:
     # for the professional optum pricer, we just need to use the global rate sheet
@@ -1,8 +1,8 @@
 from context import Context
-from constants import DEFAULT_EXP_DATE, rate_template
 from provider_bundle import ProviderBundle
 from rate_group_key_factory import RateGroupKeyFactory
 from rate_group_utilities import build_rate_group_key_if_needed
+from rate_record import RateRecord
 from rate_storage import ensure_rate_cache_index, store_rate_record
 from term_bundle import TermBundle
 from utilities import get_pos_and_type
@@ -13,7 +13,7 @@ def process_percent_of_allowed(context: Context, term_bundle: TermBundle,
 
     rate_index = context.rate_cache_index
 
-    has_service_filters = bool(term_bundle.service_mod_pos_list)
+    has_service_filters = term_bundle.has_service_filter
     has_provider_filters = bool(term_bundle.provider_ranges)
     if not has_service_filters and not has_provider_filters:
         return
@@ -41,13 +41,13 @@ def _process_poa_without_provider_filters(context: Context, term_bundle: TermBun
         base_key = (rate_sheet_code, proc_code, '', pos, code_type)
         rate_groups = rate_cache.get(base_key)
         if rate_groups:
-            for group_key, rate_dict in rate_groups.items():
-                if not rate_dict["qualified"]:
-                    fee, fee_type = _calculate_poa_rate(rate_dict, base_pct)
-                    base_rate_key = rate_dict["prov_grp_contract_key"]
+            for group_key, rate_record in rate_groups.items():
+                if not rate_record.qualified:
+                    fee, fee_type = _calculate_poa_rate(rate_record, base_pct)
+                    base_rate_key = rate_record.prov_grp_contract_key
                     rate_key = build_rate_group_key_if_needed(term_bundle, base_rate_key, rate_group_key_factory)
 
-                    _build_and_store_rate(context, term_bundle, rate_dict,
+                    _build_and_store_rate(context, term_bundle, rate_record,
                                         proc_code, modifier, pos, code_type,
                                         fee, fee_type, rate_key,
                                         rate_cache, rate_group_key_factory)
@@ -73,8 +73,8 @@ def _filter_rate_keys_by_service(term_bundle: TermBundle, rate_index: dict) -> l
     return list(result)
 
 
-def _calculate_poa_rate(base_entry: dict, base_pct: float) -> tuple[float, str]:
-    allow_amt = float(base_entry.get("rate") or 0)
+def _calculate_poa_rate(base_entry: RateRecord, base_pct: float) -> tuple[float, str]:
+    allow_amt = float(base_entry.rate or 0)
 
     if base_pct > 0:
         fee = round(base_pct * allow_amt, 2)
@@ -87,36 +87,23 @@ def _calculate_poa_rate(base_entry: dict, base_pct: float) -> tuple[float, str]:
 
 
 def _build_and_store_rate(context: Context, term_bundle: TermBundle,
-                          base_entry: dict, proc_code: str, modifier: str, pos: str,
+                          base_entry: RateRecord, proc_code: str, modifier: str, pos: str,
                           code_type: str, fee: float, fee_type: str, rate_key: str,
                           rate_cache: dict, rate_group_key_factory: RateGroupKeyFactory) -> None:
     section_id = term_bundle.section_id
     _, rate_type_desc = get_pos_and_type(section_name="")
     calc_bean = term_bundle.calc_bean
         
-    rate_dict = rate_template.copy()
-    rate_dict.update({
-        "update_type": "A",
-        "insurer_code": context.insurer_code,
-        "prov_grp_contract_key": rate_key,
-        "negotiation_arrangement": "ffs",
-        "billing_code_type": base_entry.get("billing_code_type", ""),
-        "billing_code_type_ver": "10",
-        "billing_code": proc_code,
-        "pos_collection_key": pos,
-        "negotiated_type": fee_type,
-        "rate": str(fee),
-        "modifier": modifier,
-        "billing_class": rate_type_desc,
-        "expiration_date": base_entry.get("expiration_date", DEFAULT_EXP_DATE),
-        "full_term_section_id": section_id,
-        "calc_bean": calc_bean
-    })
+    rate_record = RateRecord(
+        context.insurer_code, rate_key, base_entry.billing_code_type, proc_code, pos,
+        fee_type, str(fee), modifier, rate_type_desc, base_entry.expiration_date,
+        section_id, calc_bean
+    )
 
     code_tuple = (proc_code, modifier, pos)
     dict_key = (term_bundle.rate_sheet_code, proc_code, modifier, pos, code_type, term_bundle.term_id)
     
-    store_rate_record(rate_cache, dict_key, rate_dict, rate_key, rate_group_key_factory, code_tuple,
+    store_rate_record(rate_cache, dict_key, rate_record, rate_key, rate_group_key_factory, code_tuple,
                       context.shared_config.valid_service_codes, context.rate_cache_index,
                       term_bundle=term_bundle)
 
@@ -141,14 +128,13 @@ def _process_poa_by_copy(context: Context, term_bundle: TermBundle,
 
         rate_groups = rate_cache.get(key)
         if rate_groups:
-            for group_key, rate_dict in rate_groups.items():
-                if not rate_dict["qualified"]:
-                    new_rate_dict = rate_dict.copy()
-                    new_rate_dict["qualified"] = False
-                    fee, fee_type = _calculate_poa_rate(new_rate_dict, base_pct)
+            for group_key, rate_record in rate_groups.items():
+                if not rate_record.qualified:
+                    # the new record is built from scratch - read the cached one, no copy needed
+                    fee, fee_type = _calculate_poa_rate(rate_record, base_pct)
 
                     _build_and_store_rate(
-                        context, term_bundle, new_rate_dict,
+                        context, term_bundle, rate_record,
                         proc_code, modifier, pos, code_type,
                         fee, fee_type, new_rate_key,  # store under new key!
                         rate_cache, rate_group_key_factory
@@ -1,9 +1,10 @@
 from context import Context
-from constants import DEFAULT_EXP_DATE, rate_template
+from constants import DEFAULT_EXP_DATE
 from provider_bundle import ProviderBundle
 from rate_group_key_factory import RateGroupKeyFactory
 from rate_group_utilities import build_rate_group_key_if_needed
-from rate_storage import store_rate_record
+from rate_batch import RateBatch
+from rate_storage import store_rate_batch
 from term_bundle import TermBundle
 from file_writer import write_provider_identifiers_record
 from utilities import get_fee_and_type, get_service_code_type, update_prov_grp_contract_keys
@@ -14,7 +15,7 @@ def process_percent_of_charges(context: Context, term_bundle: TermBundle, rate_c
 
     service_mod_pos_list = term_bundle.service_mod_pos_list or []
     provider_ranges = term_bundle.provider_ranges
-    if not service_mod_pos_list and not provider_ranges:
+    if not term_bundle.has_service_filter and not provider_ranges:
         return
     rate_sheet_code = term_bundle.rate_sheet_code
     rate_key = f"{rate_sheet_code}#pct_chgs"
@@ -33,34 +34,13 @@ def process_percent_of_charges(context: Context, term_bundle: TermBundle, rate_c
         fee = term_bundle.base_rate1
         fee_type = 'negotiated'
 
-    for proc_code, modifier, pos, code_type in service_mod_pos_list:
-        if pos == '' or pos == '11':
-            if rate_type_desc == 'institutional':
-                pos = '21'
-        term_date = "99991231"
-        allow_amt = 0
-
-        rate_dict = rate_template.copy()
-        rate_dict.update({
-            "update_type": "A",
-            "insurer_code": context.insurer_code,
-            "prov_grp_contract_key": rate_key,
-            "negotiation_arrangement": "ffs",
-            "billing_code_type": code_type,
-            "billing_code_type_ver": "10",
-            "billing_code": proc_code,
-            "pos_collection_key": pos,
-            "negotiated_type": fee_type,
-            "rate": str(fee),
-            "modifier": modifier,
-            "billing_class": rate_type_desc,
-            "expiration_date": term_date,
-            "full_term_section_id": section_id,
-            "calc_bean": calc_bean
-        })
-        code_tuple = (proc_code, modifier, pos)
-        dict_key = (term_bundle.rate_sheet_code, proc_code, modifier, pos, code_type)
-        store_rate_record(rate_cache, dict_key, rate_dict, rate_key, rate_group_key_factory, code_tuple, context.shared_config.valid_service_codes, context.rate_cache_index, term_bundle=term_bundle)
+    term_date = "99991231"
+    rate_batch = RateBatch(
+        context.insurer_code, rate_key, fee_type, str(fee), rate_type_desc, term_date,
+        section_id, calc_bean
+    )
+    rate_batch.add_services(service_mod_pos_list, context.shared_config.valid_code_index, '21' if rate_type_desc == 'institutional' else None)
+    store_rate_batch(rate_cache, rate_batch, context.shared_config.valid_service_codes, context.rate_cache_index, term_bundle=term_bundle)
 
 def process_pct_of_chrg_flat_amt(context: Context, term_bundle: TermBundle, rate_cache: dict, rate_group_key_factory: RateGroupKeyFactory) -> None:
     rate_sheet_code = term_bundle.rate_sheet_code
@@ -71,7 +51,7 @@ def process_pct_of_chrg_flat_amt(context: Context, term_bundle: TermBundle, rate
     base_pct_of_charge = term_bundle.base_pct_of_charge
     service_mod_pos_list = term_bundle.service_mod_pos_list or []
     provider_ranges = term_bundle.provider_ranges
-    if not service_mod_pos_list and not provider_ranges:
+    if not term_bundle.has_service_filter and not provider_ranges:
         return
     rate_sheet_code = term_bundle.rate_sheet_code
     rate_key = f"{rate_sheet_code}#pct_chgs"
@@ -84,34 +64,13 @@ def process_pct_of_chrg_flat_amt(context: Context, term_bundle: TermBundle, rate
         fee = term_bundle.base_rate1
         fee_type = 'negotiated'
 
-    for proc_code, modifier, pos, code_type in service_mod_pos_list:
-        if pos == '' or pos == '11':
-            if rate_type_desc == 'institutional':
-                pos = '21'
-        term_date = "99991231"
-
-        rate_dict = rate_template.copy()
-        rate_dict.update({
-            "update_type": "A",
-            "insurer_code": context.insurer_code,
-            "prov_grp_contract_key": rate_key,
-            "negotiation_arrangement": "ffs",
-            "billing_code_type": code_type,
-            "billing_code_type_ver": "10",
-            "billing_code": proc_code,
-            "pos_collection_key": pos,
-            "negotiated_type": fee_type,
-            "rate": str(fee),
-            "modifier": modifier,
-            "billing_class": rate_type_desc,
-            "expiration_date": term_date,
-            "full_term_section_id": section_id,
-            "calc_bean": calc_bean
-        })
-
-        code_tuple = (proc_code, modifier, pos)
-        dict_key = (term_bundle.rate_sheet_code, proc_code, modifier, pos, code_type)
-        store_rate_record(rate_cache, dict_key, rate_dict, rate_key, rate_group_key_factory, code_tuple, context.shared_config.valid_service_codes, context.rate_cache_index, term_bundle=term_bundle)
+    term_date = "99991231"
+    rate_batch = RateBatch(
+        context.insurer_code, rate_key, fee_type, str(fee), rate_type_desc, term_date,
+        section_id, calc_bean
+    )
+    rate_batch.add_services(service_mod_pos_list, context.shared_config.valid_code_index, '21' if rate_type_desc == 'institutional' else None)
+    store_rate_batch(rate_cache, rate_batch, context.shared_config.valid_service_codes, context.rate_cache_index, term_bundle=term_bundle)
 
 def process_percent_of_charges_max(context: Context, term_bundle: TermBundle, rate_cache: dict, rate_group_key_factory: RateGroupKeyFactory) -> None:
     rate_sheet_code = term_bundle.rate_sheet_code
@@ -122,7 +81,7 @@ def process_percent_of_charges_max(context: Context, term_bundle: TermBundle, ra
     base_pct_of_charge = term_bundle.base_pct_of_charge
     service_mod_pos_list = term_bundle.service_mod_pos_list or []
     provider_ranges = term_bundle.provider_ranges
-    if not service_mod_pos_list and not provider_ranges:
+    if not term_bundle.has_service_filter and not provider_ranges:
         return
     rate_sheet_code = term_bundle.rate_sheet_code
     rate_key = f"{rate_sheet_code}#pct_chgs"
@@ -130,34 +89,13 @@ def process_percent_of_charges_max(context: Context, term_bundle: TermBundle, ra
     fee = term_bundle.base_rate
     fee_type = 'negotiated'
 
-    for proc_code, modifier, pos, code_type in service_mod_pos_list:
-        if pos == '' or pos == '11':
-            if rate_type_desc == 'institutional':
-                pos = '21'
-        term_date = "99991231"
-
-        rate_dict = rate_template.copy()
-        rate_dict.update({
-            "update_type": "A",
-            "insurer_code": context.insurer_code,
-            "prov_grp_contract_key": rate_key,
-            "negotiation_arrangement": "ffs",
-            "billing_code_type":code_type,
-            "billing_code_type_ver": "10",
-            "billing_code": proc_code,
-            "pos_collection_key": pos,
-            "negotiated_type": fee_type,
-            "rate": str(fee),
-            "modifier": modifier,
-            "billing_class": rate_type_desc,
-            "expiration_date": term_date,
-            "full_term_section_id": section_id,
-            "calc_bean": calc_bean
-        })
-
-        code_tuple = (proc_code, modifier, pos)
-        dict_key = (term_bundle.rate_sheet_code, proc_code, modifier, pos, code_type)
-        store_rate_record(rate_cache, dict_key, rate_dict, rate_key, rate_group_key_factory, code_tuple, context.shared_config.valid_service_codes, context.rate_cache_index, term_bundle=term_bundle)
+    term_date = "99991231"
+    rate_batch = RateBatch(
+        context.insurer_code, rate_key, fee_type, str(fee), rate_type_desc, term_date,
+        section_id, calc_bean
+    )
+    rate_batch.add_services(service_mod_pos_list, context.shared_config.valid_code_index, '21' if rate_type_desc == 'institutional' else None)
+    store_rate_batch(rate_cache, rate_batch, context.shared_config.valid_service_codes, context.rate_cache_index, term_bundle=term_bundle)
 
 def process_percent_of_charges_max_01(context: Context, term_bundle: TermBundle, rate_cache: dict, rate_group_key_factory: RateGroupKeyFactory) -> None:
     rate_sheet_code = term_bundle.rate_sheet_code
@@ -168,7 +106,7 @@ def process_percent_of_charges_max_01(context: Context, term_bundle: TermBundle,
     base_pct_of_charge = term_bundle.base_pct_of_charge
     service_mod_pos_list = term_bundle.service_mod_pos_list or []
     provider_ranges = term_bundle.provider_ranges
-    if not service_mod_pos_list and not provider_ranges:
+    if not term_bundle.has_service_filter and not provider_ranges:
         return
     rate_sheet_code = term_bundle.rate_sheet_code
     rate_key = f"{rate_sheet_code}#pct_chgs"
@@ -176,34 +114,13 @@ def process_percent_of_charges_max_01(context: Context, term_bundle: TermBundle,
     fee = term_bundle.base_rate
     fee_type = 'negotiated'
 
-    for proc_code, modifier, pos, code_type in service_mod_pos_list:
-        if pos == '' or pos == '11':
-            if rate_type_desc == 'institutional':
-                pos = '21'
-        term_date = "99991231"
-
-        rate_dict = rate_template.copy()
-        rate_dict.update({
-            "update_type": "A",
-            "insurer_code": context.insurer_code,
-            "prov_grp_contract_key": rate_key,
-            "negotiation_arrangement": "ffs",
-            "billing_code_type": code_type,
-            "billing_code_type_ver": "10",
-            "billing_code": proc_code,
-            "pos_collection_key": pos,
-            "negotiated_type": fee_type,
-            "rate": str(fee),
-            "modifier": modifier,
-            "billing_class": rate_type_desc,
-            "expiration_date": term_date,
-            "full_term_section_id": section_id,
-            "calc_bean": calc_bean
-        })
-
-        code_tuple = (proc_code, modifier, pos)
-        dict_key = (term_bundle.rate_sheet_code, proc_code, modifier, pos, code_type)
-        store_rate_record(rate_cache, dict_key, rate_dict, rate_key, rate_group_key_factory, code_tuple, context.shared_config.valid_service_codes, context.rate_cache_index, term_bundle=term_bundle)
+    term_date = "99991231"
+    rate_batch = RateBatch(
+        context.insurer_code, rate_key, fee_type, str(fee), rate_type_desc, term_date,
+        section_id, calc_bean
+    )
+    rate_batch.add_services(service_mod_pos_list, context.shared_config.valid_code_index, '21' if rate_type_desc == 'institutional' else None)
+    store_rate_batch(rate_cache, rate_batch, context.shared_config.valid_service_codes, context.rate_cache_index, term_bundle=term_bundle)
 
 def process_pct_chg_pd_max(context: Context, term_bundle: TermBundle, rate_cache: dict, rate_group_key_factory: RateGroupKeyFactory) -> None:
     rate_sheet_code = term_bundle.rate_sheet_code
@@ -214,7 +131,7 @@ def process_pct_chg_pd_max(context: Context, term_bundle: TermBundle, rate_cache
     base_pct_of_charge = term_bundle.base_pct_of_charge
     service_mod_pos_list = term_bundle.service_mod_pos_list or []
     provider_ranges = term_bundle.provider_ranges
-    if not service_mod_pos_list and not provider_ranges:
+    if not term_bundle.has_service_filter and not provider_ranges:
         return
     rate_sheet_code = term_bundle.rate_sheet_code
     rate_key = f"{rate_sheet_code}#pct_chgs"
@@ -222,34 +139,13 @@ def process_pct_chg_pd_max(context: Context, term_bundle: TermBundle, rate_cache
     fee = term_bundle.base_rate
     fee_type = 'negotiated'
 
-    for proc_code, modifier, pos, code_type in service_mod_pos_list:
-        if pos == '' or pos == '11':
-            if rate_type_desc == 'institutional':
-                pos = '21'
-        term_date = "99991231"
-
-        rate_dict = rate_template.copy()
-        rate_dict.update({
-            "update_type": "A",
-            "insurer_code": context.insurer_code,
-            "prov_grp_contract_key": rate_key,
-            "negotiation_arrangement": "ffs",
-            "billing_code_type": code_type,
-            "billing_code_type_ver": "10",
-            "billing_code": proc_code,
-            "pos_collection_key": pos,
-            "negotiated_type": fee_type,
-            "rate": str(fee),
-            "modifier": modifier,
-            "billing_class": rate_type_desc,
-            "expiration_date": term_date,
-            "full_term_section_id": section_id,
-            "calc_bean": calc_bean
-        })
-
-        code_tuple = (proc_code, modifier, pos)
-        dict_key = (term_bundle.rate_sheet_code, proc_code, modifier, pos, code_type)
-        store_rate_record(rate_cache, dict_key, rate_dict, rate_key, rate_group_key_factory, code_tuple, context.shared_config.valid_service_codes, context.rate_cache_index, term_bundle=term_bundle)
+    term_date = "99991231"
+    rate_batch = RateBatch(
+        context.insurer_code, rate_key, fee_type, str(fee), rate_type_desc, term_date,
+        section_id, calc_bean
+    )
+    rate_batch.add_services(service_mod_pos_list, context.shared_config.valid_code_index, '21' if rate_type_desc == 'institutional' else None)
+    store_rate_batch(rate_cache, rate_batch, context.shared_config.valid_service_codes, context.rate_cache_index, term_bundle=term_bundle)
 
 def process_pct_chg_pd_max_01(context: Context, term_bundle: TermBundle, rate_cache: dict, rate_group_key_factory: RateGroupKeyFactory) -> None:
     rate_sheet_code = term_bundle.rate_sheet_code
@@ -260,7 +156,7 @@ def process_pct_chg_pd_max_01(context: Context, term_bundle: TermBundle, rate_ca
     base_pct_of_charge = term_bundle.base_pct_of_charge
     service_mod_pos_list = term_bundle.service_mod_pos_list or []
     provider_ranges = term_bundle.provider_ranges
-    if not service_mod_pos_list and not provider_ranges:
+    if not term_bundle.has_service_filter and not provider_ranges:
         return
     rate_sheet_code = term_bundle.rate_sheet_code
     rate_key = f"{rate_sheet_code}#pct_chgs"
@@ -268,34 +164,13 @@ def process_pct_chg_pd_max_01(context: Context, term_bundle: TermBundle, rate_ca
     fee = term_bundle.base_rate
     fee_type = 'negotiated'
 
-    for proc_code, modifier, pos, code_type in service_mod_pos_list:
-        if pos == '' or pos == '11':
-            if rate_type_desc == 'institutional':
-                pos = '21'
-        term_date = "99991231"
-
-        rate_dict = rate_template.copy()
-        rate_dict.update({
-            "update_type": "A",
-            "insurer_code": context.insurer_code,
-            "prov_grp_contract_key": rate_key,
-            "negotiation_arrangement": "ffs",
-            "billing_code_type": code_type,
-            "billing_code_type_ver": "10",
-            "billing_code": proc_code,
-            "pos_collection_key": pos,
-            "negotiated_type": fee_type,
-            "rate": str(fee),
-            "modifier": modifier,
-            "billing_class": rate_type_desc,
-            "expiration_date": term_date,
-            "full_term_section_id": section_id,
-            "calc_bean": calc_bean
-        })
-
-        code_tuple = (proc_code, modifier, pos)
-        dict_key = (term_bundle.rate_sheet_code, proc_code, modifier, pos, code_type)
-        store_rate_record(rate_cache, dict_key, rate_dict, rate_key, rate_group_key_factory, code_tuple, context.shared_config.valid_service_codes, context.rate_cache_index, term_bundle=term_bundle)
+    term_date = "99991231"
+    rate_batch = RateBatch(
+        context.insurer_code, rate_key, fee_type, str(fee), rate_type_desc, term_date,
+        section_id, calc_bean
+    )
+    rate_batch.add_services(service_mod_pos_list, context.shared_config.valid_code_index, '21' if rate_type_desc == 'institutional' else None)
+    store_rate_batch(rate_cache, rate_batch, context.shared_config.valid_service_codes, context.rate_cache_index, term_bundle=term_bundle)
 
 
 def process_pct_chg_per_proc_max(context: Context, term_bundle: TermBundle, rate_cache: dict, rate_group_key_factory: RateGroupKeyFactory) -> None:
@@ -307,7 +182,7 @@ def process_pct_chg_per_proc_max(context: Context, term_bundle: TermBundle, rate
     base_pct_of_charge = term_bundle.base_pct_of_charge
     service_mod_pos_list = term_bundle.service_mod_pos_list or []
     provider_ranges = term_bundle.provider_ranges
-    if not service_mod_pos_list and not provider_ranges:
+    if not term_bundle.has_service_filter and not provider_ranges:
         return
     rate_sheet_code = term_bundle.rate_sheet_code
     rate_key = f"{rate_sheet_code}#pct_chgs"
@@ -315,34 +190,13 @@ def process_pct_chg_per_proc_max(context: Context, term_bundle: TermBundle, rate
     fee = term_bundle.base_rate
     fee_type = 'negotiated'
 
-    for proc_code, modifier, pos, code_type in service_mod_pos_list:
-        if pos == '' or pos == '11':
-            if rate_type_desc == 'institutional':
-                pos = '21'
-        term_date = "99991231"
-
-        rate_dict = rate_template.copy()
-        rate_dict.update({
-            "update_type": "A",
-            "insurer_code": context.insurer_code,
-            "prov_grp_contract_key": rate_key,
-            "negotiation_arrangement": "ffs",
-            "billing_code_type": code_type,
-            "billing_code_type_ver": "10",
-            "billing_code": proc_code,
-            "pos_collection_key": pos,
-            "negotiated_type": fee_type,
-            "rate": str(fee),
-            "modifier": modifier,
-            "billing_class": rate_type_desc,
-            "expiration_date": term_date,
-            "full_term_section_id": section_id,
-            "calc_bean": calc_bean
-        })
-
-        code_tuple = (proc_code, modifier, pos)
-        dict_key = (term_bundle.rate_sheet_code, proc_code, modifier, pos, code_type)
-        store_rate_record(rate_cache, dict_key, rate_dict, rate_key, rate_group_key_factory, code_tuple, context.shared_config.valid_service_codes, context.rate_cache_index, term_bundle=term_bundle)
+    term_date = "99991231"
+    rate_batch = RateBatch(
+        context.insurer_code, rate_key, fee_type, str(fee), rate_type_desc, term_date,
+        section_id, calc_bean
+    )
+    rate_batch.add_services(service_mod_pos_list, context.shared_config.valid_code_index, '21' if rate_type_desc == 'institutional' else None)
+    store_rate_batch(rate_cache, rate_batch, context.shared_config.valid_service_codes, context.rate_cache_index, term_bundle=term_bundle)
 
 def process_pct_chg_per_unit_threshold(context: Context, term_bundle: TermBundle, rate_cache: dict, rate_group_key_factory: RateGroupKeyFactory) -> None:
     rate_sheet_code = term_bundle.rate_sheet_code
@@ -353,7 +207,7 @@ def process_pct_chg_per_unit_threshold(context: Context, term_bundle: TermBundle
     base_pct_of_charge = term_bundle.base_pct_of_charge
     service_mod_pos_list = term_bundle.service_mod_pos_list or []
     provider_ranges = term_bundle.provider_ranges
-    if not service_mod_pos_list and not provider_ranges:
+    if not term_bundle.has_service_filter and not provider_ranges:
         return
     rate_sheet_code = term_bundle.rate_sheet_code
     rate_key = f"{rate_sheet_code}#pct_chgs"
@@ -361,34 +215,13 @@ def process_pct_chg_per_unit_threshold(context: Context, term_bundle: TermBundle
     fee = base_pct_of_charge * 100
     fee_type = 'percentage'
 
-    for proc_code, modifier, pos, code_type in service_mod_pos_list:
-        if pos == '' or pos == '11':
-            if rate_type_desc == 'institutional':
-                pos = '21'
-        term_date = "99991231"
-
-        rate_dict = rate_template.copy()
-        rate_dict.update({
-            "update_type": "A",
-            "insurer_code": context.insurer_code,
-            "prov_grp_contract_key": rate_key,
-            "negotiation_arrangement": "ffs",
-            "billing_code_type": code_type,
-            "billing_code_type_ver": "10",
-            "billing_code": proc_code,
-            "pos_collection_key": pos,
-            "negotiated_type": fee_type,
-            "rate": str(fee),
-            "modifier": modifier,
-            "billing_class": rate_type_desc,
-            "expiration_date": term_date,
-            "full_term_section_id": section_id,
-            "calc_bean": calc_bean
-        })
-
-        code_tuple = (proc_code, modifier, pos)
-        dict_key = (term_bundle.rate_sheet_code, proc_code, modifier, pos, code_type)
-        store_rate_record(rate_cache, dict_key, rate_dict, rate_key, rate_group_key_factory, code_tuple, context.shared_config.valid_service_codes, context.rate_cache_index, term_bundle=term_bundle)
+    term_date = "99991231"
+    rate_batch = RateBatch(
+        context.insurer_code, rate_key, fee_type, str(fee), rate_type_desc, term_date,
+        section_id, calc_bean
+    )
+    rate_batch.add_services(service_mod_pos_list, context.shared_config.valid_code_index, '21' if rate_type_desc == 'institutional' else None)
+    store_rate_batch(rate_cache, rate_batch, context.shared_config.valid_service_codes, context.rate_cache_index, term_bundle=term_bundle)
 
 def process_percent_threshold(context: Context, term_bundle: TermBundle, rate_cache: dict, rate_group_key_factory: RateGroupKeyFactory) -> None:
     rate_sheet_code = term_bundle.rate_sheet_code
@@ -399,7 +232,7 @@ def process_percent_threshold(context: Context, term_bundle: TermBundle, rate_ca
     base_pct_of_charge = term_bundle.base_pct_of_charge
     service_mod_pos_list = term_bundle.service_mod_pos_list or []
     provider_ranges = term_bundle.provider_ranges
-    if not service_mod_pos_list and not provider_ranges:
+    if not term_bundle.has_service_filter and not provider_ranges:
         return
     rate_sheet_code = term_bundle.rate_sheet_code
     rate_key = f"{rate_sheet_code}#pct_chgs"
@@ -407,31 +240,10 @@ def process_percent_threshold(context: Context, term_bundle: TermBundle, rate_ca
     fee = base_pct_of_charge * 100
     fee_type = 'percentage'
 
-    for proc_code, modifier, pos, code_type in service_mod_pos_list:
-        if pos == '' or pos == '11':
-            if rate_type_desc == 'institutional':
-                pos = '21'
-        term_date = "99991231"
-
-        rate_dict = rate_template.copy()
-        rate_dict.update({
-            "update_type": "A",
-            "insurer_code": context.insurer_code,
-            "prov_grp_contract_key": rate_key,
-            "negotiation_arrangement": "ffs",
-            "billing_code_type": code_type,
-            "billing_code_type_ver": "10",
-            "billing_code": proc_code,
-            "pos_collection_key": pos,
-            "negotiated_type": fee_type,
-            "rate": str(fee),
-            "modifier": modifier,
-            "billing_class": rate_type_desc,
-            "expiration_date": term_date,
-            "full_term_section_id": section_id,
-            "calc_bean": calc_bean
-        })
-
-        code_tuple = (proc_code, modifier, pos)
-        dict_key = (term_bundle.rate_sheet_code, proc_code, modifier, pos, code_type)
-        store_rate_record(rate_cache, dict_key, rate_dict, rate_key, rate_group_key_factory, code_tuple, context.shared_config.valid_service_codes, context.rate_cache_index, term_bundle=term_bundle)
\ No newline at end of file
+    term_date = "99991231"
+    rate_batch = RateBatch(
+        context.insurer_code, rate_key, fee_type, str(fee), rate_type_desc, term_date,
+        section_id, calc_bean
+    )
+    rate_batch.add_services(service_mod_pos_list, context.shared_config.valid_code_index, '21' if rate_type_desc == 'institutional' else None)
+    store_rate_batch(rate_cache, rate_batch, context.shared_config.valid_service_codes, context.rate_cache_index, term_bundle=term_bundle)
@@ -0,0 +1,142 @@
+"""
+code_group_forest.py
+
+Every code group in shared_config.codegroups compiled once, in the parent,
+into the tree form process_term works from, so the rate sheet workers don't
+each rebuild the same nested trees through build_code_group_tree_from_term.
+
+A compiled tree is flat: its children are the leaf ranges of the group and
+every group nested under it, in the order the recursive build visits them.
+Nested groups are resolved the way generate_service_combinations merges
+them: their included service codes, modifiers and POS values carry up as
+is, and a NOT service range carries up only when its nested group also
+includes codes of that type. The tree's provider_ranges already hold the
+provider ranges with NOT inherited from the nested groups above them, as
+extract_provider_ranges_from_tree works them out.
+
+The groups are walked with an explicit stack, so nesting depth doesn't
+matter. A reference back to a group on the current path (a cycle) adds
+nothing, like the self-reference guard of the recursive build. A group that
+nests a missing group is left out, so process_term still reports it.
+"""
+
+class _CompiledGroup:
+    def __init__(self):
+        self.leaves: list[dict] = []
+        # (code_type, code_low, not_logic_ind) for every provider range, in order
+        self.provider_entries: list[tuple] = []
+        self.service_types: set[str] = set()
+        # False when a cycle was cut below this group - the result then
+        # depends on the path it was reached by and isn't reused
+        self.clean = True
+
+    def merge(self, nested: "_CompiledGroup", nested_not, service_code_range_types) -> None:
+        for leaf in nested.leaves:
+            code_type = leaf["code_type"]
+            if leaf["not_logic_ind"] and code_type in service_code_range_types and code_type not in nested.service_types:
+                continue
+            self.leaves.append(leaf)
+        self.service_types.update(nested.service_types)
+        self.provider_entries.extend(
+            (code_type, code_low, nested_not or not_logic_ind)
+            for code_type, code_low, not_logic_ind in nested.provider_entries
+        )
+        self.clean = self.clean and nested.clean
+
+class CodeGroupForest:
+    def __init__(self, codegroups: dict, service_code_range_types, provider_code_range_types):
+        self.service_code_range_types = set(service_code_range_types)
+        self.provider_code_range_types = set(provider_code_range_types)
+        self.trees: dict[int, dict] = {}
+        self.cycles = 0
+        self.missing: set[int] = set()
+
+        compiled: dict[int, _CompiledGroup] = {}
+        for group_id, group in codegroups.items():
+            group_id = int(group_id)
+            result = self._compile(codegroups, group_id, group, compiled)
+            if result is None:
+                continue
+            provider_ranges: dict[str, dict] = {}
+            for code_type, code_low, not_logic_ind in result.provider_entries:
+                provider_ranges.setdefault(code_type, {})[code_low] = {"not_logic_ind": not_logic_ind}
+            self.trees[group_id] = {
+                "code_group_id": group_id,
+                "code_group_name": group["code_group_name"],
+                "not_logic_ind": False,
+                "children": result.leaves,
+                "provider_ranges": provider_ranges,
+                "compiled": True
+            }
+
+    def _compile(self, codegroups: dict, root_id: int, root: dict, compiled: dict) -> _CompiledGroup | None:
+        if root_id in compiled:
+            return compiled[root_id]
+
+        # frames: (group id, rows iterator, result, NOT flag of the reference to it)
+        stack = [(root_id, iter(root["values"]), _CompiledGroup(), False)]
+        path = {root_id}
+        while stack:
+            group_id, rows, result, reference_not = stack[-1]
+            for row in rows:
+                nested_group_id = row.get("nested_code_group_id")
+                code_type = row.get("code_type")
+                code_low = row.get("code_low")
+                code_high = row.get("code_high")
+                is_not = row.get("not_logic_ind", False)
+
+                if nested_group_id:
+                    nested_group_id = int(nested_group_id)
+                    if nested_group_id in path:
+                        if nested_group_id != group_id:
+                            self.cycles += 1
+                            result.clean = False
+                        continue
+                    if nested_group_id in compiled:
+                        result.merge(compiled[nested_group_id], is_not, self.service_code_range_types)
+                        continue
+                    if nested_group_id not in codegroups:
+                        self.missing.add(nested_group_id)
+                        return None
+                    stack.append((nested_group_id, iter(codegroups[nested_group_id]["values"]), _CompiledGroup(), is_not))
+                    path.add(nested_group_id)
+                    break
+
+                if code_low and code_high:
+                    result.leaves.append({
+                        "code_low": code_low,
+                        "code_high": code_high,
+                        "code_type": code_type,
+                        "not_logic_ind": is_not
+                    })
+                    if code_type in self.service_code_range_types and not is_not:
+                        result.service_types.add(code_type)
+                    if code_type in self.provider_code_range_types:
+                        result.provider_entries.append((code_type, code_low, is_not))
+            else:
+                # every row of this group is done
+                stack.pop()
+                path.discard(group_id)
+                if result.clean:
+                    compiled[group_id] = result
+                if stack:
+                    stack[-1][2].merge(result, reference_not, self.service_code_range_types)
+                else:
+                    return result
+
+    def get(self, code_group_id: int) -> dict | None:
+        return self.trees.get(code_group_id)
+
+    def __contains__(self, code_group_id) -> bool:
+        return code_group_id in self.trees
+
+    def __len__(self) -> int:
+        return len(self.trees)
+
+    def statistics(self) -> dict[str, int]:
+        return {
+            "groups": len(self.trees),
+            "leaves": sum(len(tree["children"]) for tree in self.trees.values()),
+            "cycles": self.cycles,
+            "missing": len(self.missing),
+        }
@@ -0,0 +1,73 @@
+"""
+code_interning.py
+
+Process-wide interning of billing codes, modifiers, place of service values
+and code types.
+
+The same few hundred thousand codes flow through the reference loaders,
+generate_service_combinations, the rate_cache keys, valid_service_codes and
+every rate dict. Interning hands out one canonical str object per distinct
+code, so:
+- the copies don't pile up in memory
+- a str's hash is computed once and cached on that shared object
+- dict and set probes hit the identity check before ever comparing characters
+
+Range expansion goes through numeric_code/zip_code, so the `str(i)` for a
+code is built once per process instead of once per term.
+
+The table is pickled along with shared_config (in the reference snapshot
+and the pool initializer). The canonical strings then arrive as the same
+objects the reference data holds, and use_code_table makes that table the
+process's table.
+"""
+
+from typing import Any
+
+class CodeTable:
+    def __init__(self):
+        self.canonical: dict[str, str] = {}
+        self.numeric: dict[int, str] = {}
+        self.zip_codes: dict[int, str] = {}
+
+    def intern(self, code: Any) -> Any:
+        # setdefault is a single dict operation - safe across the startup loader threads
+        if type(code) is not str:
+            return code
+        return self.canonical.setdefault(code, code)
+
+    def numeric_code(self, number: int) -> str:
+        code = self.numeric.get(number)
+        if code is None:
+            code = self.numeric.setdefault(number, self.intern(str(number)))
+        return code
+
+    def zip_code(self, number: int) -> str:
+        code = self.zip_codes.get(number)
+        if code is None:
+            code = self.zip_codes.setdefault(number, self.intern(str(number).zfill(5)))
+        return code
+
+    def statistics(self) -> dict[str, int]:
+        return {
+            "codes": len(self.canonical),
+            "numeric": len(self.numeric),
+            "zip_codes": len(self.zip_codes)
+        }
+
+_code_table = CodeTable()
+
+def get_code_table() -> CodeTable:
+    return _code_table
+
+def use_code_table(code_table: CodeTable) -> None:
+    global _code_table
+    _code_table = code_table
+
+def intern_code(code: Any) -> Any:
+    return _code_table.intern(code)
+
+def numeric_code(number: int) -> str:
+    return _code_table.numeric_code(number)
+
+def zip_code(number: int) -> str:
+    return _code_table.zip_code(number)
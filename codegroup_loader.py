@@ -1,22 +1,10 @@
+from code_interning import intern_code
 from collections import defaultdict
 from context import Context
 from utilities import get_dict_value
 
-def is_valid_cpt4(code: str) -> bool:
-    return str(code).isdigit() and len(code) in (4, 5)
-
-def is_valid_place_of_service(code: str) -> bool:
-    return str(code).isdigit() and len(code) <= 2
-
-def default_code_group_entry():
-    return {
-        "code_group_name": None,
-        "values": []
-    }
-
-
-def load_code_groups(networx_conn) -> dict:
-    query = """
+# source queries - also hashed into the reference snapshot key
+CODE_GROUPS_QUERY = """
     SELECT
         cg.CODEGROUPID,
         cg.CODEGROUPNAME,
@@ -31,7 +19,43 @@ def load_code_groups(networx_conn) -> dict:
     ORDER BY cg.CODEGROUPID, cgv.SEQNUMBER
     """
 
-    rows = networx_conn.execute_query_with_columns(query)
+AMBSURG_CODES_QUERY = """
+    SELECT AMBSURGGRPCODE, ASCGROUPNUMBER, SOURCETYPE, YEARAPPLIED
+    FROM AMBSURGGRPCODES
+    """
+
+NDC_CODES_QUERY = """
+    SELECT NDCCODE, UNITPRICE
+    FROM NDCPRICING
+    """
+
+DRG_WEIGHTS_QUERY = """
+    SELECT DRG, RELATIVEWEIGHT, SOURCETYPE, YEARAPPLIED, EFFECTIVEDATE, TERMINATIONDATE 
+    FROM DRGWEIGHTS 
+    WHERE GETDATE() BETWEEN EFFECTIVEDATE AND TERMINATIONDATE
+    """
+
+LOCALITY_ZIP_RANGES_QUERY = """
+        SELECT LOCALITYNUMBER, CARRIERNUMBER, BEGINZIP, ENDZIP
+        FROM RBRVSZIP
+        WHERE GETDATE() BETWEEN EFFECTIVEDATE AND TERMINATIONDATE
+    """
+
+def is_valid_cpt4(code: str) -> bool:
+    return str(code).isdigit() and len(code) in (4, 5)
+
+def is_valid_place_of_service(code: str) -> bool:
+    return str(code).isdigit() and len(code) <= 2
+
+def default_code_group_entry():
+    return {
+        "code_group_name": None,
+        "values": []
+    }
+
+
+def load_code_groups(networx_conn) -> dict:
+    rows = networx_conn.stream_query_with_columns(CODE_GROUPS_QUERY)
     
     code_groups = defaultdict(default_code_group_entry) 
     
@@ -41,9 +65,9 @@ def load_code_groups(networx_conn) -> dict:
         code_groups[group_id]["code_group_name"] = group_name
 
         code_groups[group_id]["values"].append({
-            "code_low": row.get("CODELOWVALUE", ''),
-            "code_high": row.get("CODEHIGHVALUE", ''),
-            "code_type": row.get("CODETYPEBEAN", ''),
+            "code_low": intern_code(row.get("CODELOWVALUE", '')),
+            "code_high": intern_code(row.get("CODEHIGHVALUE", '')),
+            "code_type": intern_code(row.get("CODETYPEBEAN", '')),
             "nested_code_group_id": row.get("NESTEDCODEGROUPID", 0),
             "not_logic_ind": row.get("NOTLOGICIND", 0)
         })
@@ -51,11 +75,7 @@ def load_code_groups(networx_conn) -> dict:
     return code_groups
 
 def load_ambsurg_codes(conn) -> dict:
-    query = """
-    SELECT AMBSURGGRPCODE, ASCGROUPNUMBER, SOURCETYPE, YEARAPPLIED
-    FROM AMBSURGGRPCODES
-    """
-    rows = conn.execute_query_with_columns(query)
+    rows = conn.stream_query_with_columns(AMBSURG_CODES_QUERY)
     return {
     (row["AMBSURGGRPCODE"], row["SOURCETYPE"], row["YEARAPPLIED"]): int(row["ASCGROUPNUMBER"])
     for row in rows
@@ -63,11 +83,7 @@ def load_ambsurg_codes(conn) -> dict:
 }
 
 def load_ndc_codes(conn) -> dict:
-    query = """
-    SELECT NDCCODE, UNITPRICE
-    FROM NDCPRICING
-    """
-    rows = conn.execute_query_with_columns(query)
+    rows = conn.stream_query_with_columns(NDC_CODES_QUERY)
     return {
     row["NDCCODE"]:row["UNITPRICE"]
     for row in rows
@@ -75,12 +91,7 @@ def load_ndc_codes(conn) -> dict:
 }
 
 def load_drg_weights(conn) -> dict:
-    query = """
-    SELECT DRG, RELATIVEWEIGHT, SOURCETYPE, YEARAPPLIED, EFFECTIVEDATE, TERMINATIONDATE 
-    FROM DRGWEIGHTS 
-    WHERE GETDATE() BETWEEN EFFECTIVEDATE AND TERMINATIONDATE
-    """
-    rows = conn.execute_query_with_columns(query)
+    rows = conn.stream_query_with_columns(DRG_WEIGHTS_QUERY)
     return {
     (row["DRG"], row["RELATIVEWEIGHT"], row["SOURCETYPE"], row["YEARAPPLIED"])
     for row in rows
@@ -91,12 +102,7 @@ def load_locality_zip_ranges(conn) -> list[tuple[str, str, str, str]]:
     """
     Load (carrier, locality, begin_zip, end_zip) tuples from RBRVSZIP.
     """
-    query = """
-        SELECT LOCALITYNUMBER, CARRIERNUMBER, BEGINZIP, ENDZIP
-        FROM RBRVSZIP
-        WHERE GETDATE() BETWEEN EFFECTIVEDATE AND TERMINATIONDATE
-    """
-    rows = conn.execute_query_with_columns(query)
+    rows = conn.stream_query_with_columns(LOCALITY_ZIP_RANGES_QUERY)
 
     return [
         (
@@ -1,11 +1,20 @@
+from code_interning import numeric_code, zip_code
 from context import Context
+from interval_set import CodeSet
+from service_combinations import ServiceCombinations
 from term_bundle import TermBundle
 from utilities import get_dict_value, normalize_code_type
+from valid_code_index import ValidCodeIndex
 from collections import defaultdict
 from itertools import product
 import re
 
 def extract_provider_ranges_from_tree(tree: dict, context: Context) -> dict:
+    # a compiled tree (code_group_forest) is flat - its ranges were worked out
+    # with the nesting still in place
+    if tree.get("compiled"):
+        return tree["provider_ranges"]
+
     provider_ranges = defaultdict(dict)
 
     def walk(node, inherited_not=False):
@@ -45,7 +54,7 @@ def expand_zip_code_range(code_low: str, code_high: str) -> list[str]:
     if high > 99999 or high < low or high - low > 1000:
         raise ValueError(f"ZIP range too large or invalid: {zip_low_5}–{zip_high_5}")
 
-    return [str(i).zfill(5) for i in range(low, high + 1)]
+    return [zip_code(i) for i in range(low, high + 1)]
 
 def build_code_group_tree_from_term(context: Context, term_bundle: TermBundle) -> dict:
 
@@ -55,6 +64,7 @@ def build_code_group_tree_from_term(context: Context, term_bundle: TermBundle) -
     If the code group has already been processed, the function returns the cached
     version from context. Otherwise, it recursively builds the tree based on the
     structure in shared_config.codegroups and stores the result in context.codegroup_trees.
+    Groups precompiled into shared_config.codegroup_forest are taken from there.
 
     Args:
         context (Context): The runtime environment containing shared config and caches.
@@ -99,6 +109,14 @@ def build_code_group_tree_from_term(context: Context, term_bundle: TermBundle) -
     if code_group_id in context.codegroup_trees:
         return context.codegroup_trees[code_group_id]
 
+    # compiled once in the parent - see code_group_forest
+    forest = getattr(context.shared_config, "codegroup_forest", None)
+    if forest is not None:
+        tree = forest.get(code_group_id)
+        if tree is not None:
+            context.codegroup_trees[code_group_id] = tree
+            return tree
+
     group = context.shared_config.codegroups.get(code_group_id)
     if not group:
         raise ValueError(f"Code group {code_group_id} not found in shared_config.codegroups.")
@@ -151,9 +169,14 @@ def build_code_group_tree_from_term(context: Context, term_bundle: TermBundle) -
     return tree
 
 def generate_service_combinations(context: Context, tree: dict) -> dict:
+    # service codes are collected as interval sets (see interval_set) and only
+    # expanded to strings for the combinations, skipping codes no billing code
+    # type accepts, so they never become combinations or rate records
+    valid_code_index: ValidCodeIndex = getattr(context.shared_config, "valid_code_index", None)
+
     def extract_codes(node: dict):
-        service_codes_by_type = defaultdict(set)
-        excluded_services_by_type = defaultdict(set)
+        service_codes_by_type = defaultdict(CodeSet)
+        excluded_services_by_type = defaultdict(CodeSet)
         modifiers = set()
         excluded_modifiers = set()
         pos_values = set()
@@ -165,7 +188,8 @@ def generate_service_combinations(context: Context, tree: dict) -> dict:
 
                 for k in sub_result["services"]:
                     service_codes_by_type[k].update(sub_result["services"][k])
-                    excluded_services_by_type[k].update(sub_result["excluded_services"].get(k, set()))
+                    if k in sub_result["excluded_services"]:
+                        excluded_services_by_type[k].update(sub_result["excluded_services"][k])
 
                 modifiers.update(sub_result["modifiers"])
                 excluded_modifiers.update(sub_result["excluded_modifiers"])
@@ -182,22 +206,31 @@ def generate_service_combinations(context: Context, tree: dict) -> dict:
                 if not code_type or not code_low:
                     continue
 
+                if code_type in context.service_code_range_types:
+                    service_codes = (excluded_services_by_type if is_not else service_codes_by_type)[code_type]
+                    if code_low == code_high:
+                        service_codes.add_code(code_low)
+                    else:
+                        try:
+                            service_codes.add_range(int(code_low), int(code_high))
+                        except ValueError:
+                            service_codes.add_code(code_low)
+                    continue
+
+                if code_type not in ("CodeTypeCPTMod", "CodeTypePlaceOfService"):
+                    continue
+
                 if code_low == code_high:
                     codes = {code_low}
                 else:
                     try:
-                        if code_type == "CodeTypeProviderZip":
-                            codes = set(expand_zip_code_range(code_low, code_high))
-                        else:
-                            codes = {str(i) for i in range(int(code_low), int(code_high) + 1)}
+                        codes = {numeric_code(i) for i in range(int(code_low), int(code_high) + 1)}
                     except ValueError:
                         codes = {code_low}
 
-                if code_type in context.service_code_range_types:
-                    (excluded_services_by_type if is_not else service_codes_by_type)[code_type].update(codes)
-                elif code_type == "CodeTypeCPTMod":
+                if code_type == "CodeTypeCPTMod":
                     (excluded_modifiers if is_not else modifiers).update(codes)
-                elif code_type == "CodeTypePlaceOfService":
+                else:
                     (excluded_pos_values if is_not else pos_values).update(codes)
 
         return {
@@ -219,34 +252,40 @@ def generate_service_combinations(context: Context, tree: dict) -> dict:
     if not included_pos:
         included_pos = ['11']
 
-    combinations = []
+    combinations = ServiceCombinations()
     has_services = False
+    # True when codes were dropped that would have produced combinations -
+    # the term still filters on services even if none of them survive
+    rejected_services = False
 
     # --- Case 1: service code logic ---
     for code_type, svc_set in result["services"].items():
-        filtered_svcs = sorted(svc_set - result["excluded_services"].get(code_type, set()))
+        remaining = svc_set.difference(result["excluded_services"].get(code_type, CodeSet()))
+        filtered_svcs = sorted(remaining.codes(valid_code_index))
         if filtered_svcs:
             has_services = True
+        elif remaining:
+            # every remaining code is invalid - the term still filters on
+            # services, it just has no combinations for them
+            has_services = True
+            rejected_services = True
+            continue
         else:
             filtered_svcs = ['']
-        combinations.extend(
-            (svc, mod, pos, normalize_code_type(code_type))
-            for svc in filtered_svcs
-            for mod in included_modifiers
-            for pos in included_pos
-        )
+        combinations.add(filtered_svcs, included_modifiers, included_pos, normalize_code_type(code_type))
 
     # --- Case 2: modifier-only fallback using modifier_map ---
     if not has_services and result["modifiers"]:
         modifier_map = context.shared_config.modifier_map
         for modifier in included_modifiers:
-            service_codes = modifier_map.get(modifier, [])
-            for proc_code in sorted(service_codes):
-                combinations.extend(
-                    (proc_code, modifier, pos, "CPT")
-                    for pos in included_pos
-                )
-        if combinations:
+            service_codes = sorted(modifier_map.get(modifier, []))
+            if valid_code_index is not None:
+                valid_service_codes = [proc_code for proc_code in service_codes if valid_code_index.is_valid_any(proc_code)]
+                if len(valid_service_codes) < len(service_codes):
+                    rejected_services = True
+                service_codes = valid_service_codes
+            combinations.add(service_codes, [modifier], included_pos, "CPT")
+        if combinations or rejected_services:
             has_services = True
 
     # Case 3: POS-only fallback
@@ -255,11 +294,10 @@ def generate_service_combinations(context: Context, tree: dict) -> dict:
         included_pos = ['11']
 
     if not result["services"] and not result["modifiers"] and included_pos:
-        combinations.extend(
-            ('', '', pos, '') for pos in included_pos
-        )
+        combinations.add([''], [''], included_pos, '')
 
     return {
         "combinations": combinations,
-        "has_services": has_services
+        "has_services": has_services,
+        "has_service_filter": bool(combinations) or rejected_services
     }
@@ -0,0 +1,200 @@
+"""
+columnar_fee_schedule.py
+
+Column-oriented replacement for the nested fee schedule dicts
+(modifier -> proc_code -> {"modifier", "proc_code_type", "allowed",
+"percentage", "term_date"}).
+
+Each column is a flat array: the codes, code types and term dates are
+references to interned strings (see code_interning.py - every schedule
+shares one str object per distinct value, so a column costs a pointer
+per row), and the allowed and
+percentage amounts are typed float arrays. A start offset per modifier
+marks each modifier's range of rows.
+
+Rows are added while the schedule is loaded and freeze() then lays them out
+grouped by modifier. Dict semantics are kept: the last row for a
+modifier/code pair wins, and modifiers and codes iterate in the order they
+were first seen.
+
+A row is the tuple
+    (proc_code, modifier, proc_code_type, allowed, percentage, term_date)
+"""
+
+import hashlib
+import sys
+from array import array
+from itertools import chain, repeat
+from typing import Any, Iterator
+from code_interning import intern_code
+
+FeeScheduleRow = tuple[str, str, str, float, float, str]
+
+# rough cost of a get_row index entry - dict slot plus the boxed row number
+INDEX_BYTES_PER_ROW = 100
+
+class ColumnarFeeSchedule:
+    def __init__(self):
+        self.modifiers_list: list[str] = []
+        self.modifier_starts = array("q", [0])
+        self.proc_codes: list[str] = []
+        self.code_types: list[str] = []
+        self.term_dates: list[str] = []
+        self.allowed = array("d")
+        self.percentage = array("d")
+        self.frozen = False
+        # each row's modifier while loading, modifier -> proc_code -> row once looked up
+        self._row_modifiers: list[str] = []
+        self._index: dict[str, dict[str, int]] | None = None
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        state["_index"] = None
+        return state
+
+    def add(self, modifier: str, proc_code: str, proc_code_type: str, allowed: float, percentage: float, term_date: str) -> None:
+        if self.frozen:
+            raise RuntimeError("fee schedule is frozen")
+        self._row_modifiers.append(intern_code(modifier))
+        self.proc_codes.append(intern_code(proc_code))
+        self.code_types.append(intern_code(proc_code_type))
+        self.term_dates.append(intern_code(term_date))
+        self.allowed.append(allowed)
+        self.percentage.append(percentage)
+
+    def freeze(self) -> "ColumnarFeeSchedule":
+        if self.frozen:
+            return self
+
+        # last write per modifier/code wins, in first-seen order - same as dict assignment
+        latest: dict[tuple[str, str], int] = {}
+        for row, key in enumerate(zip(self._row_modifiers, self.proc_codes)):
+            latest[key] = row
+        rows_by_modifier: dict[str, list[int]] = {}
+        for (modifier, _), row in latest.items():
+            rows_by_modifier.setdefault(modifier, []).append(row)
+
+        proc_codes = []
+        code_types = []
+        term_dates = []
+        allowed = array("d")
+        percentage = array("d")
+        for modifier, rows in rows_by_modifier.items():
+            self.modifiers_list.append(modifier)
+            for row in rows:
+                proc_codes.append(self.proc_codes[row])
+                code_types.append(self.code_types[row])
+                term_dates.append(self.term_dates[row])
+                allowed.append(self.allowed[row])
+                percentage.append(self.percentage[row])
+            self.modifier_starts.append(len(proc_codes))
+
+        self.proc_codes = proc_codes
+        self.code_types = code_types
+        self.term_dates = term_dates
+        self.allowed = allowed
+        self.percentage = percentage
+        self._row_modifiers = []
+        self.frozen = True
+        return self
+
+    def __len__(self) -> int:
+        return len(self.proc_codes)
+
+    def __bool__(self) -> bool:
+        return len(self.proc_codes) > 0
+
+    def modifiers(self) -> list[str]:
+        return self.modifiers_list
+
+    def _rows_in(self, modifier_position: int) -> Iterator[FeeScheduleRow]:
+        # zip builds the row tuples in C - no Python frame per row
+        start = self.modifier_starts[modifier_position]
+        end = self.modifier_starts[modifier_position + 1]
+        return zip(
+            self.proc_codes[start:end],
+            repeat(self.modifiers_list[modifier_position], end - start),
+            self.code_types[start:end],
+            self.allowed[start:end],
+            self.percentage[start:end],
+            self.term_dates[start:end]
+        )
+
+    def rows(self, modifier: str = None) -> Iterator[FeeScheduleRow]:
+        """
+        Every row, modifier by modifier - or only the rows filed under
+        modifier when one is given.
+        """
+        if modifier is None:
+            return chain.from_iterable(map(self._rows_in, range(len(self.modifiers_list))))
+        if modifier in self.modifiers_list:
+            return self._rows_in(self.modifiers_list.index(modifier))
+        return iter(())
+
+    def get_row(self, modifier: str, proc_code: str) -> FeeScheduleRow | None:
+        if self._index is None:
+            self._index = self._build_index()
+        row = self._index.get(modifier, {}).get(proc_code)
+        if row is None:
+            return None
+        return (
+            self.proc_codes[row],
+            modifier,
+            self.code_types[row],
+            self.allowed[row],
+            self.percentage[row],
+            self.term_dates[row]
+        )
+
+    def _build_index(self) -> dict[str, dict[str, int]]:
+        # only built for schedules that see point lookups
+        index = {}
+        for modifier_position, modifier in enumerate(self.modifiers_list):
+            start = self.modifier_starts[modifier_position]
+            end = self.modifier_starts[modifier_position + 1]
+            index[modifier] = {self.proc_codes[row]: row for row in range(start, end)}
+        return index
+
+    def memory_size(self) -> int:
+        """
+        Approximate bytes this schedule holds, counting its get_row index
+        whether or not it has been built yet. The code strings are interned
+        and shared, so only the references to them count.
+        """
+        columns = (self.modifiers_list, self.modifier_starts, self.proc_codes,
+                   self.code_types, self.term_dates, self.allowed, self.percentage)
+        return sum(sys.getsizeof(column) for column in columns) + len(self) * INDEX_BYTES_PER_ROW
+
+    def content_digest(self) -> bytes:
+        """Hash of the schedule body - equal schedules give equal digests."""
+        digest = hashlib.blake2b(digest_size=16)
+        for column in (self.modifiers_list, self.proc_codes, self.code_types, self.term_dates):
+            digest.update("\x1f".join(map(str, column)).encode("utf-8"))
+            digest.update(b"\x1e")
+        for column in (self.modifier_starts, self.allowed, self.percentage):
+            digest.update(column.tobytes())
+        return digest.digest()
+
+    def same_content(self, other: "ColumnarFeeSchedule") -> bool:
+        return (
+            self.modifiers_list == other.modifiers_list
+            and self.modifier_starts == other.modifier_starts
+            and self.proc_codes == other.proc_codes
+            and self.code_types == other.code_types
+            and self.term_dates == other.term_dates
+            and self.allowed == other.allowed
+            and self.percentage == other.percentage
+        )
+
+    def to_dict(self) -> dict[str, dict[str, dict[str, Any]]]:
+        # the nested dict shape the loaders used to build
+        fee_schedule = {}
+        for proc_code, modifier, proc_code_type, allowed, percentage, term_date in self.rows():
+            fee_schedule.setdefault(modifier, {})[proc_code] = {
+                "modifier": modifier,
+                "proc_code_type": proc_code_type,
+                "allowed": allowed,
+                "percentage": percentage,
+                "term_date": term_date
+            }
+        return fee_schedule
@@ -0,0 +1,200 @@
+"""
+connection_pool.py
+
+Bounded pool of live pyodbc connections, one pool per connection string
+per process. DatabaseConnection checks connections out of here instead of
+opening a new one for every batch.
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Iterator
+from constants import DB_POOL_ACQUIRE_TIMEOUT, DB_POOL_HEALTH_CHECK_SECONDS, DB_POOL_MAX_CONNECTIONS, SQLITE_CONNECTION_PREFIX
+
+try:
+    import pyodbc
+except ImportError:
+    # offline runs go through the SQLite stand-in and never need the driver
+    pyodbc = None
+
+# driver exceptions that mean a pooled connection can't be trusted anymore
+DRIVER_ERRORS = (pyodbc.Error,) if pyodbc is not None else ()
+
+class ConnectionPool:
+    def __init__(
+        self,
+        connection_string: str,
+        max_connections: int = DB_POOL_MAX_CONNECTIONS,
+        health_check_seconds: float = DB_POOL_HEALTH_CHECK_SECONDS,
+        acquire_timeout: float = DB_POOL_ACQUIRE_TIMEOUT
+    ):
+        self.connection_string = connection_string
+        self.max_connections = max_connections
+        self.health_check_seconds = health_check_seconds
+        self.acquire_timeout = acquire_timeout
+
+        # idle connections are kept as (connection, last_used) pairs
+        self._idle: list[tuple[Any, float]] = []
+        self._open_count = 0
+        self._condition = threading.Condition()
+
+        self.created = 0
+        self.reused = 0
+        self.discarded = 0
+        self.waits = 0
+        self.health_checks = 0
+
+    def _connect(self):
+        if pyodbc is None:
+            raise ImportError("pyodbc is required for SQL Server connections - use a sqlite:/// connection string for offline runs")
+        return pyodbc.connect(self.connection_string)
+
+    def _is_healthy(self, conn) -> bool:
+        self.health_checks += 1
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchall()
+            cursor.close()
+            return True
+        except Exception:
+            return False
+
+    def _close_quietly(self, conn) -> None:
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def acquire(self):
+        """
+        Hands out a live connection. Idle connections are reused (health checked
+        if they sat longer than health_check_seconds); a new one is opened only
+        while the pool is under max_connections, otherwise the caller waits.
+        """
+        deadline = time.monotonic() + self.acquire_timeout
+        with self._condition:
+            while True:
+                if self._idle:
+                    conn, last_used = self._idle.pop()
+                    break
+                if self._open_count < self.max_connections:
+                    self._open_count += 1
+                    conn, last_used = None, None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(
+                        f"No database connection available after {self.acquire_timeout}s "
+                        f"({self.max_connections} in use)"
+                    )
+                self.waits += 1
+                self._condition.wait(remaining)
+
+        # connect / health check outside the lock so other threads aren't blocked
+        if conn is not None:
+            stale = time.monotonic() - last_used > self.health_check_seconds
+            if not stale or self._is_healthy(conn):
+                self.reused += 1
+                return conn
+            self.discarded += 1
+            self._close_quietly(conn)
+
+        try:
+            conn = self._connect()
+        except Exception:
+            with self._condition:
+                self._open_count -= 1
+                self._condition.notify()
+            raise
+        self.created += 1
+        return conn
+
+    def release(self, conn, discard: bool = False) -> None:
+        with self._condition:
+            if discard:
+                self._open_count -= 1
+                self.discarded += 1
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._condition.notify()
+        if discard:
+            self._close_quietly(conn)
+
+    @contextmanager
+    def cursor(self) -> Iterator[Any]:
+        conn = self.acquire()
+        failed = False
+        cursor = conn.cursor()
+        try:
+            yield cursor
+        except DRIVER_ERRORS:
+            failed = True
+            raise
+        finally:
+            try:
+                cursor.close()
+            except Exception:
+                failed = True
+            self.release(conn, discard=failed)
+
+    def close_all(self) -> None:
+        with self._condition:
+            idle = self._idle
+            self._idle = []
+            self._open_count -= len(idle)
+        for conn, _ in idle:
+            self._close_quietly(conn)
+
+    def statistics(self) -> dict[str, int]:
+        with self._condition:
+            idle = len(self._idle)
+            open_count = self._open_count
+        return {
+            "max_connections": self.max_connections,
+            "open": open_count,
+            "idle": idle,
+            "in_use": open_count - idle,
+            "created": self.created,
+            "reused": self.reused,
+            "discarded": self.discarded,
+            "waits": self.waits,
+            "health_checks": self.health_checks
+        }
+
+# one registry per process - pools are never shared across a fork/spawn
+_pools: dict[tuple[int, str], ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+def get_connection_pool(connection_string: str) -> ConnectionPool:
+    key = (os.getpid(), connection_string)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = ConnectionPool(connection_string)
+            _pools[key] = pool
+        return pool
+
+def close_all_pools() -> None:
+    pid = os.getpid()
+    with _pools_lock:
+        pools = [pool for (pool_pid, _), pool in _pools.items() if pool_pid == pid]
+    for pool in pools:
+        pool.close_all()
+
+def describe_connection(connection_string: str) -> str:
+    if connection_string.startswith(SQLITE_CONNECTION_PREFIX):
+        return connection_string[len(SQLITE_CONNECTION_PREFIX):]
+    # Server/Database is enough to tell the pools apart in the stats output
+    parts = dict(
+        part.split("=", 1) for part in connection_string.split(";") if "=" in part
+    )
+    return f"{parts.get('Server', '?')}/{parts.get('Database', '?')}"
+
+def pool_statistics() -> dict[str, dict[str, int]]:
+    pid = os.getpid()
+    with _pools_lock:
+        pools = [(conn_str, pool) for (pool_pid, conn_str), pool in _pools.items() if pool_pid == pid]
+    return {describe_connection(conn_str): pool.statistics() for conn_str, pool in pools}
@@ -3,6 +3,35 @@ MAX_FILE_SIZE = 5_000_000_000
 TAXONOMY_ATTRIBUTE_ID = 'DMSC000147824'
 DEFAULT_EXP_DATE = "99991231"
 
+# rows pulled per fetchmany() call when streaming large result sets
+DB_FETCH_ARRAYSIZE = 5000
+
+# connection pool limits (per connection string, per process)
+DB_POOL_MAX_CONNECTIONS = 4
+DB_POOL_HEALTH_CHECK_SECONDS = 60
+DB_POOL_ACQUIRE_TIMEOUT = 300
+
+# connection strings with this prefix point at a local SQLite file
+# (see sqlite_database_connection.py) instead of SQL Server
+SQLITE_CONNECTION_PREFIX = "sqlite:///"
+
+# threads loading the startup reference tables - each holds its own pooled
+# connection, so keep it within DB_POOL_MAX_CONNECTIONS
+STARTUP_LOADER_MAX_WORKERS = DB_POOL_MAX_CONNECTIONS
+
+# rate sheet codes per IN (...) query when prefetching terms
+RATESHEET_PREFETCH_PARTITION_SIZE = 500
+
+# a locality fee schedule is stored as a delta on its table's most common
+# schedule when at most this fraction of its rows differ
+FEE_SCHEDULE_DELTA_MAX_FRACTION = 0.25
+
+# default memory bound of a process's on-demand fee schedule cache
+FEE_SCHEDULE_CACHE_MB = 512
+
+# DRG weighting rate columns a process keeps, one per (base rate, billing class)
+DRG_BATCH_CACHE_SIZE = 256
+
 rate_template = {
     "update_type": "A",
     "insurer_code": None,
@@ -39,6 +39,8 @@ class Context:
         self.mrf_file_prefixes = mrf_file_prefixes
         self.codegroups = {}
         self.fee_schedules = {}
+        # names of the standard fee schedules this context's terms have resolved
+        self.fee_schedule_names = set()
         self.fee_schedule_types = {}
         self.rate_cache_index = {"by_proc":{}, "by_modifier":{}, "by_pos":{}}
         self.ratesheets = {}
@@ -47,3 +49,4 @@ class Context:
         self.shared_config = shared_config
         self.statistics = StatisticsTracker()
         self.codegroup_trees: dict[int, dict] = {}
+        self.service_combination_memo = None
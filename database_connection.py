@@ -1,20 +1,42 @@
-import pyodbc
-from typing import Any
+from connection_pool import DRIVER_ERRORS, get_connection_pool
+from constants import DB_FETCH_ARRAYSIZE, SQLITE_CONNECTION_PREFIX
+from typing import Any, Iterator
+
+def create_database_connection(connection_string: str, arraysize: int = DB_FETCH_ARRAYSIZE) -> "DatabaseConnection":
+    # sqlite:///path connection strings get the local stand-in
+    if connection_string.startswith(SQLITE_CONNECTION_PREFIX):
+        from sqlite_database_connection import SQLiteDatabaseConnection
+        return SQLiteDatabaseConnection(connection_string, arraysize)
+    return DatabaseConnection(connection_string, arraysize)
 
 class DatabaseConnection:
-    def __init__(self, connection_string):
+    # errors that leave the connection unusable - it is discarded, not reused
+    driver_errors = DRIVER_ERRORS
+
+    def __init__(self, connection_string, arraysize: int = DB_FETCH_ARRAYSIZE):
         self.connection_string = connection_string
+        self.arraysize = arraysize
+        self.pool = get_connection_pool(connection_string)
         self.conn = None
 
     def connect(self) -> None:
+        # checks a connection out of the per-process pool
+        # it stays checked out until disconnect() hands it back
         try:
-            self.conn = pyodbc.connect(self.connection_string)
+            self.conn = self.pool.acquire()
         except Exception as e:
             raise
 
     def disconnect(self) -> None:
         if self.conn:
-            self.conn.close()
+            self.pool.release(self.conn)
+            self.conn = None
+
+    def _discard_connection(self) -> None:
+        # a driver error may have left the connection unusable - don't reuse it
+        if self.conn:
+            self.pool.release(self.conn, discard=True)
+            self.conn = None
 
     def execute_query(self,query) -> None:
         try:
@@ -24,6 +46,9 @@ class DatabaseConnection:
             cursor.execute(query)
             results = cursor.fetchall()
             return results
+        except self.driver_errors:
+            self._discard_connection()
+            raise
         except Exception as e:
             raise
 
@@ -40,10 +65,48 @@ class DatabaseConnection:
                 row_dict = dict(zip(columns, row))
                 json_data.append(row_dict)
             return json_data
+        except self.driver_errors:
+            self._discard_connection()
+            raise
         except Exception as e:
             raise
+
+    def stream_query_batches(self, query, arraysize: int = None) -> Iterator[list[dict[str,Any]]]:
+        """
+        Runs the query and yields the result in batches of row dicts.
+        Only one batch (arraysize rows) is held in memory at a time,
+        so large reference tables don't have to be materialized up front.
+        The cursor stays open until the generator is exhausted - consume it
+        before issuing another query on the same connection.
+        """
+        arraysize = arraysize or self.arraysize
+        if self.conn == None:
+            self.connect()
+        cursor = self.conn.cursor()
+        try:
+            cursor.arraysize = arraysize
+            cursor.execute(query)
+            columns = [column[0] for column in cursor.description]
+            while True:
+                rows = cursor.fetchmany(arraysize)
+                if not rows:
+                    break
+                yield [dict(zip(columns, row)) for row in rows]
+        except self.driver_errors:
+            cursor = None
+            self._discard_connection()
+            raise
         finally:
-            self.disconnect
+            if cursor is not None:
+                cursor.close()
+
+    def stream_query_with_columns(self, query, arraysize: int = None) -> Iterator[dict[str,Any]]:
+        """
+        Row-at-a-time version of stream_query_batches.
+        Drop-in for loops over execute_query_with_columns.
+        """
+        for batch in self.stream_query_batches(query, arraysize):
+            yield from batch
 
     def fetch_one(self, query, params=None) -> list[dict[str,Any]]:
 
@@ -0,0 +1,90 @@
+"""
+drg_weight_table.py
+
+shared_config.drg_weights compiled once, in the parent, into the columns the
+DRG weighting calcs emit from. The rows whose DRG code is valid are kept in
+the order drg_weights iterates - the order the calcs looped in, so when a
+code has rows under more than one source type or year the same row is
+stored first - with each relative weight converted to a float once.
+
+A term's rates are the whole weight column times its base rate, rounded to
+the cent in one list comprehension over the converted floats, so the rate
+strings match round(base_rate * float(relative_weight), 2) exactly.
+
+Emitted columns are cached per (base_rate, rate_type_desc) in an LRU of
+DRG_BATCH_CACHE_SIZE entries, since the same DRG term is repeated across
+many rate sheets. They are tuples, handed to RateBatch.set_columns as they
+are, so a cache hit copies nothing. The cache and its counters are per
+process.
+"""
+
+from collections import OrderedDict
+from constants import DRG_BATCH_CACHE_SIZE
+
+DrgColumns = tuple[tuple[str, ...], tuple[str, ...], tuple[str, ...], tuple[str, ...], tuple[str, ...]]
+
+class DrgWeightTable:
+    def __init__(self, drg_weights, valid_code_index, max_batches: int = DRG_BATCH_CACHE_SIZE):
+        codes: list[str] = []
+        weights: list[float] = []
+        for drg_code, relative_weight, source_type, year in drg_weights:
+            if not valid_code_index.is_valid(drg_code, "DRG"):
+                continue
+            codes.append(drg_code)
+            weights.append(float(relative_weight))
+
+        self.codes = tuple(codes)
+        self.weights = weights
+        self.max_batches = max_batches
+        # (base_rate, rate_type_desc) -> columns, least recently used first
+        self.batches: OrderedDict[tuple, DrgColumns] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __getstate__(self) -> dict:
+        # the cache and counters are per process - a worker starts empty
+        state = self.__dict__.copy()
+        state["batches"] = OrderedDict()
+        state["hits"] = 0
+        state["misses"] = 0
+        return state
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def columns(self, base_rate: float, rate_type_desc: str) -> DrgColumns:
+        """
+        The (codes, modifiers, pos_values, code_types, rates) columns of a DRG
+        weighting term, shared through the cache.
+        """
+        key = (base_rate, rate_type_desc)
+        columns = self.batches.get(key)
+        if columns is not None:
+            self.batches.move_to_end(key)
+            self.hits += 1
+            return columns
+
+        self.misses += 1
+        count = len(self.codes)
+        pos = '21' if rate_type_desc == 'institutional' else '11'
+        columns = (self.codes, ('',) * count, (pos,) * count, ("DRG",) * count, tuple(self.rates(base_rate)))
+        self.batches[key] = columns
+        if len(self.batches) > self.max_batches:
+            self.batches.popitem(last=False)
+        return columns
+
+    def rates(self, base_rate: float) -> list[str]:
+        return [str(round(base_rate * weight, 2)) for weight in self.weights]
+
+    def statistics(self) -> dict[str, int]:
+        return {
+            "drgs": len(self.codes),
+            "batches": len(self.batches),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+def get_drg_weight_table(shared_config) -> DrgWeightTable:
+    if getattr(shared_config, "drg_weight_table", None) is None:
+        shared_config.drg_weight_table = DrgWeightTable(shared_config.drg_weights, shared_config.valid_code_index)
+    return shared_config.drg_weight_table
@@ -0,0 +1,192 @@
+"""
+fee_schedule_dedup.py
+
+Locality fee schedules repeat. A TABLENAME's schedule is often identical
+across carriers and localities, or differs from them in a handful of codes.
+
+deduplicate_locality_fee_schedules hashes each schedule body
+(content_digest), so identical schedules collapse into one shared object. A
+schedule close to its table's most common body is stored as a
+DeltaFeeSchedule: that base plus the rows that differ, so a near-copy costs
+its differences rather than a full set of rows. Keys that share an object
+are also expanded once per term by the fee schedule calcs.
+
+Sharing survives the snapshot and the pool initializer, since pickle keeps
+references within one dump. The mmap store writes each distinct schedule
+once and a delta as its change rows and removed keys, which a worker maps
+back to a DeltaFeeSchedule over the base's view.
+"""
+
+from collections import Counter
+from itertools import chain
+from typing import Iterator
+from columnar_fee_schedule import ColumnarFeeSchedule, FeeScheduleRow
+from constants import FEE_SCHEDULE_DELTA_MAX_FRACTION
+
+class DeltaFeeSchedule:
+    """
+    A schedule stored as a base schedule plus its differences, with the
+    ColumnarFeeSchedule row API. Rows follow the base schedule's order and
+    rows the base doesn't have come after them, modifier by modifier.
+    """
+    def __init__(self, base: ColumnarFeeSchedule, changes: ColumnarFeeSchedule, removed: set[tuple[str, str]]):
+        self.base = base
+        self.changes = changes
+        self.removed = frozenset(removed)
+        # per modifier, the changed, added and removed codes - iterating a
+        # modifier then probes these small sets instead of looking up every row
+        self.changed_by_modifier: dict[str, set[str]] = {}
+        self.added_by_modifier: dict[str, set[str]] = {}
+        for proc_code, modifier, *_ in changes.rows():
+            if base.get_row(modifier, proc_code) is None:
+                self.added_by_modifier.setdefault(modifier, set()).add(proc_code)
+            else:
+                self.changed_by_modifier.setdefault(modifier, set()).add(proc_code)
+        self.removed_by_modifier: dict[str, set[str]] = {}
+        for modifier, proc_code in self.removed:
+            self.removed_by_modifier.setdefault(modifier, set()).add(proc_code)
+
+        added_count = sum(map(len, self.added_by_modifier.values()))
+        self.row_count = len(base) - len(self.removed) + added_count
+
+        base_modifiers = base.modifiers()
+        candidates = base_modifiers + [modifier for modifier in changes.modifiers() if modifier not in base_modifiers]
+        # a modifier can only run out of rows when every base row under it is removed
+        self.modifiers_list = [
+            modifier for modifier in candidates
+            if modifier not in self.removed_by_modifier or next(self._rows_in(modifier), None) is not None
+        ]
+
+    def __len__(self) -> int:
+        return self.row_count
+
+    def __bool__(self) -> bool:
+        return self.row_count > 0
+
+    def modifiers(self) -> list[str]:
+        return self.modifiers_list
+
+    def _rows_in(self, modifier: str) -> Iterator[FeeScheduleRow]:
+        if (
+            modifier not in self.changed_by_modifier
+            and modifier not in self.added_by_modifier
+            and modifier not in self.removed_by_modifier
+        ):
+            return self.base.rows(modifier)
+        return self._merged_rows(modifier)
+
+    def _merged_rows(self, modifier: str) -> Iterator[FeeScheduleRow]:
+        changes = self.changes
+        changed = self.changed_by_modifier.get(modifier, ())
+        removed = self.removed_by_modifier.get(modifier, ())
+        for row in self.base.rows(modifier):
+            proc_code = row[0]
+            if proc_code in removed:
+                continue
+            yield changes.get_row(modifier, proc_code) if proc_code in changed else row
+        added = self.added_by_modifier.get(modifier)
+        if added:
+            for row in changes.rows(modifier):
+                if row[0] in added:
+                    yield row
+
+    def rows(self, modifier: str = None) -> Iterator[FeeScheduleRow]:
+        if modifier is None:
+            return chain.from_iterable(map(self._rows_in, self.modifiers_list))
+        if modifier in self.modifiers_list:
+            return self._rows_in(modifier)
+        return iter(())
+
+    def get_row(self, modifier: str, proc_code: str) -> FeeScheduleRow | None:
+        row = self.changes.get_row(modifier, proc_code)
+        if row is not None:
+            return row
+        if (modifier, proc_code) in self.removed:
+            return None
+        return self.base.get_row(modifier, proc_code)
+
+    to_dict = ColumnarFeeSchedule.to_dict
+
+def build_delta(base: ColumnarFeeSchedule, schedule: ColumnarFeeSchedule, max_changes: int) -> DeltaFeeSchedule | None:
+    """
+    schedule as a delta on base, or None when more than max_changes rows
+    differ.
+    """
+    changes = ColumnarFeeSchedule()
+    removed = set()
+    change_count = 0
+    schedule_keys = set()
+
+    for row in schedule.rows():
+        proc_code, modifier = row[0], row[1]
+        schedule_keys.add((modifier, proc_code))
+        if base.get_row(modifier, proc_code) != row:
+            change_count += 1
+            if change_count > max_changes:
+                return None
+            changes.add(modifier, proc_code, row[2], row[3], row[4], row[5])
+
+    for proc_code, modifier, *_ in base.rows():
+        if (modifier, proc_code) not in schedule_keys:
+            change_count += 1
+            if change_count > max_changes:
+                return None
+            removed.add((modifier, proc_code))
+
+    return DeltaFeeSchedule(base, changes.freeze(), removed)
+
+def deduplicate_locality_fee_schedules(
+    locality_fee_schedules: dict[tuple[str, str, str], ColumnarFeeSchedule],
+    max_delta_fraction: float = FEE_SCHEDULE_DELTA_MAX_FRACTION
+) -> dict:
+    """
+    (TABLENAME, CARRIERNUMBER, LOCALITYNUMBER) -> schedule, with identical
+    schedules sharing one object and near-identical ones (at most
+    max_delta_fraction of their rows differ) stored as deltas on the most
+    common schedule of their table.
+    """
+    bodies_by_digest: dict[bytes, list[ColumnarFeeSchedule]] = {}
+    bodies_by_table: dict[str, list[ColumnarFeeSchedule]] = {}
+    shared = {}
+    uses = Counter()
+
+    for key, schedule in locality_fee_schedules.items():
+        candidates = bodies_by_digest.setdefault(schedule.content_digest(), [])
+        for body in candidates:
+            if body.same_content(schedule):
+                break
+        else:
+            body = schedule
+            candidates.append(body)
+            bodies_by_table.setdefault(key[0], []).append(body)
+        shared[key] = body
+        uses[id(body)] += 1
+
+    deltas = {}
+    for bodies in bodies_by_table.values():
+        if len(bodies) < 2:
+            continue
+        # max keeps the first body on ties, so the choice is stable across runs
+        base = max(bodies, key=lambda body: uses[id(body)])
+        for body in bodies:
+            if body is base or not body:
+                continue
+            delta = build_delta(base, body, int(len(body) * max_delta_fraction))
+            if delta is not None:
+                deltas[id(body)] = delta
+
+    return {key: deltas.get(id(body), body) for key, body in shared.items()}
+
+def fee_schedule_statistics(fee_schedules: dict) -> dict[str, int]:
+    distinct = {id(schedule): schedule for schedule in fee_schedules.values()}
+    deltas = [schedule for schedule in distinct.values() if isinstance(schedule, DeltaFeeSchedule)]
+    return {
+        "keys": len(fee_schedules),
+        "distinct": len(distinct),
+        "deltas": len(deltas),
+        "stored_rows": sum(
+            len(schedule.changes) + len(schedule.removed) if isinstance(schedule, DeltaFeeSchedule) else len(schedule)
+            for schedule in distinct.values()
+        ),
+        "rows": sum(len(schedule) for schedule in fee_schedules.values())
+    }
@@ -1,9 +1,33 @@
-from typing import Any
+from typing import Any, Iterable, Iterator
+from columnar_fee_schedule import ColumnarFeeSchedule
 from context import Context
 from database_connection import DatabaseConnection
+from fee_schedule_dedup import deduplicate_locality_fee_schedules
 from datetime import datetime
 from provider_bundle import ProviderBundle
-from utilities import get_service_code_type
+from utilities import build_in_clause_from_list, get_service_code_type
+
+# source queries - also hashed into the reference snapshot key
+LOCALITY_FEE_SCHEDULES_QUERY = """
+        SELECT *
+        FROM STATELOCALITYSCHEDULEVALUES
+        WHERE GETDATE() BETWEEN EFFECTIVEDATE AND TERMINATIONDATE
+    """
+
+FEE_SCHEDULE_NAMES_QUERY = """
+    SELECT DISTINCT stdratesheetterms.actionparm1 AS schedulename
+    FROM STDRATESHEETS
+    LEFT JOIN STDRATESHEETTERMS
+        ON STDRATESHEETS.RATESHEETID = STDRATESHEETTERMS.RATESHEETID
+    INNER JOIN SCHEDULEVALUESWITHMODIFIERS
+        ON STDRATESHEETTERMS.actionparm1 = SCHEDULEVALUESWITHMODIFIERS.tablename
+    WHERE
+        STDRATESHEETS.RATESHEETCODE IS NOT NULL AND
+        STDRATESHEETS.RATESHEETCODE LIKE 'AV%' AND 
+        STDRATESHEETS.RATESHEETCODE NOT LIKE 'AVGB%' AND 
+        STDRATESHEETS.RATESHEETCODE NOT LIKE 'Z%' AND  
+        STDRATESHEETS.RATESHEETCODE NOT LIKE '%-%'
+    """
 
 # --- DB queries ---
 def fetch_schedule_metadata(context: Context, schedule_name: str) -> dict[str, Any]:
@@ -15,14 +39,39 @@ def fetch_schedule_metadata(context: Context, schedule_name: str) -> dict[str, A
     rows = context.networx_conn.execute_query_with_columns(query)
     return rows[0] if rows else {}
 
-def fetch_default_fee_schedule(context: Context, schedule_name: str) -> list[dict[str, Any]]:
+def fetch_default_fee_schedule(context: Context, schedule_name: str) -> Iterator[dict[str, Any]]:
     query = f"""
         SELECT *
         FROM SCHEDULEVALUESWITHMODIFIERS
         WHERE TABLENAME = '{schedule_name}'
         AND GETDATE() BETWEEN EFFECTIVEDATE AND TERMINATIONDATE
     """
-    return context.networx_conn.execute_query_with_columns(query)
+    return context.networx_conn.stream_query_with_columns(query)
+
+def fetch_schedule_metadata_bulk(context: Context, schedule_names: list[str]) -> dict[str, dict[str, Any]]:
+    query = f"""
+        SELECT SCHEDULECODE, SCHEDULETYPE, ZIPSOURCETYPE
+        FROM SCHEDULES
+        WHERE SCHEDULECODE IN {build_in_clause_from_list(schedule_names)}
+    """
+    metadata = {}
+    for row in context.networx_conn.execute_query_with_columns(query):
+        # first row wins, same as fetch_schedule_metadata
+        metadata.setdefault(schedule_lookup_key(row["SCHEDULECODE"]), row)
+    return metadata
+
+def fetch_default_fee_schedules_bulk(context: Context, schedule_names: list[str]) -> Iterator[dict[str, Any]]:
+    query = f"""
+        SELECT *
+        FROM SCHEDULEVALUESWITHMODIFIERS
+        WHERE TABLENAME IN {build_in_clause_from_list(schedule_names)}
+        AND GETDATE() BETWEEN EFFECTIVEDATE AND TERMINATIONDATE
+    """
+    return context.networx_conn.stream_query_with_columns(query)
+
+def schedule_lookup_key(schedule_name: Any) -> str:
+    # SQL Server compares codes case-insensitively and ignores trailing blanks
+    return str(schedule_name).rstrip().upper()
 
 # --- Preloading logic for locality-based schedules ---
 def preload_all_locality_fee_schedules(context: Context) -> dict:
@@ -30,118 +79,130 @@ def preload_all_locality_fee_schedules(context: Context) -> dict:
     Loads all rows from STATELOCALITYSCHEDULEVALUES into memory once,
     grouped by (TABLENAME, CARRIERNUMBER, LOCALITYNUMBER).
     """
-    query = """
-        SELECT *
-        FROM STATELOCALITYSCHEDULEVALUES
-        WHERE GETDATE() BETWEEN EFFECTIVEDATE AND TERMINATIONDATE
+    all_rows = context.networx_conn.stream_query_with_columns(LOCALITY_FEE_SCHEDULES_QUERY)
+    return build_locality_fee_schedules(all_rows)
+
+def build_locality_fee_schedules(rows: Iterable[dict[str, Any]], today: datetime = None) -> dict:
+    """
+    Single pass over the locality rows into
+    (TABLENAME, CARRIERNUMBER, LOCALITYNUMBER) -> ColumnarFeeSchedule,
+    the same structure process_fee_schedule_rows builds per schedule.
+    Code types and formatted term dates repeat across millions of rows,
+    so each distinct value is only worked out once. Identical and
+    near-identical schedules are then shared (see fee_schedule_dedup.py).
     """
-    all_rows = context.networx_conn.execute_query_with_columns(query)
+    if today is None:
+        today = datetime.today()
 
     locality_fee_schedules = {}
+    code_types = {}
+    formatted_dates = {}
 
-    for row in all_rows:
-        schedule_name = row["TABLENAME"]
-        carrier = row["CARRIERNUMBER"]
-        locality = row["LOCALITYNUMBER"]
-        key = (schedule_name, carrier, locality)
+    for row in rows:
+        key = (row["TABLENAME"], row["CARRIERNUMBER"], row["LOCALITYNUMBER"])
+        schedule = locality_fee_schedules.get(key)
+        if schedule is None:
+            schedule = locality_fee_schedules[key] = ColumnarFeeSchedule()
+
+        term_date = row.get("TERMINATIONDATE", None)
+        if term_date and term_date < today:
+            continue
 
-        parsed = process_fee_schedule_rows(context, schedule_name, [row])
-        if key not in locality_fee_schedules:
-            locality_fee_schedules[key] = {}
+        formatted_date = formatted_dates.get(term_date)
+        if formatted_date is None:
+            formatted_date = formatted_dates[term_date] = term_date.strftime('%Y%m%d')
 
-        for mod, procs in parsed.items():
-            locality_fee_schedules[key].setdefault(mod, {}).update(procs)
+        proc_code = row.get("PROCEDURECODE", "")
+        proc_code_type = code_types.get(proc_code)
+        if proc_code_type is None:
+            proc_code_type = code_types[proc_code] = get_service_code_type(proc_code)
 
-    return locality_fee_schedules
+        modifier = row.get("MODIFIER", "").strip()
+        schedule.add(
+            modifier,
+            proc_code,
+            proc_code_type,
+            float(row.get("ALLOWED", 0)),
+            float(row.get("PERCENTAGE", 0)),
+            formatted_date
+        )
+
+    for schedule in locality_fee_schedules.values():
+        schedule.freeze()
+    return deduplicate_locality_fee_schedules(locality_fee_schedules)
 
 def preload_fee_schedules(context: Context) -> dict:
     """
     Preloads all standard fee schedules used in rate sheets into context.fee_schedules.
     This avoids redundant loading during fee schedule processing.
-    """
-    query = """
-    SELECT DISTINCT stdratesheetterms.actionparm1 AS schedulename
-    FROM STDRATESHEETS
-    LEFT JOIN STDRATESHEETTERMS
-        ON STDRATESHEETS.RATESHEETID = STDRATESHEETTERMS.RATESHEETID
-    INNER JOIN SCHEDULEVALUESWITHMODIFIERS
-        ON STDRATESHEETTERMS.actionparm1 = SCHEDULEVALUESWITHMODIFIERS.tablename
-    WHERE
-        STDRATESHEETS.RATESHEETCODE IS NOT NULL AND
-        STDRATESHEETS.RATESHEETCODE LIKE 'AV%' AND 
-        STDRATESHEETS.RATESHEETCODE NOT LIKE 'AVGB%' AND 
-        STDRATESHEETS.RATESHEETCODE NOT LIKE 'Z%' AND  
-        STDRATESHEETS.RATESHEETCODE NOT LIKE '%-%'
+    Metadata for every schedule comes back in one query and the values in one
+    streamed query, instead of a pair of round trips per schedule.
     """
     context.fee_schedules = {}
-    rows = context.networx_conn.execute_query_with_columns(query)
+    rows = context.networx_conn.execute_query_with_columns(FEE_SCHEDULE_NAMES_QUERY)
+    schedule_names = list(dict.fromkeys(row["schedulename"] for row in rows if row["schedulename"]))
 
-    for row in rows:
-        schedule_name = row["schedulename"]
-        if schedule_name not in context.fee_schedules:
-            load_fee_schedule(context, schedule_name)
-    
+    if not hasattr(context.shared_config, "fee_schedule_types"):
+        context.shared_config.fee_schedule_types = {}
+    if not schedule_names:
+        return context.fee_schedules
 
-def process_fee_schedule_rows(
-    context: Context, fee_schedule_name: str, rows: list[dict[str, Any]]
-) -> dict:
-    fee_schedule = {}
-    today = datetime.today()
-    for row in rows:
-        proc_code = row.get("PROCEDURECODE", "")
-        modifier = row.get("MODIFIER", "").strip()
-        rate = float(row.get("ALLOWED", 0))
-        percentage = float(row.get("PERCENTAGE", 0))
-        term_date = row.get("TERMINATIONDATE", None)
-        if term_date and term_date < today:
-            continue
+    metadata = fetch_schedule_metadata_bulk(context, schedule_names)
+    for schedule_name in schedule_names:
+        schedule_metadata = metadata.get(schedule_lookup_key(schedule_name), {})
+        context.shared_config.fee_schedule_types[schedule_name] = schedule_metadata.get("SCHEDULETYPE", "")
+        context.fee_schedules[schedule_name] = ColumnarFeeSchedule()
 
-        term_date = term_date.strftime('%Y%m%d')
+    schedule_name_lookup = {schedule_lookup_key(schedule_name): schedule_name for schedule_name in schedule_names}
+    today = datetime.today()
 
-        proc_code_type = get_service_code_type(proc_code)
+    # one pass over every schedule's rows, grouped by TABLENAME as they stream in
+    for row in fetch_default_fee_schedules_bulk(context, schedule_names):
+        schedule_name = schedule_name_lookup.get(schedule_lookup_key(row["TABLENAME"]))
+        if schedule_name is None:
+            continue
+        add_fee_schedule_row(context.fee_schedules[schedule_name], row, today)
 
-        temp_dict = {
-            "modifier": modifier,
-            "proc_code_type": proc_code_type,
-            "allowed": rate,
-            "percentage": percentage,
-            "term_date": term_date
-        }
+    for fee_schedule in context.fee_schedules.values():
+        fee_schedule.freeze()
+    return context.fee_schedules
 
-        if modifier not in fee_schedule:
-            fee_schedule[modifier] = {}
+def process_fee_schedule_rows(
+    context: Context, fee_schedule_name: str, rows: Iterable[dict[str, Any]]
+) -> ColumnarFeeSchedule:
+    fee_schedule = ColumnarFeeSchedule()
+    today = datetime.today()
+    for row in rows:
+        add_fee_schedule_row(fee_schedule, row, today)
 
-        fee_schedule[modifier][proc_code] = temp_dict
+    return fee_schedule.freeze()
 
-    return fee_schedule
+def add_fee_schedule_row(fee_schedule: ColumnarFeeSchedule, row: dict[str, Any], today: datetime) -> None:
+    proc_code = row.get("PROCEDURECODE", "")
+    modifier = row.get("MODIFIER", "").strip()
+    rate = float(row.get("ALLOWED", 0))
+    percentage = float(row.get("PERCENTAGE", 0))
+    term_date = row.get("TERMINATIONDATE", None)
+    if term_date and term_date < today:
+        return
 
-def load_fee_schedule(context: Context, schedule_name: str) -> list[tuple[str, str, str]]:
-    if schedule_name in context.fee_schedules:
-        return []
+    term_date = term_date.strftime('%Y%m%d')
 
-    if not hasattr(context.shared_config, "locality_fee_schedules"):
-        context.shared_config.locality_fee_schedules = {}
+    proc_code_type = get_service_code_type(proc_code)
 
-    if not hasattr(context.shared_config, "fee_schedule_types"):
-        context.shared_config.fee_schedule_types = {}
+    fee_schedule.add(modifier, proc_code, proc_code_type, rate, percentage, term_date)
 
+def find_locality_fee_schedule_keys(shared_config, schedule_name: str) -> list[tuple[str, str, str]]:
+    """
+    (schedule, carrier, locality) keys of the preloaded locality schedules for
+    schedule_name, in locality zip range order.
+    """
+    locality_fee_schedules = getattr(shared_config, "locality_fee_schedules", {})
     locality_keys = []
-
-    metadata = fetch_schedule_metadata(context, schedule_name)
-    schedule_type = metadata.get("SCHEDULETYPE", "")
-    zip_source_type = metadata.get("ZIPSOURCETYPE", "")
-    context.shared_config.fee_schedule_types[schedule_name] = schedule_type
-
     seen_keys = set()
-    for carrier, locality, *_ in context.shared_config.locality_zip_ranges:
+    for carrier, locality, *_ in shared_config.locality_zip_ranges:
         key = (schedule_name, str(carrier), str(locality))
-        if key in context.shared_config.locality_fee_schedules and key not in seen_keys:
+        if key in locality_fee_schedules and key not in seen_keys:
             seen_keys.add(key)
             locality_keys.append(key)
-            context.fee_schedules[schedule_name] = {}
-
-    else:
-        rows = fetch_default_fee_schedule(context, schedule_name)
-        context.fee_schedules[schedule_name] = process_fee_schedule_rows(context, schedule_name, rows)
-
     return locality_keys
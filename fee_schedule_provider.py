@@ -0,0 +1,111 @@
+"""
+fee_schedule_provider.py
+
+Standard fee schedules on demand for process_term. A schedule is loaded
+the first time a term names it and then kept in an LRU cache bounded by
+max_bytes, so a process only holds the schedules its rate sheets use,
+within a budget that fits the node.
+
+Sources:
+- "snapshot": the schedules preloaded into shared_config.fee_schedules.
+  In the rate sheet workers this is the memory-mapped reference store on
+  disk, and the cache keeps the decoded copies. A name the preload didn't
+  cover falls back to the database.
+- "database": SCHEDULEVALUESWITHMODIFIERS, one query per load. Nothing is
+  preloaded at startup, so shared_config.fee_schedules stays empty in the
+  parent, the snapshot and the reference store alike.
+
+The provider also resolves a schedule's locality keys, once per name.
+Hits, misses and evictions are counted per process.
+"""
+
+from collections import OrderedDict
+from columnar_fee_schedule import ColumnarFeeSchedule
+from constants import FEE_SCHEDULE_CACHE_MB
+from context import Context
+from fee_schedule_loader import fetch_default_fee_schedule, find_locality_fee_schedule_keys, process_fee_schedule_rows
+
+FEE_SCHEDULE_SOURCES = ("snapshot", "database")
+
+class FeeScheduleProvider:
+    def __init__(self, source: str = "snapshot", max_bytes: int = FEE_SCHEDULE_CACHE_MB * 1_048_576):
+        if source not in FEE_SCHEDULE_SOURCES:
+            raise ValueError(f"Unsupported fee schedule source: {source}")
+        self.source = source
+        self.max_bytes = max_bytes
+        # schedule name -> (schedule, approximate bytes), least recently used first
+        self.cache: OrderedDict[str, tuple[ColumnarFeeSchedule, int]] = OrderedDict()
+        self.cached_bytes = 0
+        self.locality_keys_by_name: dict[str, list[tuple[str, str, str]]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __getstate__(self) -> dict:
+        # the cache and counters are per process - a worker starts empty
+        state = self.__dict__.copy()
+        state["cache"] = OrderedDict()
+        state["cached_bytes"] = 0
+        state["locality_keys_by_name"] = {}
+        state["hits"] = 0
+        state["misses"] = 0
+        state["evictions"] = 0
+        return state
+
+    def get(self, context: Context, schedule_name: str) -> ColumnarFeeSchedule:
+        entry = self.cache.get(schedule_name)
+        if entry is not None:
+            self.cache.move_to_end(schedule_name)
+            self.hits += 1
+            return entry[0]
+
+        self.misses += 1
+        schedule = self._load(context, schedule_name)
+        size = schedule.memory_size()
+        self.cache[schedule_name] = (schedule, size)
+        self.cached_bytes += size
+
+        # the schedule just loaded stays, even when it alone is over the limit
+        while self.cached_bytes > self.max_bytes and len(self.cache) > 1:
+            _, (_, evicted_size) = self.cache.popitem(last=False)
+            self.cached_bytes -= evicted_size
+            self.evictions += 1
+        return schedule
+
+    def _load(self, context: Context, schedule_name: str) -> ColumnarFeeSchedule:
+        if self.source == "snapshot":
+            schedule = context.shared_config.fee_schedules.get(schedule_name)
+            if schedule is not None:
+                return materialize_fee_schedule(schedule)
+        rows = fetch_default_fee_schedule(context, schedule_name)
+        return process_fee_schedule_rows(context, schedule_name, rows)
+
+    def locality_keys(self, context: Context, schedule_name: str) -> list[tuple[str, str, str]]:
+        locality_keys = self.locality_keys_by_name.get(schedule_name)
+        if locality_keys is None:
+            locality_keys = find_locality_fee_schedule_keys(context.shared_config, schedule_name)
+            self.locality_keys_by_name[schedule_name] = locality_keys
+        return locality_keys
+
+    def statistics(self) -> dict[str, int]:
+        return {
+            "schedules": len(self.cache),
+            "cached_mb": round(self.cached_bytes / 1_048_576, 1),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+def materialize_fee_schedule(schedule) -> ColumnarFeeSchedule:
+    # a mapped schedule decodes its rows on every read - cache a decoded copy
+    if isinstance(schedule, ColumnarFeeSchedule):
+        return schedule
+    materialized = ColumnarFeeSchedule()
+    for proc_code, modifier, proc_code_type, allowed, percentage, term_date in schedule.rows():
+        materialized.add(modifier, proc_code, proc_code_type, allowed, percentage, term_date)
+    return materialized.freeze()
+
+def get_fee_schedule_provider(shared_config) -> FeeScheduleProvider:
+    if getattr(shared_config, "fee_schedule_provider", None) is None:
+        shared_config.fee_schedule_provider = FeeScheduleProvider()
+    return shared_config.fee_schedule_provider
@@ -0,0 +1,156 @@
+"""
+interval_set.py
+
+Service code ranges from the code group trees as integer intervals instead
+of expanded string sets. A 00000-99999 range is one interval, and the
+include/exclude (NOT logic) algebra in generate_service_combinations works on
+the intervals directly. Codes are made into strings only when the
+combinations are emitted, and with a ValidCodeIndex only the valid ones, so
+the work follows the number of valid codes rather than the width of a range.
+
+CodeSet keeps a code type's numbers as an IntervalSet and every other code
+(alphanumeric, or digits with leading zeros) as a plain string set. A number
+stands for the code str(number), the same string range expansion produced,
+so a single code like "99213" and a range covering it are the same code
+while "0450" stays a separate one.
+"""
+
+from bisect import bisect_right
+from typing import Iterable, Iterator
+from code_interning import numeric_code
+from valid_code_index import ValidCodeIndex
+
+Interval = tuple[int, int]
+
+class IntervalSet:
+    """
+    Sorted, disjoint, non-adjacent inclusive intervals of integers.
+    """
+    __slots__ = ("intervals",)
+
+    def __init__(self, intervals: Iterable[Interval] = ()):
+        merged: list[Interval] = []
+        for low, high in sorted(interval for interval in intervals if interval[0] <= interval[1]):
+            if merged and low <= merged[-1][1] + 1:
+                if high > merged[-1][1]:
+                    merged[-1] = (merged[-1][0], high)
+            else:
+                merged.append((low, high))
+        self.intervals = merged
+
+    @classmethod
+    def _normalized(cls, intervals: list[Interval]) -> "IntervalSet":
+        interval_set = cls.__new__(cls)
+        interval_set.intervals = intervals
+        return interval_set
+
+    def __bool__(self) -> bool:
+        return bool(self.intervals)
+
+    def __len__(self) -> int:
+        return sum(high - low + 1 for low, high in self.intervals)
+
+    def __contains__(self, number: int) -> bool:
+        position = bisect_right(self.intervals, (number, float("inf"))) - 1
+        return position >= 0 and self.intervals[position][1] >= number
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, IntervalSet) and self.intervals == other.intervals
+
+    def __repr__(self) -> str:
+        return f"IntervalSet({self.intervals})"
+
+    def numbers(self) -> Iterator[int]:
+        for low, high in self.intervals:
+            yield from range(low, high + 1)
+
+    def union(self, other: "IntervalSet") -> "IntervalSet":
+        if not other.intervals:
+            return self
+        if not self.intervals:
+            return other
+        return IntervalSet(self.intervals + other.intervals)
+
+    def difference(self, other: "IntervalSet") -> "IntervalSet":
+        others = other.intervals
+        if not others or not self.intervals:
+            return self
+
+        result: list[Interval] = []
+        first = 0
+        for low, high in self.intervals:
+            # others are sorted - skip the ones that end before this interval
+            while first < len(others) and others[first][1] < low:
+                first += 1
+            current = low
+            position = first
+            while position < len(others) and others[position][0] <= high:
+                other_low, other_high = others[position]
+                if other_low > current:
+                    result.append((current, other_low - 1))
+                current = max(current, other_high + 1)
+                if current > high:
+                    break
+                position += 1
+            if current <= high:
+                result.append((current, high))
+        return IntervalSet._normalized(result)
+
+def is_canonical_number(code: str) -> bool:
+    return code.isascii() and code.isdigit() and str(int(code)) == code
+
+class CodeSet:
+    def __init__(self):
+        self.ranges: list[Interval] = []
+        self.literals: set[str] = set()
+        self._numbers: IntervalSet | None = None
+
+    @property
+    def numbers(self) -> IntervalSet:
+        if self._numbers is None:
+            self._numbers = IntervalSet(self.ranges)
+            self.ranges = self._numbers.intervals
+        return self._numbers
+
+    def add_range(self, low: int, high: int) -> None:
+        if low <= high:
+            self.ranges.append((low, high))
+            self._numbers = None
+
+    def add_code(self, code: str) -> None:
+        if is_canonical_number(code):
+            self.add_range(int(code), int(code))
+        else:
+            self.literals.add(code)
+
+    def update(self, other: "CodeSet") -> None:
+        self.ranges.extend(other.numbers.intervals)
+        self.literals.update(other.literals)
+        self._numbers = None
+
+    def difference(self, other: "CodeSet") -> "CodeSet":
+        result = CodeSet()
+        result._numbers = self.numbers.difference(other.numbers)
+        result.ranges = result._numbers.intervals
+        result.literals = self.literals - other.literals
+        return result
+
+    def __bool__(self) -> bool:
+        return bool(self.literals) or bool(self.numbers)
+
+    def codes(self, valid_codes: ValidCodeIndex = None) -> list[str]:
+        """
+        The codes as strings, unordered; with valid_codes only the valid ones.
+        """
+        if valid_codes is None:
+            codes = [numeric_code(number) for number in self.numbers.numbers()]
+            codes.extend(self.literals)
+            return codes
+
+        codes = [
+            numeric_code(number)
+            for low, high in self.numbers.intervals
+            for number in valid_codes.valid_numbers_between(low, high)
+        ]
+        codes.extend(code for code in self.literals if valid_codes.is_valid_any(code))
+        return codes
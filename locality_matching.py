@@ -5,19 +5,7 @@ def find_matching_locality(provider_zip: str, context: Context) -> tuple[str, st
     """
     Find the matching (carrier, locality) tuple for the provider's ZIP code.
     """
-    try:
-        zip_int = int(provider_zip)
-    except ValueError:
-        return None  # Invalid ZIP
-
-    for carrier, locality, begin_zip, end_zip in context.shared_config.locality_zip_ranges:
-        try:
-            if int(begin_zip) <= zip_int <= int(end_zip):
-                return (carrier, locality)
-        except ValueError:
-            continue  # Skip invalid zip ranges
-
-    return None  # No match found
+    return context.shared_config.locality_zip_index.find(provider_zip)
 
 def attach_provider_locality_info(bundle: ProviderBundle, context: Context) -> None:
     """
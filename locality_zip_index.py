@@ -0,0 +1,73 @@
+"""
+locality_zip_index.py
+
+ZIP -> (carrier, locality) lookup compiled once from the RBRVSZIP ranges
+(load_locality_zip_ranges), replacing a linear scan of every range per
+provider.
+
+The ranges are swept into sorted, non-overlapping segments, each holding the
+locality that matches anywhere inside it. A lookup is one bisect over the
+segment starts, and results are memoized per ZIP string since providers
+share ZIP codes heavily.
+
+Matching is the same as the scan it replaces: the provider ZIP and both
+bounds are compared as integers, ranges with a non-numeric bound are
+ignored, and when ranges overlap the first one in load order wins.
+"""
+
+import heapq
+from bisect import bisect_right
+
+LocalityKey = tuple[str, str]
+
+class LocalityZipIndex:
+    def __init__(self, locality_zip_ranges: list[tuple[str, str, str, str]]):
+        ranges = []
+        for order, (carrier, locality, begin_zip, end_zip) in enumerate(locality_zip_ranges):
+            try:
+                begin, end = int(begin_zip), int(end_zip)
+            except ValueError:
+                continue  # Skip invalid zip ranges
+            if begin <= end:
+                ranges.append((begin, end, order, (carrier, locality)))
+        ranges.sort()
+
+        self.starts: list[int] = []
+        self.localities: list[LocalityKey | None] = []
+        self._matches: dict[str, LocalityKey | None] = {}
+
+        points = sorted({begin for begin, *_ in ranges} | {end + 1 for _, end, *_ in ranges})
+        active = []  # (load order, end, locality) - the heap top is the earliest loaded range
+        next_range = 0
+        for point in points:
+            while next_range < len(ranges) and ranges[next_range][0] <= point:
+                begin, end, order, locality = ranges[next_range]
+                heapq.heappush(active, (order, end, locality))
+                next_range += 1
+            while active and active[0][1] < point:
+                heapq.heappop(active)
+            locality = active[0][2] if active else None
+            # neighbouring segments with the same answer collapse into one
+            if not self.localities or self.localities[-1] != locality:
+                self.starts.append(point)
+                self.localities.append(locality)
+
+    def find(self, provider_zip: str) -> LocalityKey | None:
+        try:
+            return self._matches[provider_zip]
+        except KeyError:
+            pass
+
+        try:
+            zip_int = int(provider_zip)
+        except ValueError:
+            match = None  # Invalid ZIP
+        else:
+            position = bisect_right(self.starts, zip_int) - 1
+            match = self.localities[position] if position >= 0 else None
+
+        self._matches[provider_zip] = match
+        return match
+
+    def __len__(self) -> int:
+        return len(self.starts)
@@ -9,16 +9,20 @@ Chris Hedlund - 2025
 
 from billing_code_extract import BillingCodeExtract
 from clean_output_folders import clear_output_folders 
-from codegroup_loader import load_code_groups, load_ambsurg_codes, load_ndc_codes, load_drg_weights, load_locality_zip_ranges
+from code_group_forest import CodeGroupForest
+from code_interning import get_code_table, use_code_table
+from constants import FEE_SCHEDULE_CACHE_MB, SQLITE_CONNECTION_PREFIX
 from context import Context
 from context_factory import build_context
+from connection_pool import close_all_pools, pool_statistics
 import cProfile
-from database_connection import DatabaseConnection
+from database_connection import create_database_connection
 from datetime import datetime
-from fee_schedule_loader import preload_all_locality_fee_schedules, preload_fee_schedules
+from drg_weight_table import DrgWeightTable
+from fee_schedule_provider import FeeScheduleProvider
 import json
+from locality_zip_index import LocalityZipIndex
 from merge_output_files import merge_all_outputs
-from modifier_loader import load_modifier_map
 import os
 from ratesheet_runner import process_ratesheets
 from parallel_ratesheet_runner import parallel_process_ratesheets
@@ -29,10 +33,14 @@ from plan_detail_extract import PlanDetailExtract
 from profiler import Profiler
 from provider_runner import run_all_providers
 import pstats
+import sys
 from rate_group_key_factory import RateGroupKeyFactory
+from reference_loader import load_reference_data
+from reference_snapshot import apply_reference_snapshot, load_reference_snapshot, save_reference_snapshot
 from setup_environment import ensure_directories_exist
 from shared_config import SharedConfig
 import utilities
+from valid_code_index import ValidCodeIndex
 
 def process_billing_codes(context: Context, shared_config, base_params) -> None:
     valid_service_codes: set = set()
@@ -45,6 +53,7 @@ def process_billing_codes(context: Context, shared_config, base_params) -> None:
     valid_service_codes = billing_code_extract.extract_data()
     utilities.create_mms_file(billing_code_full_path,billing_code_extract.records_processed)
     shared_config.valid_service_codes = valid_service_codes
+    shared_config.valid_code_index = ValidCodeIndex(valid_service_codes)
 
 def process_place_of_service_codes(context: Context, base_params):
     place_of_service_filename = context.shared_config.mrf_file_prefixes["place_of_service"]
@@ -76,12 +85,18 @@ def process_plan_details(context: Context, base_params):
     plan_detail_extract.extract_data()
     utilities.create_mms_file(plan_detail_full_path,plan_detail_extract.records_processed)
         
-def main():
+def build_connection_string(db_config: dict) -> str:
+    # a sqlite_path entry points the run at the offline stand-in (see offline_database.py)
+    if db_config.get("sqlite_path"):
+        return SQLITE_CONNECTION_PREFIX + db_config["sqlite_path"]
+    return (f"Driver={db_config['driver']};"f"Server={db_config['server']};"f"Port={db_config['port']};"f"Database={db_config['database']};"f"Trusted_Connection={'yes' if db_config['trusted_connection'] else 'no'};")
+
+def main(config_path: str = "./config/config.json"):
 
     # The parameters to run the rpocess are in config.json
     # This includes base filenames, field constants, etc.
 
-    config = utilities.load_config("./config/config.json")
+    config = utilities.load_config(config_path)
     if config is None:
         return
 
@@ -118,15 +133,15 @@ def main():
 
     # networx server connection - database networx
     networx_db_config = config['networx_database']
-    networx_connection_string = (f"Driver={networx_db_config['driver']};"f"Server={networx_db_config['server']};"f"Port={networx_db_config['port']};"f"Database={networx_db_config['database']};"f"Trusted_Connection={'yes' if networx_db_config['trusted_connection'] else 'no'};")
+    networx_connection_string = build_connection_string(networx_db_config)
     
     # QNXT server connection - database PlanData
     qnxt_db_config = config["qnxt_database"]
-    qnxt_connection_string = (f"Driver={qnxt_db_config['driver']};"f"Server={qnxt_db_config['server']};"f"Port={qnxt_db_config['port']};"f"Database={qnxt_db_config['database']};"f"Trusted_Connection={'yes' if qnxt_db_config['trusted_connection'] else 'no'};")
+    qnxt_connection_string = build_connection_string(qnxt_db_config)
     
     # Networx database
-    networx_conn = DatabaseConnection(networx_connection_string)
-    qnxt_conn = DatabaseConnection(qnxt_connection_string)
+    networx_conn = create_database_connection(networx_connection_string)
+    qnxt_conn = create_database_connection(qnxt_connection_string)
 
     mrf_target_directory = directory_structure["mrf_output_dir"]
     mrf_file_prefixes = config['mrf_file_prefixes']
@@ -147,21 +162,51 @@ def main():
         qnxt_connection_string=qnxt_connection_string,
         directory_structure=directory_structure
         )
-    shared_config.codegroups = load_code_groups(networx_conn)
-    shared_config.amb_surg_codes = load_ambsurg_codes(networx_conn)
-    shared_config.ndc_codes = load_ndc_codes(networx_conn)
-    shared_config.drg_weights = load_drg_weights(networx_conn)
-    shared_config.locality_zip_ranges = load_locality_zip_ranges(networx_conn)
     shared_config.provider_code_field_map = provider_code_field_map
+    # rate sheet workers share one memory-mapped copy of the reference data
+    shared_config.use_mmap_reference_store = config.get("use_mmap_reference_store", True)
+    # standard fee schedules are loaded per process on demand, within a memory budget
+    shared_config.fee_schedule_provider = FeeScheduleProvider(
+        config.get("fee_schedule_source", "snapshot"),
+        int(config.get("fee_schedule_cache_mb", FEE_SCHEDULE_CACHE_MB) * 1_048_576)
+    )
 
     reference_dir = shared_config.directory_structure["reference_dir"]
     modifier_path = os.path.join(reference_dir, "procedure_modifier_map.txt")
-    shared_config.modifier_map = load_modifier_map(modifier_path)
-    context = build_context(shared_config, networx_conn, qnxt_conn)
-    shared_config.locality_fee_schedules = preload_all_locality_fee_schedules(context)
-    preload_fee_schedules(context)
-    shared_config.fee_schedules = context.fee_schedules
+
+    # reference data comes from today's snapshot when there is one,
+    # otherwise it is loaded from the database and snapshotted for reruns
+    use_reference_snapshot = config.get("use_reference_snapshot", True)
+    snapshot_dir = os.path.join(reference_dir, "snapshots")
+    # the "database" source loads standard fee schedules on demand only
+    preload_fee_schedules = shared_config.fee_schedule_provider.source != "database"
+    reference_data = None
+    if use_reference_snapshot:
+        reference_data = load_reference_snapshot(snapshot_dir, networx_connection_string, modifier_path, preload_fee_schedules)
+
+    if reference_data is not None:
+        apply_reference_snapshot(shared_config, reference_data)
+        context = build_context(shared_config, networx_conn, qnxt_conn)
+        context.fee_schedules = shared_config.fee_schedules
+    else:
+        # the reference tables are independent - load them side by side
+        load_reference_data(shared_config, networx_connection_string, modifier_path, preload_fee_schedules=preload_fee_schedules)
+        shared_config.code_table = get_code_table()
+        context = build_context(shared_config, networx_conn, qnxt_conn)
+        context.fee_schedules = shared_config.fee_schedules
+        if use_reference_snapshot:
+            save_reference_snapshot(snapshot_dir, shared_config, networx_connection_string, modifier_path, preload_fee_schedules)
     
+    # codes interned from here on go into the table the reference data was built with
+    use_code_table(shared_config.code_table)
+    shared_config.locality_zip_index = LocalityZipIndex(shared_config.locality_zip_ranges)
+    # workers take their code group trees from here instead of building them
+    shared_config.codegroup_forest = CodeGroupForest(
+        shared_config.codegroups,
+        service_code_range_types,
+        provider_code_range_types
+    )
+    print(f"Code group forest: {shared_config.codegroup_forest.statistics()}")
     ensure_directories_exist(shared_config)
 
     """
@@ -172,6 +217,9 @@ def main():
 
     # Stand-alone extracts
     process_billing_codes(context, shared_config, base_params)
+    # built once the valid codes are known, then pickled to the workers with shared_config
+    shared_config.drg_weight_table = DrgWeightTable(shared_config.drg_weights, shared_config.valid_code_index)
+    print(f"DRG weight table: {len(shared_config.drg_weight_table)} DRGs")
     process_place_of_service_codes(context, base_params)
     process_plan_details(context, base_params)
     
@@ -186,12 +234,18 @@ def main():
     run_all_providers(shared_config, rate_group_key_factory)
 
     merge_all_outputs(shared_config)
+
+    networx_conn.disconnect()
+    qnxt_conn.disconnect()
+    for database, stats in pool_statistics().items():
+        print(f"Connection pool {database}: {stats}")
+    close_all_pools()
     
 if __name__ == "__main__":
     profiler = cProfile.Profile()
     profiler.enable()
     
-    main()  
+    main(sys.argv[1] if len(sys.argv) > 1 else "./config/config.json")
     
     profiler.disable()
     stats = pstats.Stats(profiler).sort_stats("cumtime")
@@ -0,0 +1,460 @@
+"""
+mmap_reference_store.py
+
+Read-only reference store the rate sheet workers open from one memory-mapped
+file instead of each holding a private copy of the reference dicts.
+
+The parent writes fee_schedules, locality_fee_schedules, codegroups, the
+compiled codegroup_forest and valid_service_codes into the file once. Values live in flat arrays (string
+ids, floats) with offset tables and hash slots next to them; a worker maps
+the file read-only, so every process shares the same page-cache pages. The
+views returned here behave like the objects they replace - the schedule
+sets and code groups like dicts, each schedule like a ColumnarFeeSchedule
+(rows(), get_row()), valid_service_codes like a set - and decode only the
+rows that are actually read.
+
+The views pickle as (path, section), so they travel to spawned workers
+through the pool initializer and are reopened there without copying data.
+Schedules shared between keys are written once and mapped to one view. A
+DeltaFeeSchedule is written as its change rows and removed keys next to its
+base's position, and comes back as a DeltaFeeSchedule over the base's view.
+"""
+
+import json
+import mmap
+import os
+import pickle
+import zlib
+from array import array
+from collections.abc import Mapping, Set
+from typing import Any, Iterator
+
+from columnar_fee_schedule import FeeScheduleRow
+from fee_schedule_dedup import DeltaFeeSchedule
+
+STORE_MAGIC = b"CMSREF02"
+SCHEDULE_SETS = ["fee_schedules", "locality_fee_schedules"]
+# separates code and code type in a valid_service_codes key
+CODE_KEY_SEPARATOR = "\x1f"
+
+class _StringTable:
+    def __init__(self):
+        self.ids: dict[str, int] = {}
+        self.offsets = array("q", [0])
+        self.data = bytearray()
+
+    def add(self, value: str) -> int:
+        string_id = self.ids.get(value)
+        if string_id is None:
+            string_id = self.ids[value] = len(self.ids)
+            self.data += value.encode("utf-8")
+            self.offsets.append(len(self.data))
+        return string_id
+
+def _hash_slots(hashes: list[int]) -> array:
+    # open addressing, linear probing - a slot holds a row number or -1
+    size = 8
+    while size < len(hashes) * 2:
+        size *= 2
+    mask = size - 1
+    slots = array("i", [-1]) * size
+    for row, hash_value in enumerate(hashes):
+        slot = hash_value & mask
+        while slots[slot] != -1:
+            slot = (slot + 1) & mask
+        slots[slot] = row
+    return slots
+
+def _schedule_set_sections(name: str, schedules: dict, strings: _StringTable) -> dict[str, Any]:
+    keys = list(schedules)
+    # keys sharing a schedule object (see fee_schedule_dedup.py) share its rows
+    key_schedule = array("i")
+    positions: dict[int, int] = {}
+    # a delta's base position (-1 for a full schedule) and its removed keys
+    schedule_base = array("i")
+    schedule_removed_start = array("q", [0])
+    removed_mod = array("i")
+    removed_proc = array("i")
+    schedule_mod_start = array("q", [0])
+    mod_name = array("i")
+    mod_row_start = array("q", [0])
+    row_proc = array("i")
+    row_type = array("i")
+    row_term = array("i")
+    row_allowed = array("d")
+    row_percentage = array("d")
+    row_hashes = []
+
+    # rows keep each schedule's order, so iteration matches ColumnarFeeSchedule
+    def add_schedule(schedule) -> int:
+        position = positions.get(id(schedule))
+        if position is not None:
+            return position
+        if isinstance(schedule, DeltaFeeSchedule):
+            # the base goes in first, so its rows are already laid out
+            base_position = add_schedule(schedule.base)
+            stored_rows = schedule.changes
+            removed = schedule.removed
+        else:
+            base_position = -1
+            stored_rows = schedule
+            removed = ()
+        position = positions[id(schedule)] = len(positions)
+        schedule_base.append(base_position)
+        for modifier in stored_rows.modifiers():
+            mod_index = len(mod_name)
+            mod_name.append(strings.add(modifier))
+            for proc_code, _, proc_code_type, allowed, percentage, term_date in stored_rows.rows(modifier):
+                row_proc.append(strings.add(proc_code))
+                row_type.append(strings.add(proc_code_type))
+                row_term.append(strings.add(term_date))
+                row_allowed.append(allowed)
+                row_percentage.append(percentage)
+                row_hashes.append(zlib.crc32(proc_code.encode("utf-8"), mod_index))
+            mod_row_start.append(len(row_proc))
+        schedule_mod_start.append(len(mod_name))
+        for modifier, proc_code in removed:
+            removed_mod.append(strings.add(modifier))
+            removed_proc.append(strings.add(proc_code))
+        schedule_removed_start.append(len(removed_proc))
+        return position
+
+    for key in keys:
+        key_schedule.append(add_schedule(schedules[key]))
+
+    return {
+        f"{name}.keys": pickle.dumps(keys, protocol=pickle.HIGHEST_PROTOCOL),
+        f"{name}.key_schedule": key_schedule,
+        f"{name}.schedule_base": schedule_base,
+        f"{name}.schedule_removed_start": schedule_removed_start,
+        f"{name}.removed_mod": removed_mod,
+        f"{name}.removed_proc": removed_proc,
+        f"{name}.schedule_mod_start": schedule_mod_start,
+        f"{name}.mod_name": mod_name,
+        f"{name}.mod_row_start": mod_row_start,
+        f"{name}.row_proc": row_proc,
+        f"{name}.row_type": row_type,
+        f"{name}.row_term": row_term,
+        f"{name}.row_allowed": row_allowed,
+        f"{name}.row_percentage": row_percentage,
+        f"{name}.slots": _hash_slots(row_hashes),
+    }
+
+def _code_set_sections(codes: set, strings: _StringTable) -> dict[str, Any]:
+    code_ids = array("i")
+    hashes = []
+    for code, code_type in codes:
+        if not isinstance(code, str) or not isinstance(code_type, str):
+            raise TypeError(f"valid_service_codes holds a non-string key: {(code, code_type)!r}")
+        code_key = code + CODE_KEY_SEPARATOR + code_type
+        code_ids.append(strings.add(code_key))
+        hashes.append(zlib.crc32(code_key.encode("utf-8")))
+    return {
+        "valid_service_codes.ids": code_ids,
+        "valid_service_codes.slots": _hash_slots(hashes),
+    }
+
+def _blob_map_sections(name: str, values: dict) -> dict[str, Any]:
+    # irregular, rarely read data (code groups) - one pickle per entry behind an offset table
+    offsets = array("q", [0])
+    data = bytearray()
+    for value in values.values():
+        data += pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        offsets.append(len(data))
+    return {
+        f"{name}.keys": pickle.dumps(list(values), protocol=pickle.HIGHEST_PROTOCOL),
+        f"{name}.offsets": offsets,
+        f"{name}.data": bytes(data),
+    }
+
+def write_reference_store(path: str, shared_config) -> str:
+    """
+    Serializes the worker-side reference data on shared_config into path.
+    Written under a temp name and renamed, so workers never map a partial file.
+    """
+    strings = _StringTable()
+    sections: dict[str, Any] = {}
+    for name in SCHEDULE_SETS:
+        sections.update(_schedule_set_sections(name, getattr(shared_config, name), strings))
+    sections.update(_code_set_sections(shared_config.valid_service_codes, strings))
+    sections.update(_blob_map_sections("codegroups", dict(shared_config.codegroups)))
+    codegroup_forest = getattr(shared_config, "codegroup_forest", None)
+    if codegroup_forest is not None:
+        sections.update(_blob_map_sections("codegroup_forest", codegroup_forest.trees))
+    sections["strings.offsets"] = strings.offsets
+    sections["strings.data"] = bytes(strings.data)
+
+    # header: section -> [offset, byte length, array typecode]
+    layout = {}
+    offset = 0
+    for name, section in sections.items():
+        typecode = section.typecode if isinstance(section, array) else "B"
+        length = len(section) * section.itemsize if isinstance(section, array) else len(section)
+        layout[name] = [offset, length, typecode]
+        offset += (length + 7) // 8 * 8
+
+    header = json.dumps(layout).encode("utf-8")
+    data_start = (len(STORE_MAGIC) + 8 + len(header) + 7) // 8 * 8
+
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as store_file:
+        store_file.write(STORE_MAGIC)
+        store_file.write(len(header).to_bytes(8, "little"))
+        store_file.write(header)
+        for name, section in sections.items():
+            store_file.seek(data_start + layout[name][0])
+            store_file.write(section.tobytes() if isinstance(section, array) else section)
+        store_file.truncate(data_start + offset)
+    os.replace(temp_path, path)
+    return path
+
+# one mapping per store file per process
+_open_stores: dict[str, "ReferenceStore"] = {}
+
+def open_reference_store(path: str) -> "ReferenceStore":
+    path = os.path.abspath(path)
+    store = _open_stores.get(path)
+    if store is None:
+        store = _open_stores[path] = ReferenceStore(path)
+    return store
+
+def _reopen_view(path: str, name: str):
+    return getattr(open_reference_store(path), name)
+
+class ReferenceStore:
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as store_file:
+            self._mmap = mmap.mmap(store_file.fileno(), 0, access=mmap.ACCESS_READ)
+        buffer = memoryview(self._mmap)
+        if bytes(buffer[:len(STORE_MAGIC)]) != STORE_MAGIC:
+            raise ValueError(f"{path} is not a reference store")
+        header_length = int.from_bytes(buffer[len(STORE_MAGIC):len(STORE_MAGIC) + 8], "little")
+        header_end = len(STORE_MAGIC) + 8 + header_length
+        layout = json.loads(bytes(buffer[len(STORE_MAGIC) + 8:header_end]))
+        data_start = (header_end + 7) // 8 * 8
+
+        self._sections = {}
+        for name, (offset, length, typecode) in layout.items():
+            section = buffer[data_start + offset:data_start + offset + length]
+            self._sections[name] = section if typecode == "B" else section.cast(typecode)
+
+        self.strings = _MappedStrings(self._sections["strings.offsets"], self._sections["strings.data"])
+        self.fee_schedules = MappedScheduleSet(self, "fee_schedules")
+        self.locality_fee_schedules = MappedScheduleSet(self, "locality_fee_schedules")
+        self.valid_service_codes = MappedCodeSet(self)
+        self.codegroups = MappedBlobMap(self, "codegroups")
+        self.codegroup_forest = MappedBlobMap(self, "codegroup_forest") if "codegroup_forest.keys" in self._sections else None
+
+    def section(self, name: str) -> memoryview:
+        return self._sections[name]
+
+    def apply_to(self, shared_config) -> None:
+        for name in ["fee_schedules", "locality_fee_schedules", "valid_service_codes", "codegroups"]:
+            setattr(shared_config, name, getattr(self, name))
+        if self.codegroup_forest is not None:
+            shared_config.codegroup_forest = self.codegroup_forest
+
+class _MappedStrings:
+    def __init__(self, offsets: memoryview, data: memoryview):
+        self.offsets = offsets
+        self.data = data
+
+    def get(self, string_id: int) -> str:
+        return str(self.data[self.offsets[string_id]:self.offsets[string_id + 1]], "utf-8")
+
+    def equals(self, string_id: int, encoded: bytes) -> bool:
+        return self.data[self.offsets[string_id]:self.offsets[string_id + 1]] == encoded
+
+class _MappedView:
+    def __init__(self, store: ReferenceStore, name: str):
+        self.store = store
+        self.name = name
+
+    def __reduce__(self):
+        return (_reopen_view, (self.store.path, self.name))
+
+class MappedScheduleSet(_MappedView, Mapping):
+    """schedule key -> MappedFeeSchedule (or a DeltaFeeSchedule over one), same shape as the fee schedule dicts"""
+    def __init__(self, store: ReferenceStore, name: str):
+        super().__init__(store, name)
+        self.keys_list = pickle.loads(store.section(f"{name}.keys"))
+        self.index = {key: position for key, position in zip(self.keys_list, store.section(f"{name}.key_schedule"))}
+        # one view per stored schedule, so keys that share rows share the view too
+        self.views: dict[int, MappedFeeSchedule | DeltaFeeSchedule] = {}
+        self.schedule_base = store.section(f"{name}.schedule_base")
+        self.schedule_removed_start = store.section(f"{name}.schedule_removed_start")
+        self.removed_mod = store.section(f"{name}.removed_mod")
+        self.removed_proc = store.section(f"{name}.removed_proc")
+        self.schedule_mod_start = store.section(f"{name}.schedule_mod_start")
+        self.mod_name = store.section(f"{name}.mod_name")
+        self.mod_row_start = store.section(f"{name}.mod_row_start")
+        self.row_proc = store.section(f"{name}.row_proc")
+        self.row_type = store.section(f"{name}.row_type")
+        self.row_term = store.section(f"{name}.row_term")
+        self.row_allowed = store.section(f"{name}.row_allowed")
+        self.row_percentage = store.section(f"{name}.row_percentage")
+        self.slots = store.section(f"{name}.slots")
+        self.strings = store.strings
+        # code types, term dates and modifiers repeat endlessly - decode each once
+        self.small_strings: dict[int, str] = {}
+
+    def __getitem__(self, key) -> "MappedFeeSchedule | DeltaFeeSchedule":
+        return self.schedule_at(self.index[key])
+
+    def schedule_at(self, position: int) -> "MappedFeeSchedule | DeltaFeeSchedule":
+        view = self.views.get(position)
+        if view is None:
+            view = MappedFeeSchedule(self, position)
+            base_position = self.schedule_base[position]
+            if base_position != -1:
+                removed = {
+                    (self.small_string(self.removed_mod[row]), self.strings.get(self.removed_proc[row]))
+                    for row in range(self.schedule_removed_start[position], self.schedule_removed_start[position + 1])
+                }
+                view = DeltaFeeSchedule(self.schedule_at(base_position), view, removed)
+            self.views[position] = view
+        return view
+
+    def __iter__(self) -> Iterator:
+        return iter(self.keys_list)
+
+    def __len__(self) -> int:
+        return len(self.keys_list)
+
+    def __contains__(self, key) -> bool:
+        return key in self.index
+
+    def small_string(self, string_id: int) -> str:
+        value = self.small_strings.get(string_id)
+        if value is None:
+            value = self.small_strings[string_id] = self.strings.get(string_id)
+        return value
+
+    def find_row(self, mod_index: int, proc_code: str) -> int:
+        encoded = proc_code.encode("utf-8")
+        mask = len(self.slots) - 1
+        slot = zlib.crc32(encoded, mod_index) & mask
+        start, end = self.mod_row_start[mod_index], self.mod_row_start[mod_index + 1]
+        while True:
+            row = self.slots[slot]
+            if row == -1:
+                return -1
+            if start <= row < end and self.strings.equals(self.row_proc[row], encoded):
+                return row
+            slot = (slot + 1) & mask
+
+    def row(self, row: int, modifier: str) -> FeeScheduleRow:
+        return (
+            self.strings.get(self.row_proc[row]),
+            modifier,
+            self.small_string(self.row_type[row]),
+            self.row_allowed[row],
+            self.row_percentage[row],
+            self.small_string(self.row_term[row])
+        )
+
+class MappedFeeSchedule:
+    """one schedule, with the same row API as ColumnarFeeSchedule"""
+    def __init__(self, schedule_set: MappedScheduleSet, position: int):
+        self.schedule_set = schedule_set
+        self.mod_start = schedule_set.schedule_mod_start[position]
+        self.mod_end = schedule_set.schedule_mod_start[position + 1]
+
+    def _mod_index(self, modifier) -> int:
+        # a schedule only has a handful of modifiers
+        for mod_index in range(self.mod_start, self.mod_end):
+            if self.schedule_set.small_string(self.schedule_set.mod_name[mod_index]) == modifier:
+                return mod_index
+        return -1
+
+    def __len__(self) -> int:
+        schedule_set = self.schedule_set
+        return schedule_set.mod_row_start[self.mod_end] - schedule_set.mod_row_start[self.mod_start]
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+    def modifiers(self) -> list[str]:
+        return [
+            self.schedule_set.small_string(self.schedule_set.mod_name[mod_index])
+            for mod_index in range(self.mod_start, self.mod_end)
+        ]
+
+    def rows(self, modifier: str = None) -> Iterator[FeeScheduleRow]:
+        schedule_set = self.schedule_set
+        if modifier is None:
+            mod_indexes = range(self.mod_start, self.mod_end)
+        else:
+            mod_index = self._mod_index(modifier)
+            mod_indexes = [mod_index] if mod_index != -1 else []
+        for mod_index in mod_indexes:
+            mod = schedule_set.small_string(schedule_set.mod_name[mod_index])
+            for row in range(schedule_set.mod_row_start[mod_index], schedule_set.mod_row_start[mod_index + 1]):
+                yield schedule_set.row(row, mod)
+
+    def get_row(self, modifier: str, proc_code: str) -> FeeScheduleRow | None:
+        if not isinstance(proc_code, str):
+            return None
+        mod_index = self._mod_index(modifier)
+        if mod_index == -1:
+            return None
+        row = self.schedule_set.find_row(mod_index, proc_code)
+        if row == -1:
+            return None
+        return self.schedule_set.row(row, modifier)
+
+class MappedCodeSet(_MappedView, Set):
+    """the valid_service_codes set of (code, code type) tuples"""
+    def __init__(self, store: ReferenceStore):
+        super().__init__(store, "valid_service_codes")
+        self.ids = store.section("valid_service_codes.ids")
+        self.slots = store.section("valid_service_codes.slots")
+        self.strings = store.strings
+
+    def __contains__(self, code_key) -> bool:
+        if not isinstance(code_key, tuple) or len(code_key) != 2:
+            return False
+        code, code_type = code_key
+        if not isinstance(code, str) or not isinstance(code_type, str):
+            return False
+        encoded = (code + CODE_KEY_SEPARATOR + code_type).encode("utf-8")
+        mask = len(self.slots) - 1
+        slot = zlib.crc32(encoded) & mask
+        while True:
+            row = self.slots[slot]
+            if row == -1:
+                return False
+            if self.strings.equals(self.ids[row], encoded):
+                return True
+            slot = (slot + 1) & mask
+
+    def __iter__(self) -> Iterator[tuple[str, str]]:
+        for string_id in self.ids:
+            code, code_type = self.strings.get(string_id).split(CODE_KEY_SEPARATOR)
+            yield code, code_type
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+class MappedBlobMap(_MappedView, Mapping):
+    """key -> value, each value unpickled from the mapping when it is read"""
+    def __init__(self, store: ReferenceStore, name: str):
+        super().__init__(store, name)
+        self.keys_list = pickle.loads(store.section(f"{name}.keys"))
+        self.index = {key: position for position, key in enumerate(self.keys_list)}
+        self.offsets = store.section(f"{name}.offsets")
+        self.data = store.section(f"{name}.data")
+
+    def __getitem__(self, key) -> Any:
+        position = self.index[key]
+        return pickle.loads(self.data[self.offsets[position]:self.offsets[position + 1]])
+
+    def __contains__(self, key) -> bool:
+        return key in self.index
+
+    def __iter__(self) -> Iterator:
+        return iter(self.keys_list)
+
+    def __len__(self) -> int:
+        return len(self.keys_list)
@@ -1,5 +1,6 @@
 import csv
 import datetime
+from code_interning import intern_code
 from collections import defaultdict
 
 def parse_date_flexible(date_str: str) -> datetime.date | None:
@@ -35,7 +36,7 @@ def load_modifier_map(file_path: str) -> dict[str, set[str]]:
                 if exp_date < today:
                     continue  # Expired
 
-            modifiers_to_codes[modifier].add(code)
+            modifiers_to_codes[intern_code(modifier)].add(intern_code(code))
 
     return dict(modifiers_to_codes)
 
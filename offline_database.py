@@ -0,0 +1,451 @@
+"""
+offline_database.py
+
+Builds the SQLite file SQLiteDatabaseConnection reads, with every table the
+pipeline queries on networx and QNXT. Tables are filled either from a
+captured export (one <TABLE>.csv per table, header row = column names) or
+from deterministic synthetic data sized by the arguments below.
+
+    python offline_database.py offline_run/offline.db --rate-sheets 40 --providers 400
+    python offline_database.py offline_run/offline.db --from-csv captured_tables/
+
+main() always reads <reference_dir>/procedure_modifier_map.txt, so a
+synthetic map is written there too, under the reference_dir of --config.
+--modifier-map writes it somewhere else instead.
+
+Column names keep the casing the queries read them back with, since SQLite
+returns declared names for plain column references.
+"""
+
+import argparse
+import csv
+import os
+import random
+import sqlite3
+from datetime import datetime
+from typing import Any, Iterable
+from constants import TAXONOMY_ATTRIBUTE_ID
+from sqlite_database_connection import SQLITE_DATETIME_FORMAT, open_sqlite_connection
+
+TABLES: dict[str, list[tuple[str, str]]] = {
+    # --- networx ---
+    "STDRATESHEETS": [
+        ("RATESHEETID", "INTEGER"), ("RATESHEETCODE", "TEXT"), ("RATESHEETNAME", "TEXT"),
+        ("SUBRATESHEETIND", "INTEGER"),
+    ],
+    "STDRATESHEETTERMS": [
+        ("RATESHEETTERMID", "INTEGER"), ("RATESHEETID", "INTEGER"), ("CALCBEAN", "TEXT"),
+        ("ACTIONPARM1", "TEXT"), ("BASEPERCENTOFCHGS", "REAL"), ("CODEGROUPID", "INTEGER"),
+        ("CODELOWVALUE", "TEXT"), ("CODEHIGHVALUE", "TEXT"), ("CODETYPEBEAN", "TEXT"),
+        ("DISPLAYSECTIONNUMBER", "INTEGER"), ("SEQNUMBER", "INTEGER"), ("DISABLED", "INTEGER"),
+        ("SUBRATESHEETID", "INTEGER"), ("BASERATE", "REAL"), ("BASERATE1", "REAL"),
+        ("BASERATE2", "REAL"), ("PERDIEM", "REAL"), ("USERFIELD1", "REAL"),
+        ("SECONDARYPERCENTOFCHGS", "REAL"), ("OTHERPERCENTOFCHGS", "REAL"),
+        ("OTHERPERCENTOFCHGS1", "REAL"), ("OUTLIER", "REAL"), ("OUTLIERPERCENTAGE", "REAL"),
+        ("FROMDATE", "DATETIME"), ("TODATE", "DATETIME"),
+    ],
+    "CODEGROUPS": [("CODEGROUPID", "INTEGER"), ("CODEGROUPNAME", "TEXT")],
+    "CODEGROUPVALUES": [
+        ("CODEGROUPID", "INTEGER"), ("SEQNUMBER", "INTEGER"), ("CODELOWVALUE", "TEXT"),
+        ("CODEHIGHVALUE", "TEXT"), ("CODETYPEBEAN", "TEXT"), ("NESTEDCODEGROUPID", "INTEGER"),
+        ("NOTLOGICIND", "INTEGER"), ("CODEVALUESEFFDATE", "DATETIME"), ("CODEVALUESTERMDATE", "DATETIME"),
+    ],
+    "AMBSURGGRPCODES": [
+        ("AMBSURGGRPCODE", "TEXT"), ("ASCGROUPNUMBER", "INTEGER"), ("SOURCETYPE", "TEXT"),
+        ("YEARAPPLIED", "INTEGER"),
+    ],
+    "NDCPRICING": [("NDCCODE", "TEXT"), ("UNITPRICE", "REAL")],
+    "DRGWEIGHTS": [
+        ("DRG", "TEXT"), ("RELATIVEWEIGHT", "REAL"), ("SOURCETYPE", "TEXT"), ("YEARAPPLIED", "INTEGER"),
+        ("EFFECTIVEDATE", "DATETIME"), ("TERMINATIONDATE", "DATETIME"),
+    ],
+    "RBRVSZIP": [
+        ("LOCALITYNUMBER", "TEXT"), ("CARRIERNUMBER", "TEXT"), ("BEGINZIP", "TEXT"), ("ENDZIP", "TEXT"),
+        ("EFFECTIVEDATE", "DATETIME"), ("TERMINATIONDATE", "DATETIME"),
+    ],
+    "SCHEDULES": [("SCHEDULECODE", "TEXT"), ("SCHEDULETYPE", "TEXT"), ("ZIPSOURCETYPE", "TEXT")],
+    "SCHEDULEVALUESWITHMODIFIERS": [
+        ("TABLENAME", "TEXT"), ("PROCEDURECODE", "TEXT"), ("MODIFIER", "TEXT"), ("ALLOWED", "REAL"),
+        ("PERCENTAGE", "REAL"), ("EFFECTIVEDATE", "DATETIME"), ("TERMINATIONDATE", "DATETIME"),
+    ],
+    "STATELOCALITYSCHEDULEVALUES": [
+        ("TABLENAME", "TEXT"), ("CARRIERNUMBER", "TEXT"), ("LOCALITYNUMBER", "TEXT"),
+        ("PROCEDURECODE", "TEXT"), ("MODIFIER", "TEXT"), ("ALLOWED", "REAL"), ("PERCENTAGE", "REAL"),
+        ("EFFECTIVEDATE", "DATETIME"), ("TERMINATIONDATE", "DATETIME"),
+    ],
+    # --- QNXT ---
+    "drgcode": [("codeid", "TEXT"), ("description", "TEXT")],
+    "revcode": [("codeid", "TEXT"), ("description", "TEXT")],
+    "proccode": [("pcode", "TEXT"), ("description", "TEXT")],
+    "svccode": [("codeid", "TEXT"), ("description", "TEXT")],
+    "hcfaposlocation": [("locationcode", "TEXT"), ("PAYMENTRATE", "TEXT"), ("description", "TEXT")],
+    "enrollkeys": [
+        ("enrollid", "TEXT"), ("memid", "TEXT"), ("programid", "TEXT"), ("planid", "TEXT"),
+        ("eligibleorgid", "TEXT"), ("rateid", "TEXT"), ("effdate", "DATETIME"), ("termdate", "DATETIME"),
+    ],
+    "ratesuffixdef": [("rateid", "TEXT"), ("ratecode", "TEXT"), ("effdate", "DATETIME"), ("termdate", "DATETIME")],
+    "eligibilityorg": [("eligibleorgid", "TEXT"), ("fedid", "TEXT")],
+    "member": [("memid", "TEXT"), ("ssn", "TEXT")],
+    "provider": [
+        ("provid", "TEXT"), ("npi", "TEXT"), ("ssn", "TEXT"), ("fedid", "TEXT"), ("provtype", "TEXT"),
+        ("fullname", "TEXT"), ("status", "TEXT"), ("entityid", "TEXT"),
+    ],
+    "entity": [("entid", "TEXT"), ("phyzip", "TEXT")],
+    "providerattribute": [("provid", "TEXT"), ("attributeid", "TEXT"), ("thevalue", "TEXT")],
+    "affiliation": [("affiliationid", "TEXT"), ("provid", "TEXT"), ("affiliateid", "TEXT")],
+    "contractinfo": [
+        ("contractid", "TEXT"), ("affiliationid", "TEXT"), ("networkid", "TEXT"), ("programid", "TEXT"),
+        ("contracted", "TEXT"), ("effdate", "DATETIME"), ("termdate", "DATETIME"),
+    ],
+    "ContractNxRateSheet": [("ContractId", "TEXT"), ("NxRateSheetId", "TEXT")],
+}
+
+INDEXES = [
+    "CREATE INDEX ix_stdratesheetterms_ratesheetid ON STDRATESHEETTERMS (RATESHEETID)",
+    "CREATE INDEX ix_stdratesheets_code ON STDRATESHEETS (RATESHEETCODE)",
+    "CREATE INDEX ix_schedulevalues_tablename ON SCHEDULEVALUESWITHMODIFIERS (TABLENAME)",
+    "CREATE INDEX ix_codegroupvalues_id ON CODEGROUPVALUES (CODEGROUPID, SEQNUMBER)",
+]
+
+EFFECTIVE_FROM = "2000-01-01 00:00:00"
+EFFECTIVE_TO = "2099-12-31 00:00:00"
+
+def create_schema(conn: sqlite3.Connection) -> None:
+    for table, columns in TABLES.items():
+        column_sql = ", ".join(f"{name} {sql_type}" for name, sql_type in columns)
+        conn.execute(f"DROP TABLE IF EXISTS {table}")
+        conn.execute(f"CREATE TABLE {table} ({column_sql})")
+    for index_sql in INDEXES:
+        conn.execute(index_sql)
+
+def insert_rows(conn: sqlite3.Connection, table: str, rows: Iterable[dict[str, Any]]) -> int:
+    columns = [name for name, _ in TABLES[table]]
+    placeholders = ", ".join("?" for _ in columns)
+    cursor = conn.executemany(
+        f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})",
+        ([row.get(column) for column in columns] for row in rows)
+    )
+    return cursor.rowcount
+
+# --- captured export ---
+def _normalize_datetime(value: str) -> str:
+    for fmt in (SQLITE_DATETIME_FORMAT, "%Y-%m-%d %H:%M:%S.%f", "%Y-%m-%d", "%m/%d/%Y", "%m/%d/%Y %H:%M:%S"):
+        try:
+            return datetime.strptime(value, fmt).strftime(SQLITE_DATETIME_FORMAT)
+        except ValueError:
+            continue
+    raise ValueError(f"Unrecognized date: {value}")
+
+def _convert_csv_value(value: str, sql_type: str) -> Any:
+    if value == "":
+        return None
+    if sql_type == "INTEGER":
+        return int(float(value))
+    if sql_type == "REAL":
+        return float(value)
+    if sql_type == "DATETIME":
+        return _normalize_datetime(value)
+    return value
+
+def load_tables_from_csv(conn: sqlite3.Connection, csv_dir: str) -> dict[str, int]:
+    """
+    Loads <TABLE>.csv for every table that has one (file names match
+    case-insensitively). Columns missing from a file are left NULL.
+    """
+    files = {name.lower(): name for name in os.listdir(csv_dir) if name.lower().endswith(".csv")}
+    loaded = {}
+    for table, columns in TABLES.items():
+        file_name = files.get(f"{table.lower()}.csv")
+        if not file_name:
+            continue
+        types = {name.lower(): (name, sql_type) for name, sql_type in columns}
+        with open(os.path.join(csv_dir, file_name), newline="", encoding="utf-8") as csv_file:
+            reader = csv.DictReader(csv_file)
+            rows = []
+            for record in reader:
+                row = {}
+                for header, value in record.items():
+                    name, sql_type = types.get(header.strip().lower(), (None, None))
+                    if name:
+                        row[name] = _convert_csv_value(value, sql_type)
+                rows.append(row)
+        loaded[table] = insert_rows(conn, table, rows)
+    return loaded
+
+# --- synthetic data ---
+def build_synthetic_data(
+    conn: sqlite3.Connection,
+    program_list: list[str],
+    rate_sheets: int = 40,
+    providers: int = 400,
+    seed: int = 11
+) -> dict[str, int]:
+    """
+    Deterministic data set that exercises the main calculation paths:
+    fee schedules (standard and locality), percent of charges, per diem,
+    case rates, DRG weighting, nested/NOT code groups, provider qualifiers
+    and sub rate sheets.
+    """
+    rng = random.Random(seed)
+    tables: dict[str, list[dict[str, Any]]] = {table: [] for table in TABLES}
+    dates = {"EFFECTIVEDATE": EFFECTIVE_FROM, "TERMINATIONDATE": EFFECTIVE_TO}
+
+    # billing codes
+    cpt_codes = [str(code) for code in range(10000, 10600)] + [str(code) for code in range(99201, 99216)]
+    hcpcs_codes = [f"J{code}" for code in range(1000, 1100)]
+    rev_codes = [str(code).zfill(4) for code in range(100, 300)]
+    drg_codes = [str(code).zfill(3) for code in range(1, 120)]
+    tables["proccode"] = [{"pcode": code, "description": f"PROC {code}"} for code in cpt_codes + hcpcs_codes]
+    tables["svccode"] = [{"codeid": code, "description": f"SVC {code}"} for code in cpt_codes[:50]]
+    tables["revcode"] = [{"codeid": code, "description": f"REV {code}"} for code in rev_codes]
+    tables["drgcode"] = [{"codeid": code, "description": f"DRG {code}"} for code in drg_codes]
+    tables["hcfaposlocation"] = [
+        {"locationcode": "11", "PAYMENTRATE": "NF", "description": "OFFICE"},
+        {"locationcode": "21", "PAYMENTRATE": "F", "description": "INPATIENT HOSPITAL"},
+        {"locationcode": "22", "PAYMENTRATE": "F", "description": "OUTPATIENT HOSPITAL"},
+        {"locationcode": "23", "PAYMENTRATE": "F", "description": "EMERGENCY ROOM"},
+    ]
+    tables["DRGWEIGHTS"] = [
+        {"DRG": code, "RELATIVEWEIGHT": round(rng.uniform(0.4, 6.0), 4), "SOURCETYPE": "MS", "YEARAPPLIED": 2025, **dates}
+        for code in drg_codes
+    ]
+    tables["AMBSURGGRPCODES"] = [
+        {"AMBSURGGRPCODE": code, "ASCGROUPNUMBER": rng.randint(1, 9), "SOURCETYPE": "ASC", "YEARAPPLIED": 2025}
+        for code in cpt_codes[:200]
+    ]
+    tables["NDCPRICING"] = [
+        {"NDCCODE": str(rng.randint(10 ** 10, 10 ** 11 - 1)), "UNITPRICE": round(rng.uniform(0.5, 400), 2)}
+        for _ in range(200)
+    ]
+
+    # locality zip ranges - two carriers, a handful of localities each
+    localities = []
+    zip_start = 32000
+    for carrier in ("09102", "09202"):
+        for locality in ("01", "02", "03"):
+            begin_zip, end_zip = zip_start, zip_start + 399
+            tables["RBRVSZIP"].append({
+                "LOCALITYNUMBER": locality, "CARRIERNUMBER": carrier,
+                "BEGINZIP": str(begin_zip), "ENDZIP": str(end_zip), **dates
+            })
+            localities.append((carrier, locality, begin_zip, end_zip))
+            zip_start += 400
+
+    # fee schedules
+    standard_schedules = ["AVFSPHYS", "AVFSFAC", "AVFSDME"]
+    locality_schedule = "AVFSLOCAL"
+    for schedule_name in standard_schedules + [locality_schedule]:
+        tables["SCHEDULES"].append({"SCHEDULECODE": schedule_name, "SCHEDULETYPE": "S", "ZIPSOURCETYPE": ""})
+    for schedule_name in standard_schedules:
+        for code in rng.sample(cpt_codes + hcpcs_codes, 300):
+            for modifier in ("", "26", "TC") if rng.random() < 0.3 else ("",):
+                tables["SCHEDULEVALUESWITHMODIFIERS"].append({
+                    "TABLENAME": schedule_name, "PROCEDURECODE": code, "MODIFIER": modifier,
+                    "ALLOWED": round(rng.uniform(10, 900), 2), "PERCENTAGE": 0, **dates
+                })
+    # the locality schedule only needs a placeholder row to be picked up by the schedule preload
+    tables["SCHEDULEVALUESWITHMODIFIERS"].append({
+        "TABLENAME": locality_schedule, "PROCEDURECODE": cpt_codes[0], "MODIFIER": "",
+        "ALLOWED": 50.0, "PERCENTAGE": 0, **dates
+    })
+    locality_codes = rng.sample(cpt_codes, 150)
+    for carrier, locality, _, _ in localities:
+        for code in locality_codes:
+            tables["STATELOCALITYSCHEDULEVALUES"].append({
+                "TABLENAME": locality_schedule, "CARRIERNUMBER": carrier, "LOCALITYNUMBER": locality,
+                "PROCEDURECODE": code, "MODIFIER": "", "ALLOWED": round(rng.uniform(10, 900), 2),
+                "PERCENTAGE": 0, **dates
+            })
+
+    # code groups
+    taxonomies = ["207Q00000X", "208D00000X", "282N00000X", "261QM1300X"]
+    code_groups = {
+        1: ("CPT SURGERY", [(cpt_codes[0], cpt_codes[299], "CodeTypeCPT4Procedure", None, 0)]),
+        2: ("REVENUE ROOM AND BOARD", [("0100", "0199", "CodeTypeRevenue", None, 0)]),
+        3: ("CPT EXCLUDING E&M", [
+            (None, None, None, 1, 0),
+            ("99201", "99215", "CodeTypeCPT4Procedure", None, 1),
+        ]),
+        4: ("PROFESSIONAL COMPONENT", [("26", "26", "CodeTypeCPTMod", None, 0)]),
+        5: ("HCPCS DRUGS BY TAXONOMY", [
+            ("J1000", "J1000", "CodeTypeHCPC", None, 0),
+            ("J1050", "J1050", "CodeTypeHCPC", None, 0),
+            (taxonomies[0], taxonomies[0], "CodeTypeProviderTaxonomyCode", None, 0),
+        ]),
+        6: ("OUTPATIENT POS", [
+            ("22", "22", "CodeTypePlaceOfService", None, 0),
+            (cpt_codes[300], cpt_codes[399], "CodeTypeCPT4Procedure", None, 0),
+        ]),
+    }
+    for group_id, (group_name, values) in code_groups.items():
+        tables["CODEGROUPS"].append({"CODEGROUPID": group_id, "CODEGROUPNAME": group_name})
+        for seq, (low, high, code_type, nested_id, not_ind) in enumerate(values, start=1):
+            tables["CODEGROUPVALUES"].append({
+                "CODEGROUPID": group_id, "SEQNUMBER": seq, "CODELOWVALUE": low, "CODEHIGHVALUE": high,
+                "CODETYPEBEAN": code_type, "NESTEDCODEGROUPID": nested_id, "NOTLOGICIND": not_ind,
+                "CODEVALUESEFFDATE": EFFECTIVE_FROM, "CODEVALUESTERMDATE": EFFECTIVE_TO
+            })
+
+    # rate sheets - each picks a subset of these term templates
+    sub_rate_sheet_id = 90001
+    term_templates = [
+        {"DISPLAYSECTIONNUMBER": 10, "CALCBEAN": "CalcNtwxStdFeeSched", "ACTIONPARM1": "AVFSPHYS", "CODEGROUPID": 1},
+        {"DISPLAYSECTIONNUMBER": 10, "CALCBEAN": "CalcPercentOfNtwxStdFeeSched", "ACTIONPARM1": "AVFSDME", "BASEPERCENTOFCHGS": 1.1},
+        {"DISPLAYSECTIONNUMBER": 10, "CALCBEAN": "CalcNtwxStdFeeSched", "ACTIONPARM1": locality_schedule, "CODEGROUPID": 1},
+        {"DISPLAYSECTIONNUMBER": 10, "CALCBEAN": "CalcPercentOfCharges", "BASEPERCENTOFCHGS": 0.45, "CODEGROUPID": 6},
+        {"DISPLAYSECTIONNUMBER": 10, "CALCBEAN": "CalcPercentOfCharges", "BASEPERCENTOFCHGS": 0.6, "CODEGROUPID": 5},
+        {"DISPLAYSECTIONNUMBER": 10, "CALCBEAN": "CalcCaseRate", "BASERATE": 250.0, "CODEGROUPID": 4},
+        {"DISPLAYSECTIONNUMBER": 10, "CALCBEAN": None, "SUBRATESHEETID": sub_rate_sheet_id},
+        {"DISPLAYSECTIONNUMBER": 7, "CALCBEAN": "CalcPercentOfCharges", "BASEPERCENTOFCHGS": 0.35, "CODEGROUPID": 3},
+        {"DISPLAYSECTIONNUMBER": 4, "CALCBEAN": "CalcPerDiem", "PERDIEM": 1800.0, "CODEGROUPID": 2},
+        {"DISPLAYSECTIONNUMBER": 3, "CALCBEAN": "CalcDRGWeighting", "BASERATE": 6500.0},
+        {"DISPLAYSECTIONNUMBER": 3, "CALCBEAN": "CalcCaseRate", "BASERATE": 12000.0,
+         "CODELOWVALUE": drg_codes[0], "CODEHIGHVALUE": drg_codes[20], "CODETYPEBEAN": "CodeTypeDRG"},
+    ]
+    sub_terms = [
+        {"DISPLAYSECTIONNUMBER": 0, "CALCBEAN": "CalcNtwxStdFeeSched", "ACTIONPARM1": "AVFSFAC", "CODEGROUPID": 1},
+        {"DISPLAYSECTIONNUMBER": 0, "CALCBEAN": "CalcPercentOfCharges", "BASEPERCENTOFCHGS": 0.5,
+         "CODELOWVALUE": cpt_codes[400], "CODEHIGHVALUE": cpt_codes[450], "CODETYPEBEAN": "CodeTypeCPT4Procedure"},
+    ]
+
+    term_id = 1
+    def add_term(rate_sheet_id: int, seq: int, template: dict[str, Any], scale: float) -> None:
+        nonlocal term_id
+        term = {
+            "RATESHEETTERMID": term_id, "RATESHEETID": rate_sheet_id, "SEQNUMBER": seq, "DISABLED": 0,
+            "FROMDATE": EFFECTIVE_FROM, "TODATE": EFFECTIVE_TO,
+        }
+        for column in ("BASEPERCENTOFCHGS", "BASERATE", "BASERATE1", "BASERATE2", "PERDIEM", "USERFIELD1",
+                       "SECONDARYPERCENTOFCHGS", "OTHERPERCENTOFCHGS", "OTHERPERCENTOFCHGS1", "OUTLIER",
+                       "OUTLIERPERCENTAGE"):
+            term[column] = 0
+        term.update(template)
+        for column in ("BASEPERCENTOFCHGS", "BASERATE", "PERDIEM"):
+            term[column] = round(term[column] * scale, 4)
+        tables["STDRATESHEETTERMS"].append(term)
+        term_id += 1
+
+    # sub rate sheet code starts with Z so it is never picked up as a top-level sheet
+    tables["STDRATESHEETS"].append({
+        "RATESHEETID": sub_rate_sheet_id, "RATESHEETCODE": f"ZSUB{sub_rate_sheet_id}",
+        "RATESHEETNAME": "SUB RATE SHEET", "SUBRATESHEETIND": 1
+    })
+    for seq, template in enumerate(sub_terms, start=1):
+        add_term(sub_rate_sheet_id, seq, template, 1.0)
+
+    rate_sheet_codes = []
+    for rate_sheet_id in range(1, rate_sheets + 1):
+        code = f"AVCRPRF{rate_sheet_id:05d}"
+        rate_sheet_codes.append(code)
+        tables["STDRATESHEETS"].append({
+            "RATESHEETID": rate_sheet_id, "RATESHEETCODE": code,
+            "RATESHEETNAME": f"SYNTHETIC {rate_sheet_id}", "SUBRATESHEETIND": 0
+        })
+        scale = round(rng.uniform(0.8, 1.3), 3)
+        templates = [template for template in term_templates if rng.random() < 0.7] or term_templates[:1]
+        for seq, template in enumerate(templates, start=1):
+            add_term(rate_sheet_id, seq, template, scale)
+
+    # providers and contracts
+    for provider_number in range(1, providers + 1):
+        provid = f"PRV{provider_number:08d}"
+        entity_id = f"ENT{provider_number:08d}"
+        _, _, begin_zip, end_zip = rng.choice(localities)
+        zip_code = str(rng.randint(begin_zip, end_zip)) if rng.random() < 0.8 else "99999"
+        tables["provider"].append({
+            "provid": provid, "npi": str(1000000000 + provider_number), "ssn": "",
+            "fedid": f"{590000000 + provider_number}", "provtype": rng.choice(["001", "002", "040"]),
+            "fullname": f"SYNTHETIC PROVIDER {provider_number}", "status": "Active", "entityid": entity_id
+        })
+        tables["entity"].append({"entid": entity_id, "phyzip": zip_code})
+        tables["providerattribute"].append({
+            "provid": provid, "attributeid": TAXONOMY_ATTRIBUTE_ID, "thevalue": rng.choice(taxonomies)
+        })
+        affiliation_id = f"AFF{provider_number:08d}"
+        tables["affiliation"].append({"affiliationid": affiliation_id, "provid": provid, "affiliateid": provid})
+        for contract_number in range(rng.randint(1, 2)):
+            contract_id = f"CTR{provider_number:08d}{contract_number}"
+            tables["contractinfo"].append({
+                "contractid": contract_id, "affiliationid": affiliation_id, "networkid": "NET001",
+                "programid": rng.choice(program_list), "contracted": "Y",
+                "effdate": EFFECTIVE_FROM, "termdate": EFFECTIVE_TO
+            })
+            tables["ContractNxRateSheet"].append({
+                "ContractId": contract_id, "NxRateSheetId": rng.choice(rate_sheet_codes)
+            })
+
+    # plans and members
+    for plan_number, program_id in enumerate(program_list, start=1):
+        rate_id = f"RATE{plan_number:04d}"
+        org_id = f"ORG{plan_number:04d}" if plan_number % 2 else ""
+        tables["ratesuffixdef"].append({
+            "rateid": rate_id, "ratecode": f"12345FL{plan_number:07d}" if plan_number % 3 else "",
+            "effdate": EFFECTIVE_FROM, "termdate": EFFECTIVE_TO
+        })
+        if org_id:
+            tables["eligibilityorg"].append({"eligibleorgid": org_id, "fedid": f"{650000000 + plan_number}"})
+        for member_number in range(3):
+            memid = f"MEM{plan_number:04d}{member_number}"
+            tables["member"].append({"memid": memid, "ssn": f"{100000000 + plan_number * 10 + member_number}"})
+            tables["enrollkeys"].append({
+                "enrollid": f"ENR{plan_number:04d}{member_number}", "memid": memid, "programid": program_id,
+                "planid": f"PLAN{plan_number:04d}", "eligibleorgid": org_id, "rateid": rate_id,
+                "effdate": EFFECTIVE_FROM, "termdate": EFFECTIVE_TO
+            })
+
+    return {table: insert_rows(conn, table, rows) for table, rows in tables.items()}
+
+def write_synthetic_modifier_map(file_path: str, seed: int = 11) -> None:
+    # same pipe-delimited layout load_modifier_map reads
+    rng = random.Random(seed)
+    os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+    with open(file_path, "w", encoding="utf-8") as modifier_file:
+        modifier_file.write("PROCEDURE_CODE|MODIFIER_CODE|EXPIRATION_DATE\n")
+        for code in sorted(rng.sample(range(10000, 10600), 120)):
+            modifier_file.write(f"{code}|26|\n")
+            modifier_file.write(f"{code}|TC|12/31/2099\n")
+
+def build_offline_database(
+    db_path: str,
+    program_list: list[str],
+    csv_dir: str = None,
+    rate_sheets: int = 40,
+    providers: int = 400,
+    seed: int = 11
+) -> dict[str, int]:
+    os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+    conn = open_sqlite_connection(db_path)
+    try:
+        create_schema(conn)
+        if csv_dir:
+            counts = load_tables_from_csv(conn, csv_dir)
+        else:
+            counts = build_synthetic_data(conn, program_list, rate_sheets, providers, seed)
+        conn.commit()
+        conn.execute("ANALYZE")
+    finally:
+        conn.close()
+    return counts
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the SQLite stand-in database for offline runs.")
+    parser.add_argument("db_path")
+    parser.add_argument("--from-csv", dest="csv_dir", help="directory of captured <TABLE>.csv exports")
+    parser.add_argument("--config", default="./config/config.offline.json", help="config to take the program list from")
+    parser.add_argument("--rate-sheets", type=int, default=40)
+    parser.add_argument("--providers", type=int, default=400)
+    parser.add_argument("--seed", type=int, default=11)
+    parser.add_argument("--modifier-map", help="write the synthetic procedure_modifier_map.txt here instead of the config's reference_dir")
+    args = parser.parse_args()
+
+    import utilities
+    config = utilities.load_config(args.config)
+    counts = build_offline_database(
+        args.db_path, config["programs"], args.csv_dir, args.rate_sheets, args.providers, args.seed
+    )
+    modifier_path = args.modifier_map or os.path.join(
+        config["app_base_directory"], config["directory_structure"]["reference_dir"], "procedure_modifier_map.txt"
+    )
+    write_synthetic_modifier_map(modifier_path, args.seed)
+    for table, count in counts.items():
+        print(f"{table:<30} {count:>10,}")
@@ -1,13 +1,20 @@
+import copy
 import multiprocessing
 import os
 import uuid
 from typing import Any, Iterator
 from collections import defaultdict
+from code_interning import use_code_table
 from context_factory import build_context
 from shared_config import SharedConfig
-from database_connection import DatabaseConnection
+from database_connection import create_database_connection
+from drg_weight_table import get_drg_weight_table
+from fee_schedule_provider import get_fee_schedule_provider
+from service_combination_memo import get_service_combination_memo
 from buffered_rate_file_writer import BufferedRateFileWriter
+from mmap_reference_store import open_reference_store, write_reference_store
 from pathlib import Path
+from ratesheet_loader import load_ratesheets_by_codes
 from ratesheet_logic import fetch_ratesheets, group_rows_by_ratesheet_id
 from ratesheet_batch_tracker import RateSheetBatchTracker
 from rate_group_key_factory import RateGroupKeyFactory, merge_rate_group_key_factories
@@ -18,8 +25,8 @@ def parallel_process_ratesheets(shared_config: SharedConfig, mode: str = "full")
     os.makedirs(shared_config.directory_structure["temp_output_dir"], exist_ok=True)
     os.makedirs(os.path.join(shared_config.directory_structure["temp_output_dir"], "negotiated"), exist_ok=True)
 
-    networx_conn = DatabaseConnection(shared_config.networx_connection_string)
-    qnxt_conn = DatabaseConnection(shared_config.qnxt_connection_string)
+    networx_conn = create_database_connection(shared_config.networx_connection_string)
+    qnxt_conn = create_database_connection(shared_config.qnxt_connection_string)
 
     context = build_context(shared_config, networx_conn, qnxt_conn)
     context.rate_group_key_factory = RateGroupKeyFactory()
@@ -66,15 +73,28 @@ def parallel_process_ratesheets(shared_config: SharedConfig, mode: str = "full")
     # LIMIT = 100  # Optional for testing
     # grouped_values = list(grouped_ratesheets.values())[:LIMIT]
 
+    # Pull every selected rate sheet's terms in a few set-based queries
+    # each batch carries its own pre-partitioned terms to the worker
+    prefetched_ratesheets = load_ratesheets_by_codes(
+        context,
+        [rows[0]["RATESHEETCODE"] for rows in grouped_values]
+    )
+    # sub rate sheets were loaded alongside and ride along on shared_config
+    print(f"Sub rate sheet store: {shared_config.subratesheet_store.statistics()}")
+
     # Chunk for parallel processing
     batches = chunk_ratesheet_groups(grouped_values, batch_size=15)
 
+    # shared_config goes to each pool process once through the initializer -
+    # a task carries only its rate sheet rows and their prefetched terms
     args_list = [
         (
             batch,
-            shared_config,
-            shared_config.networx_connection_string,
-            shared_config.qnxt_connection_string,
+            {
+                rows[0]["RATESHEETCODE"]: prefetched_ratesheets[rows[0]["RATESHEETCODE"]]
+                for rows in batch
+                if rows[0].get("RATESHEETCODE")
+            },
             tracker_path
         )
         for batch in batches
@@ -83,8 +103,28 @@ def parallel_process_ratesheets(shared_config: SharedConfig, mode: str = "full")
     ctx = multiprocessing.get_context("spawn")
     num_processes = min(8, os.cpu_count() or 1)
     
-    with ctx.Pool(processes=num_processes) as pool:
-        results = pool.starmap(process_ratesheet_batch_safe, args_list)
+    # the parent only needed its connections for fetch_ratesheets
+    networx_conn.disconnect()
+    qnxt_conn.disconnect()
+
+    # workers map the big reference tables from one shared file
+    # instead of each unpickling a private copy of the dicts
+    worker_shared_config = shared_config
+    if getattr(shared_config, "use_mmap_reference_store", False):
+        store_path = write_reference_store(
+            os.path.join(shared_config.directory_structure["temp_output_dir"], "reference_store.bin"),
+            shared_config
+        )
+        worker_shared_config = copy.copy(shared_config)
+        open_reference_store(store_path).apply_to(worker_shared_config)
+        print(f"Reference store: {store_path} ({os.path.getsize(store_path) / 1_048_576:.1f} MB)")
+
+    with ctx.Pool(
+        processes=num_processes,
+        initializer=init_ratesheet_worker,
+        initargs=(worker_shared_config,)
+    ) as pool:
+        results = pool.starmap(process_ratesheet_batch, args_list)
 
     rate_group_key_factories = []
     optum_apc_ratesheet_ids = set()
@@ -95,9 +135,30 @@ def parallel_process_ratesheets(shared_config: SharedConfig, mode: str = "full")
     merged_keys = merge_rate_group_key_factories(rate_group_key_factories)
     return merged_keys, optum_apc_ratesheet_ids
 
-def process_ratesheet_batch_safe(ratesheet_batch, shared_config, networx_conn_str, qnxt_conn_str, tracker_path):
+# reference data this pool process received from init_ratesheet_worker
+_worker_shared_config: SharedConfig | None = None
+
+def init_ratesheet_worker(shared_config: SharedConfig) -> None:
+    global _worker_shared_config
+    _worker_shared_config = shared_config
+    # arrived in the same pickle as the reference data - keep interning into it
+    if getattr(shared_config, "code_table", None) is not None:
+        use_code_table(shared_config.code_table)
+
+def process_ratesheet_batch(ratesheet_batch, prefetched_ratesheets, tracker_path):
+    shared_config = _worker_shared_config
+    return process_ratesheet_batch_safe(
+        ratesheet_batch,
+        prefetched_ratesheets,
+        shared_config,
+        shared_config.networx_connection_string,
+        shared_config.qnxt_connection_string,
+        tracker_path
+    )
+
+def process_ratesheet_batch_safe(ratesheet_batch, prefetched_ratesheets, shared_config, networx_conn_str, qnxt_conn_str, tracker_path):
     from ratesheet_worker import process_ratesheet_worker
-    from database_connection import DatabaseConnection
+    from database_connection import create_database_connection
     from ratesheet_batch_tracker import RateSheetBatchTracker
     from context_factory import build_context
     from file_writer import open_writer
@@ -105,8 +166,10 @@ def process_ratesheet_batch_safe(ratesheet_batch, shared_config, networx_conn_st
     # Tracker for marking rate sheet status
     tracker = RateSheetBatchTracker(tracker_path)
     
-    networx_conn = DatabaseConnection(networx_conn_str)
-    qnxt_conn = DatabaseConnection(qnxt_conn_str)
+    # pool processes live across batches - these check out a pooled
+    # connection and hand it back in the finally block below
+    networx_conn = create_database_connection(networx_conn_str)
+    qnxt_conn = create_database_connection(qnxt_conn_str)
 
     batch_uid = str(uuid.uuid4())[:8]
     batch_output_dir = os.path.join(shared_config.directory_structure["temp_output_dir"], f"batch_{batch_uid}")
@@ -126,6 +189,10 @@ def process_ratesheet_batch_safe(ratesheet_batch, shared_config, networx_conn_st
     metadata_output_dir = os.path.join(batch_output_dir, "metadata")
     os.makedirs(metadata_output_dir, exist_ok=True)
 
+    # the store outlives the batch in an initialized worker - report this batch's misses only
+    subratesheet_store = getattr(shared_config, "subratesheet_store", None)
+    misses_before = subratesheet_store.misses if subratesheet_store is not None else 0
+
     context = build_context(shared_config, networx_conn, qnxt_conn)
     context.provider_identifier_output_file = provider_identifier_output_file
     context.prov_grp_contract_output_file = prov_grp_contract_output_file
@@ -139,7 +206,8 @@ def process_ratesheet_batch_safe(ratesheet_batch, shared_config, networx_conn_st
             networx_conn,
             qnxt_conn,
             tracker,
-            rate_file_writer
+            rate_file_writer,
+            prefetched_ratesheets
         )
         return rate_group_key_factory, optum_apc_ratesheet_ids
     
@@ -149,6 +217,13 @@ def process_ratesheet_batch_safe(ratesheet_batch, shared_config, networx_conn_st
         rate_file_writer.close_all_files()
         provider_identifier_output_file.close()
         prov_grp_contract_output_file.close()
+        networx_conn.disconnect()
+        qnxt_conn.disconnect()
+        if subratesheet_store is not None and subratesheet_store.misses > misses_before:
+            print(f"⚠️ Batch {batch_uid} went back to the database for sub rate sheets: {subratesheet_store.misses - misses_before} misses")
+        print(f"Batch {batch_uid} fee schedule cache: {get_fee_schedule_provider(shared_config).statistics()}")
+        print(f"Batch {batch_uid} service combination memo: {get_service_combination_memo(context).statistics()}")
+        print(f"Batch {batch_uid} DRG weight table: {get_drg_weight_table(shared_config).statistics()}")
 
 
 def chunk_ratesheet_groups(grouped_ratesheet_values: list[list[dict]], batch_size: int) -> Iterator[list[list[dict]]]:
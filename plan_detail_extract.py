@@ -1,3 +1,4 @@
+from collections import defaultdict
 from constants import FIELD_DELIM
 from typing import Any
 from utilities import build_in_clause_from_list
@@ -12,7 +13,7 @@ class PlanDetailExtract:
         self.insurer_code = params["insurer_code"]
         self.reporting_entity = params["reporting_entity"]
         self.reporting_entity_type = params["reporting_entity_type"]
-        self.plans_processed = []
+        self.plans_processed: set[str] = set()
         self.records_processed = 0
 
     def extract_data(self) -> None:
@@ -22,14 +23,14 @@ class PlanDetailExtract:
         #WHERE status = 'Active'
         #AND programid in 
         #"""
-        query: str = """
-        SELECT * FROM ENROLLKEYS
-        WHERE GETDATE() BETWEEN effdate and termdate and 
-        programid in 
-        """
-        
-        query = query + build_in_clause_from_list(self.program_list).strip()
+        query: str = self.enroll_keys_query("*")
         enroll_keys: list[dict[str,Any]] = self.conn.execute_query_with_columns(query)
+
+        # rate suffixes and eligibility orgs for every enrollment come back in
+        # one query each and are joined in memory, not queried per plan
+        rate_codes_by_rate_id = self.load_rate_codes()
+        fed_ids_by_org_id = self.load_fed_ids()
+
         for enroll_key in enroll_keys:
             program_id: str = enroll_key["programid"].strip()
             plan_id: str = enroll_key["planid"].strip()
@@ -37,36 +38,28 @@ class PlanDetailExtract:
             if xref_id in self.plans_processed:
                 continue
             
-            self.plans_processed.append(xref_id)
+            self.plans_processed.add(xref_id)
             plan_id_type: str = ''
             eligible_org_id: str = enroll_key["eligibleorgid"]   # Group Id
             plan_market_type: str = "group" if eligible_org_id else "individual"
             rate_id: str = enroll_key["rateid"].strip()
-            query: str = f"""
-            SELECT ratecode FROM ratesuffixdef WHERE rateid = '{rate_id}' 
-            AND GETDATE() BETWEEN effdate AND termdate 
-            """.strip()
 
             plan_id: str = ""
             hios_id: str = ""
-            rate_suffix_defs: list[dict[str,Any]] = self.conn.execute_query_with_columns(query)
-            for rate_suffix_def in rate_suffix_defs:
-                hios_id: str = rate_suffix_def["ratecode"].strip()
+            for rate_code in rate_codes_by_rate_id.get(self.match_key(rate_id), []):
+                hios_id: str = rate_code.strip()
                 if hios_id:
                     break
 
-            query = f"""
-            SELECT fedid FROM eligibilityorg WHERE eligibleorgid = '{eligible_org_id}'
-            """
-            eligibility_orgs: list[dict[str,Any]] = self.conn.execute_query_with_columns(query)
             fed_id: str = ""
-            for eligibility_org in eligibility_orgs:
-                fed_id = eligibility_org["fedid"].strip()
-                if fed_id in members_ssn_set:
-                    continue
-                
-                if fed_id:
-                    break
+            if eligible_org_id is not None:
+                for fed_id in fed_ids_by_org_id.get(self.match_key(eligible_org_id), []):
+                    fed_id = fed_id.strip()
+                    if fed_id in members_ssn_set:
+                        continue
+                    
+                    if fed_id:
+                        break
 
             if not hios_id and not fed_id:
                 continue
@@ -100,6 +93,40 @@ class PlanDetailExtract:
             self.output_file.write(plan_det)
             self.records_processed += 1
 
+    def enroll_keys_query(self, columns: str) -> str:
+        query: str = f"""
+        SELECT {columns} FROM ENROLLKEYS
+        WHERE GETDATE() BETWEEN effdate and termdate and 
+        programid in 
+        """
+        return query + build_in_clause_from_list(self.program_list).strip()
+
+    @staticmethod
+    def match_key(value: str) -> str:
+        # SQL Server's = ignores trailing spaces and case
+        return value.rstrip().upper()
+
+    def load_rate_codes(self) -> dict[str, list[str]]:
+        query: str = f"""
+        SELECT rateid, ratecode FROM ratesuffixdef
+        WHERE GETDATE() BETWEEN effdate AND termdate
+        AND rateid IN ({self.enroll_keys_query("rateid")})
+        """
+        rate_codes_by_rate_id: dict[str, list[str]] = defaultdict(list)
+        for row in self.conn.execute_query_with_columns(query):
+            rate_codes_by_rate_id[self.match_key(row["rateid"])].append(row["ratecode"])
+        return rate_codes_by_rate_id
+
+    def load_fed_ids(self) -> dict[str, list[str]]:
+        query: str = f"""
+        SELECT eligibleorgid, fedid FROM eligibilityorg
+        WHERE eligibleorgid IN ({self.enroll_keys_query("eligibleorgid")})
+        """
+        fed_ids_by_org_id: dict[str, list[str]] = defaultdict(list)
+        for row in self.conn.execute_query_with_columns(query):
+            fed_ids_by_org_id[self.match_key(row["eligibleorgid"])].append(row["fedid"])
+        return fed_ids_by_org_id
+
     def build_mem_ssn_xref(self) -> set:
         query = """
         select distinct ssn from member 
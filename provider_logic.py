@@ -1,4 +1,4 @@
-from typing import Any
+from typing import Any, Iterator
 from constants import TAXONOMY_ATTRIBUTE_ID
 from context import Context
 from collections import defaultdict
@@ -109,7 +109,7 @@ def build_provider_bundle_from_rows(provider_rows: list[dict[str, Any]]) -> Prov
 
     return provider_bundle
 
-def fetch_providers(context) -> list[dict[str, Any]]:
+def fetch_providers(context) -> Iterator[dict[str, Any]]:
 
     # use this for facility to run standalone:
     # SUBSTRING(NxRateSheetId, 5, 3) IN ({facility_clause}) and
@@ -159,5 +159,5 @@ def fetch_providers(context) -> list[dict[str, Any]]:
         PA.attributeid = '{TAXONOMY_ATTRIBUTE_ID}' AND
         ctr.programid IN {build_in_clause_from_list(context.program_list)}
     """
-    return context.qnxt_conn.execute_query_with_columns(query)
+    return context.qnxt_conn.stream_query_with_columns(query)
 
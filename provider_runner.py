@@ -2,7 +2,7 @@
 from shared_config import SharedConfig
 from collections import defaultdict
 from context_factory import build_context
-from database_connection import DatabaseConnection
+from database_connection import create_database_connection
 from ratesheet_batch_tracker import RateSheetBatchTracker
 from file_writer import open_writer
 from provider_logic import build_provider_bundle_from_rows, process_single_provider, fetch_providers
@@ -12,8 +12,8 @@ def run_all_providers(shared_config: SharedConfig, rate_group_key_factory: RateG
     tracker_path = shared_config.directory_structure["status_tracker_dir"] + "/provider_status.json"
     tracker = RateSheetBatchTracker(tracker_path)
 
-    networx_conn = DatabaseConnection(shared_config.networx_connection_string)
-    qnxt_conn = DatabaseConnection(shared_config.qnxt_connection_string)
+    networx_conn = create_database_connection(shared_config.networx_connection_string)
+    qnxt_conn = create_database_connection(shared_config.qnxt_connection_string)
 
     context = build_context(shared_config, networx_conn, qnxt_conn)
     context.rate_group_key_factory = rate_group_key_factory
@@ -47,4 +47,7 @@ def run_all_providers(shared_config: SharedConfig, rate_group_key_factory: RateG
     provider_identifier_output_file.close()
 
     prov_grp_contract_output_file.flush()
-    prov_grp_contract_output_file.close()
\ No newline at end of file
+    prov_grp_contract_output_file.close()
+
+    networx_conn.disconnect()
+    qnxt_conn.disconnect()
\ No newline at end of file
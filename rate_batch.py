@@ -0,0 +1,106 @@
+"""
+rate_batch.py
+
+The rates one term emits, as columns. Most calculations give every service
+combination of a term the same fee, fee type, rate key, billing class,
+expiration date and section - only the billing code, modifier, POS and code
+type change from rate to rate. A RateBatch holds those constant fields once
+and the changing ones as four parallel lists, and store_rate_batch stores
+the whole batch in one call instead of one store_rate_record per rate. A
+batch built with rate=None keeps the rate as a fifth column, for the calcs
+whose fee is worked out per code (DRG weighting). set_columns takes columns
+that are already built, such as DrgWeightTable's cached ones, without
+copying them.
+
+add_services fills the columns straight from the ServiceCombinations
+blocks: validity is checked once per service, the POS default once per POS
+value, and the columns are built by repeating the block's lists rather than
+by walking the product.
+"""
+
+from itertools import product
+
+class RateBatch:
+    def __init__(
+        self,
+        insurer_code,
+        prov_grp_contract_key: str,
+        negotiated_type: str,
+        rate: str | None,
+        billing_class: str,
+        expiration_date: str,
+        full_term_section_id: str,
+        calc_bean: str
+    ):
+        self.insurer_code = insurer_code
+        self.prov_grp_contract_key = prov_grp_contract_key
+        self.negotiated_type = negotiated_type
+        self.rate = rate
+        self.billing_class = billing_class
+        self.expiration_date = expiration_date
+        self.full_term_section_id = full_term_section_id
+        self.calc_bean = calc_bean
+
+        self.proc_codes: list[str] = []
+        self.modifiers: list[str] = []
+        self.pos_values: list[str] = []
+        self.code_types: list[str] = []
+        self.rates: list[str] | None = [] if rate is None else None
+
+    def add(self, proc_code: str, modifier: str, pos: str, code_type: str, rate: str = None) -> None:
+        self.proc_codes.append(proc_code)
+        self.modifiers.append(modifier)
+        self.pos_values.append(pos)
+        self.code_types.append(code_type)
+        if self.rates is not None:
+            self.rates.append(rate)
+
+    def set_columns(self, proc_codes, modifiers, pos_values, code_types, rates=None) -> None:
+        """
+        Makes the given columns the batch's own, as they are. Columns shared
+        between batches should be tuples, so nothing can be added to them.
+        """
+        if self.proc_codes:
+            raise ValueError("set_columns needs an empty batch")
+        self.proc_codes = proc_codes
+        self.modifiers = modifiers
+        self.pos_values = pos_values
+        self.code_types = code_types
+        if self.rates is not None:
+            self.rates = rates
+
+    def add_services(self, service_mod_pos_list, valid_code_index, default_pos: str = None) -> None:
+        """
+        Adds every valid combination of service_mod_pos_list, in iteration
+        order. When default_pos is given it replaces a '' or '11' POS.
+        """
+        if self.rates is not None:
+            raise ValueError("add_services needs a batch with a constant rate")
+        blocks = getattr(service_mod_pos_list, "blocks", None)
+        if blocks is None:
+            blocks = [((proc_code,), (modifier,), (pos,), code_type) for proc_code, modifier, pos, code_type in service_mod_pos_list]
+
+        for services, modifiers, pos_values, code_type in blocks:
+            services = [service for service in services if valid_code_index.is_valid(service, code_type)]
+            if not services:
+                continue
+            if default_pos is not None:
+                pos_values = [default_pos if pos == '' or pos == '11' else pos for pos in pos_values]
+            else:
+                pos_values = list(pos_values)
+
+            per_service = len(modifiers) * len(pos_values)
+            for service in services:
+                self.proc_codes.extend([service] * per_service)
+            self.modifiers.extend([modifier for modifier, _ in product(modifiers, pos_values)] * len(services))
+            self.pos_values.extend(pos_values * (len(modifiers) * len(services)))
+            self.code_types.extend([code_type] * (per_service * len(services)))
+
+    def __len__(self) -> int:
+        return len(self.proc_codes)
+
+    def __bool__(self) -> bool:
+        return bool(self.proc_codes)
+
+    def __repr__(self) -> str:
+        return f"RateBatch({self.prov_grp_contract_key!r}, {len(self)} rates)"
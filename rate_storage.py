@@ -1,13 +1,16 @@
 from constants import DEFAULT_EXP_DATE
 from context import Context
+from itertools import repeat
+from rate_batch import RateBatch
 from rate_group_key_factory import RateGroupKeyFactory
+from rate_record import RateRecord
 from term_bundle import TermBundle
 from typing import Optional
 
 def store_rate_record(
     rate_cache: dict,
     dict_key: tuple,
-    rate_dict: dict,
+    rate_record: RateRecord,
     group_key: str = None,
     key_factory: RateGroupKeyFactory = None,
     code_tuple: tuple[str, str, str] = None,
@@ -23,7 +26,7 @@ def store_rate_record(
     """
     
     proc_code, modifier, pos = code_tuple
-    billing_code_type = rate_dict["billing_code_type"]
+    billing_code_type = rate_record.billing_code_type
 
     temp_proc_code = proc_code.zfill(4) if billing_code_type == 'RC' else proc_code
     valid_code_key: str = (temp_proc_code, billing_code_type)
@@ -41,8 +44,8 @@ def store_rate_record(
     if existing:
         if term_bundle.is_exclusion:
             # Exclusions always override
-            entry[group_key] = rate_dict
-        elif existing == rate_dict:
+            entry[group_key] = rate_record
+        elif existing == rate_record:
             # Exact same record — skip
             return
         else:
@@ -51,25 +54,18 @@ def store_rate_record(
     else:
         # First time seeing this group key
         if not term_bundle.is_exclusion:
-            entry[group_key] = rate_dict
+            entry[group_key] = rate_record
 
-    # Inject flags into the rate dict
-    rate_dict["was_poa"] = term_bundle.was_poa
-    
-    if not(hasattr(rate_dict,"full_term_display_id")):
-        rate_dict["full_term_display_id"] = ''
-        
-    temp_full_term_display_id = rate_dict["full_term_display_id"].strip()
+    # Inject flags into the rate record
+    rate_record.was_poa = term_bundle.was_poa
+
+    temp_full_term_display_id = rate_record.full_term_display_id.strip()
     if temp_full_term_display_id == '':
-        rate_dict["full_term_display_id"] = term_bundle.full_term_display_id
+        rate_record.full_term_display_id = term_bundle.full_term_display_id
     else:
-        rate_dict["full_term_display_id"] = str(temp_full_term_display_id) + "," + str(term_bundle.full_term_display_id)
+        rate_record.full_term_display_id = str(temp_full_term_display_id) + "," + str(term_bundle.full_term_display_id)
 
-    has_provider_qualifiers = term_bundle.provider_ranges
-    if has_provider_qualifiers:
-        rate_dict["qualified"] = True
-    else:
-        rate_dict["qualified"] = False
+    rate_record.qualified = bool(term_bundle.provider_ranges)
 
     # Only update indexes for non-POA terms
     if rate_cache_index and not term_bundle.was_poa:
@@ -90,6 +86,86 @@ def store_rate_record(
             by_pos = rate_cache_index["by_pos"].setdefault(rate_sheet_code, {})
             by_pos.setdefault(pos, set()).add(dict_key)
 
+def store_rate_batch(
+    rate_cache: dict,
+    rate_batch: RateBatch,
+    valid_service_codes: set = None,
+    rate_cache_index: dict = None,
+    *,
+    term_bundle: TermBundle
+) -> None:
+    """
+    Stores every rate of a RateBatch for the term's rate sheet. Each rate is
+    stored exactly as store_rate_record would store it, in column order, but
+    the term flags are worked out once for the batch and the indexes are
+    updated once per distinct proc code, modifier and POS.
+    """
+    rate_sheet_code = term_bundle.rate_sheet_code
+    group_key = rate_batch.prov_grp_contract_key
+    is_exclusion = term_bundle.is_exclusion
+    was_poa = term_bundle.was_poa
+    full_term_display_id = term_bundle.full_term_display_id
+    qualified = bool(term_bundle.provider_ranges)
+
+    insurer_code = rate_batch.insurer_code
+    negotiated_type = rate_batch.negotiated_type
+    rates = rate_batch.rates if rate_batch.rates is not None else repeat(rate_batch.rate)
+    billing_class = rate_batch.billing_class
+    expiration_date = rate_batch.expiration_date
+    full_term_section_id = rate_batch.full_term_section_id
+    calc_bean = rate_batch.calc_bean
+
+    # keys that got past the validity and conflict checks - the ones
+    # store_rate_record would index
+    stored_keys = []
+    last_code_key = None
+    last_code_valid = False
+    for proc_code, modifier, pos, billing_code_type, rate in zip(
+        rate_batch.proc_codes, rate_batch.modifiers, rate_batch.pos_values, rate_batch.code_types, rates
+    ):
+        # the columns come in runs of the same code, so check each run once
+        code_key = (proc_code, billing_code_type)
+        if code_key != last_code_key:
+            last_code_key = code_key
+            temp_proc_code = proc_code.zfill(4) if billing_code_type == 'RC' else proc_code
+            last_code_valid = (temp_proc_code, billing_code_type) in valid_service_codes
+        if not last_code_valid:
+            continue
+
+        dict_key = (rate_sheet_code, proc_code, modifier, pos, billing_code_type)
+        entry = rate_cache.setdefault(dict_key, {})
+        if entry.get(group_key):
+            if not is_exclusion:
+                continue
+        elif is_exclusion:
+            # not stored, but store_rate_record still indexes it
+            stored_keys.append(dict_key)
+            continue
+
+        rate_record = RateRecord(
+            insurer_code, group_key, billing_code_type, proc_code, pos,
+            negotiated_type, rate, modifier, billing_class, expiration_date,
+            full_term_section_id, calc_bean
+        )
+        rate_record.was_poa = was_poa
+        rate_record.full_term_display_id = full_term_display_id
+        rate_record.qualified = qualified
+        entry[group_key] = rate_record
+        stored_keys.append(dict_key)
+
+    # Only update indexes for non-POA terms
+    if not stored_keys or not rate_cache_index or was_poa:
+        return
+    for index_name, position in (("by_proc", 1), ("by_modifier", 2), ("by_pos", 3)):
+        if index_name not in rate_cache_index:
+            continue
+        grouped: dict[str, list[tuple]] = {}
+        for dict_key in stored_keys:
+            grouped.setdefault(dict_key[position], []).append(dict_key)
+        by_value = rate_cache_index[index_name].setdefault(rate_sheet_code, {})
+        for value, keys in grouped.items():
+            by_value.setdefault(value, set()).update(keys)
+
 def build_rate_cache_index(rate_cache: dict) -> dict:
     """
     Builds multiple indexes from rate_cache:
@@ -1,10 +1,28 @@
 import logging
 from context import Context
-from constants import section_mapping
+from constants import RATESHEET_PREFETCH_PARTITION_SIZE, section_mapping
 from shared_config import SharedConfig
-from typing import Any
+from subratesheet_store import SubRateSheetStore
+from typing import Any, Iterable
+from utilities import build_in_clause_from_list
+
+RATESHEET_TERM_COLUMNS = """
+        SRST.RATESHEETTERMID, SRST.CALCBEAN, SRST.ACTIONPARM1, SRST.BASEPERCENTOFCHGS, SRST.CODEGROUPID,
+        SRST.CODELOWVALUE, SRST.CODEHIGHVALUE, SRST.CODETYPEBEAN, SRST.DISPLAYSECTIONNUMBER,
+        SRST.SEQNUMBER, SRST.DISABLED, SRST.RATESHEETTERMID, SRST.SUBRATESHEETID, SRS.SUBRATESHEETIND,
+        SRST.BASERATE, SRST.BASERATE1, SRST.BASERATE2, SRST.PERDIEM, SRST.USERFIELD1,
+        SRST.SECONDARYPERCENTOFCHGS, SRST.OTHERPERCENTOFCHGS, SRST.OTHERPERCENTOFCHGS1,
+        SRST.OUTLIER, SRST.OUTLIERPERCENTAGE
+"""
+
+# sub rate sheet every CalcOptumPhysicianPricer term is priced through
+OPTUM_PHYSICIAN_SUBRATESHEET_ID = '4649'
 
 def load_ratesheet(context: Context, query: str, rate_sheet_code: str = None) -> dict[str, list[dict[str, Any]]]:
+    rate_sheet_terms = context.networx_conn.execute_query_with_columns(query)
+    return build_ratesheet(context, rate_sheet_terms, rate_sheet_code)
+
+def build_ratesheet(context: Context, rate_sheet_terms: list[dict[str, Any]], rate_sheet_code: str = None) -> dict[str, list[dict[str, Any]]]:
     rate_sheet = {
         "preprocessing": [],
         "inpatient exclusions": [],
@@ -20,8 +38,6 @@ def load_ratesheet(context: Context, query: str, rate_sheet_code: str = None) ->
         "post processing": []
     }
 
-    rate_sheet_terms = context.networx_conn.execute_query_with_columns(query)
-
     for term in rate_sheet_terms:
 
         if rate_sheet_code is not None:
@@ -47,7 +63,7 @@ def load_ratesheet(context: Context, query: str, rate_sheet_code: str = None) ->
             term["subterms"] = load_subterms(context, sub_rate_sheet_id, term)
         else:
             if term["CALCBEAN"] == 'CalcOptumPhysicianPricer':
-                term["subterms"] = load_subterms(context, '4649', term)
+                term["subterms"] = load_subterms(context, OPTUM_PHYSICIAN_SUBRATESHEET_ID, term)
 
         rate_sheet[section_name].append(term)
 
@@ -55,13 +71,7 @@ def load_ratesheet(context: Context, query: str, rate_sheet_code: str = None) ->
 
 def load_ratesheet_by_code(context: Context, rate_sheet_code: str) -> dict[str, list[dict[str, Any]]]:
     query = f"""
-    SELECT 
-        SRST.RATESHEETTERMID, SRST.CALCBEAN, SRST.ACTIONPARM1, SRST.BASEPERCENTOFCHGS, SRST.CODEGROUPID,
-        SRST.CODELOWVALUE, SRST.CODEHIGHVALUE, SRST.CODETYPEBEAN, SRST.DISPLAYSECTIONNUMBER,
-        SRST.SEQNUMBER, SRST.DISABLED, SRST.RATESHEETTERMID, SRST.SUBRATESHEETID, SRS.SUBRATESHEETIND,
-        SRST.BASERATE, SRST.BASERATE1, SRST.BASERATE2, SRST.PERDIEM, SRST.USERFIELD1,
-        SRST.SECONDARYPERCENTOFCHGS, SRST.OTHERPERCENTOFCHGS, SRST.OTHERPERCENTOFCHGS1,
-        SRST.OUTLIER, SRST.OUTLIERPERCENTAGE
+    SELECT {RATESHEET_TERM_COLUMNS}
     FROM STDRATESHEETS SRS
     LEFT JOIN STDRATESHEETTERMS SRST ON SRS.RATESHEETID = SRST.RATESHEETID
     WHERE SRS.RATESHEETCODE = '{rate_sheet_code}'
@@ -69,15 +79,48 @@ def load_ratesheet_by_code(context: Context, rate_sheet_code: str) -> dict[str,
     """
     return load_ratesheet(context, query, rate_sheet_code)
 
+def load_ratesheets_by_codes(
+    context: Context,
+    rate_sheet_codes: list[str],
+    partition_size: int = RATESHEET_PREFETCH_PARTITION_SIZE
+) -> dict[str, dict[str, list[dict[str, Any]]]]:
+    """
+    Set-based version of load_ratesheet_by_code for a whole run.
+    Pulls the effective terms for every code in a handful of partitioned
+    IN queries and returns rate_sheet_code -> section-keyed rate sheet,
+    the same structure load_ratesheet builds. Subterms are resolved here too,
+    so whoever receives the result never has to go back to the database.
+    """
+    codes = sorted(set(code for code in rate_sheet_codes if code))
+    terms_by_code: dict[str, list[dict[str, Any]]] = {code: [] for code in codes}
+
+    for i in range(0, len(codes), partition_size):
+        partition = codes[i:i + partition_size]
+        query = f"""
+        SELECT SRS.RATESHEETCODE, {RATESHEET_TERM_COLUMNS}
+        FROM STDRATESHEETS SRS
+        LEFT JOIN STDRATESHEETTERMS SRST ON SRS.RATESHEETID = SRST.RATESHEETID
+        WHERE SRS.RATESHEETCODE IN {build_in_clause_from_list(partition)}
+          AND GETDATE() BETWEEN SRST.FROMDATE AND SRST.TODATE
+        """
+        # materialize the partition - subterm loading below reuses the connection
+        for term in context.networx_conn.execute_query_with_columns(query):
+            terms_by_code.setdefault(term["RATESHEETCODE"], []).append(term)
+
+    prefetch_subratesheets(
+        context,
+        referenced_subratesheet_ids(term for terms in terms_by_code.values() for term in terms),
+        partition_size
+    )
+
+    return {
+        code: build_ratesheet(context, terms, code)
+        for code, terms in terms_by_code.items()
+    }
+
 def load_ratesheet_by_id(context: Context, rate_sheet_id: int) -> dict[str, list[dict[str, Any]]]:
     query = f"""
-    SELECT 
-        SRST.RATESHEETTERMID, SRST.CALCBEAN, SRST.ACTIONPARM1, SRST.BASEPERCENTOFCHGS, SRST.CODEGROUPID,
-        SRST.CODELOWVALUE, SRST.CODEHIGHVALUE, SRST.CODETYPEBEAN, SRST.DISPLAYSECTIONNUMBER,
-        SRST.SEQNUMBER, SRST.DISABLED, SRST.RATESHEETTERMID, SRST.SUBRATESHEETID, SRS.SUBRATESHEETIND,
-        SRST.BASERATE, SRST.BASERATE1, SRST.BASERATE2, SRST.PERDIEM, SRST.USERFIELD1,
-        SRST.SECONDARYPERCENTOFCHGS, SRST.OTHERPERCENTOFCHGS, SRST.OTHERPERCENTOFCHGS1,
-        SRST.OUTLIER, SRST.OUTLIERPERCENTAGE
+    SELECT {RATESHEET_TERM_COLUMNS}
     FROM STDRATESHEETS SRS
     LEFT JOIN STDRATESHEETTERMS SRST ON SRS.RATESHEETID = SRST.RATESHEETID
     WHERE SRS.RATESHEETID = '{rate_sheet_id}'
@@ -85,45 +128,57 @@ def load_ratesheet_by_id(context: Context, rate_sheet_id: int) -> dict[str, list
     """
     return load_ratesheet(context, query)
 
-def load_subterms(context: Context, rate_sheet_id: str, term: dict) -> list[dict[str, Any]]:
-    if not hasattr(context, "subratesheet_cache"):
-        context.subratesheet_cache = {}
-
-    if rate_sheet_id in context.subratesheet_cache:
-        return context.subratesheet_cache[rate_sheet_id]
-
-    rate_sheet_code: str = term.get("RATESHEETCODE", "")
-
-    query = f"""
-    SELECT 
-        SRST.RATESHEETTERMID, SRST.CALCBEAN, SRST.ACTIONPARM1, SRST.BASEPERCENTOFCHGS, SRST.CODEGROUPID,
-        SRST.CODELOWVALUE, SRST.CODEHIGHVALUE, SRST.CODETYPEBEAN, SRST.DISPLAYSECTIONNUMBER,
-        SRST.SEQNUMBER, SRST.DISABLED, SRST.RATESHEETTERMID, SRST.SUBRATESHEETID, SRS.SUBRATESHEETIND,
-        SRST.BASERATE, SRST.BASERATE1, SRST.BASERATE2, SRST.PERDIEM, SRST.USERFIELD1,
-        SRST.SECONDARYPERCENTOFCHGS, SRST.OTHERPERCENTOFCHGS, SRST.OTHERPERCENTOFCHGS1,
-        SRST.OUTLIER, SRST.OUTLIERPERCENTAGE
-    FROM STDRATESHEETS SRS
-    LEFT JOIN STDRATESHEETTERMS SRST ON SRS.RATESHEETID = SRST.RATESHEETID
-    WHERE SRS.RATESHEETID = '{rate_sheet_id}'
-      AND GETDATE() BETWEEN SRST.FROMDATE AND SRST.TODATE
+def referenced_subratesheet_ids(terms: Iterable[dict[str, Any]]) -> set[str]:
+    sub_rate_sheet_ids = set()
+    for term in terms:
+        sub_rate_sheet_id = term.get("SUBRATESHEETID")
+        if sub_rate_sheet_id and term.get("SUBRATESHEETIND") == 0:
+            sub_rate_sheet_ids.add(str(sub_rate_sheet_id))
+        elif term.get("CALCBEAN") == 'CalcOptumPhysicianPricer':
+            sub_rate_sheet_ids.add(OPTUM_PHYSICIAN_SUBRATESHEET_ID)
+    return sub_rate_sheet_ids
+
+def get_subratesheet_store(context: Context) -> SubRateSheetStore:
+    shared_config = context.shared_config
+    if getattr(shared_config, "subratesheet_store", None) is None:
+        shared_config.subratesheet_store = SubRateSheetStore()
+    return shared_config.subratesheet_store
+
+def prefetch_subratesheets(
+    context: Context,
+    sub_rate_sheet_ids: Iterable[str],
+    partition_size: int = RATESHEET_PREFETCH_PARTITION_SIZE
+) -> SubRateSheetStore:
     """
-    rate_sheet_terms = context.networx_conn.execute_query_with_columns(query)
-    subterms = []
-
-    parent_section_number = int(term.get("DISPLAYSECTIONNUMBER") or 0)
-    parent_seq_number = int(term.get("SEQNUMBER") or 0)
-    parent_full_term_display_id = term.get("FULLTERMDISPLAYID")
-
-    for subterm in rate_sheet_terms:
-        if rate_sheet_code:
-            subterm["RATESHEETCODE"] = rate_sheet_code
-        subterm["PARENTSECTIONNUMBER"] = parent_section_number
-        subterm["PARENTSEQNUMBER"] = parent_seq_number
-        seq_number = subterm["SEQNUMBER"]
-        full_term_display_id = str(parent_full_term_display_id) + "." + str(seq_number)
-        subterm["FULLTERMDISPLAYID"] = full_term_display_id
-        subterms.append(subterm)
-
-    context.subratesheet_cache[rate_sheet_id] = subterms
-    return subterms
+    Loads the raw terms of every sub rate sheet not already in the store,
+    a partition of ids per query. Ids without effective terms are stored
+    empty so they never trigger another lookup.
+    """
+    store = get_subratesheet_store(context)
+    ids = sorted(set(str(sheet_id) for sheet_id in sub_rate_sheet_ids if sheet_id) - set(store.terms_by_id))
+
+    for i in range(0, len(ids), partition_size):
+        partition = ids[i:i + partition_size]
+        for sub_rate_sheet_id in partition:
+            store.add(sub_rate_sheet_id, [])
+
+        query = f"""
+        SELECT SRS.RATESHEETID AS SUBRATESHEETKEY, {RATESHEET_TERM_COLUMNS}
+        FROM STDRATESHEETS SRS
+        LEFT JOIN STDRATESHEETTERMS SRST ON SRS.RATESHEETID = SRST.RATESHEETID
+        WHERE SRS.RATESHEETID IN {build_in_clause_from_list(partition)}
+          AND GETDATE() BETWEEN SRST.FROMDATE AND SRST.TODATE
+        """
+        for row in context.networx_conn.stream_query_with_columns(query):
+            store.add(row.pop("SUBRATESHEETKEY"), [row])
+
+    return store
 
+def load_subterms(context: Context, rate_sheet_id: str, term: dict) -> list[dict[str, Any]]:
+    store = get_subratesheet_store(context)
+    subterms = store.get_subterms(rate_sheet_id, term)
+    if subterms is None:
+        # not prefetched - load it once so later parents are served from the store
+        prefetch_subratesheets(context, [rate_sheet_id])
+        subterms = store.build_subterms(rate_sheet_id, term)
+    return subterms
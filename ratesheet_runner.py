@@ -5,6 +5,7 @@ from context_factory import build_context
 from database_connection import DatabaseConnection
 from buffered_rate_file_writer import BufferedRateFileWriter
 from ratesheet_batch_tracker import RateSheetBatchTracker
+from ratesheet_loader import load_ratesheets_by_codes
 from ratesheet_logic import fetch_ratesheets, group_rows_by_ratesheet_id
 from ratesheet_worker import process_ratesheet_worker
 from rate_group_key_factory import RateGroupKeyFactory, merge_rate_group_key_factories
@@ -60,6 +61,12 @@ def process_ratesheets(shared_config: SharedConfig, networx_conn, qnxt_conn, mod
     # grouped_values = list(grouped_ratesheets.values())[:LIMIT]
 
 
+    prefetched_ratesheets = load_ratesheets_by_codes(
+        temp_context,
+        [rows[0]["RATESHEETCODE"] for rows in grouped_values]
+    )
+    print(f"Sub rate sheet store: {shared_config.subratesheet_store.statistics()}")
+
     ratesheet_batches = chunk_ratesheet_groups(grouped_values, batch_size=5)
 
     rate_file_writer = BufferedRateFileWriter(
@@ -76,7 +83,8 @@ def process_ratesheets(shared_config: SharedConfig, networx_conn, qnxt_conn, mod
             networx_conn=networx_conn,
             qnxt_conn=qnxt_conn,
             tracker=tracker,
-            rate_file_writer=rate_file_writer
+            rate_file_writer=rate_file_writer,
+            prefetched_ratesheets=prefetched_ratesheets
         )
         rate_group_factories.append(factory)
         optum_apc_ratesheet_ids.update(temp_optum_ratesheet_ids)
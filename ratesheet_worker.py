@@ -19,7 +19,8 @@ def process_ratesheet_worker(
     networx_conn: Any,
     qnxt_conn: Any,
     tracker: Any,
-    rate_file_writer: Any
+    rate_file_writer: Any,
+    prefetched_ratesheets: dict[str, dict] = None
 ) -> tuple[RateGroupKeyFactory, set[str]]:
     
     rate_group_key_factory: RateGroupKeyFactory = RateGroupKeyFactory()
@@ -36,7 +37,12 @@ def process_ratesheet_worker(
 
             rate_cache: dict = {}
 
-            ratesheet = load_ratesheet_by_code(context, rate_sheet_code)
+            # terms normally arrive pre-partitioned with the batch
+            # only fall back to the database if the caller didn't prefetch
+            if prefetched_ratesheets and rate_sheet_code in prefetched_ratesheets:
+                ratesheet = prefetched_ratesheets[rate_sheet_code]
+            else:
+                ratesheet = load_ratesheet_by_code(context, rate_sheet_code)
             
             process_inpatient_case_rate(context, ratesheet.get("inpatient case rate", []), rate_cache, rate_group_key_factory)
             process_inpatient_per_diem(context, ratesheet.get("inpatient per diem", []), rate_cache, rate_group_key_factory)
@@ -0,0 +1,119 @@
+"""
+reference_loader.py
+
+Loads the startup reference tables concurrently. Each dataset is an
+independent, I/O-bound query, so they run on a thread pool - one database
+connection per task - and SharedConfig is only filled in once every load
+has finished. Per-dataset timings are kept so the slowest table (the one on
+the critical path) shows up in the run output.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable
+
+from codegroup_loader import load_code_groups, load_ambsurg_codes, load_ndc_codes, load_drg_weights, load_locality_zip_ranges
+from constants import STARTUP_LOADER_MAX_WORKERS
+from database_connection import create_database_connection
+from fee_schedule_loader import preload_all_locality_fee_schedules, preload_fee_schedules
+from modifier_loader import load_modifier_map
+
+def _load_with_connection(connection_string: str, loader: Callable) -> Any:
+    conn = create_database_connection(connection_string)
+    try:
+        return loader(conn)
+    finally:
+        conn.disconnect()
+
+class _LoaderContext:
+    # the slice of Context the fee schedule preloads use; shared_config is a
+    # private holder so schedule types don't land on SharedConfig mid-load
+    def __init__(self, networx_conn):
+        self.networx_conn = networx_conn
+        self.fee_schedules = {}
+        self.shared_config = _FeeScheduleTypes()
+
+class _FeeScheduleTypes:
+    def __init__(self):
+        self.fee_schedule_types = {}
+
+def _load_fee_schedules(conn) -> tuple[dict, dict]:
+    context = _LoaderContext(conn)
+    fee_schedules = preload_fee_schedules(context)
+    return fee_schedules, context.shared_config.fee_schedule_types
+
+def reference_loaders(modifier_path: str, preload_fee_schedules: bool = True) -> dict[str, tuple[bool, Callable]]:
+    # dataset name -> (needs a networx connection, loader)
+    loaders = {
+        "codegroups": (True, load_code_groups),
+        "amb_surg_codes": (True, load_ambsurg_codes),
+        "ndc_codes": (True, load_ndc_codes),
+        "drg_weights": (True, load_drg_weights),
+        "locality_zip_ranges": (True, load_locality_zip_ranges),
+        "locality_fee_schedules": (True, lambda conn: preload_all_locality_fee_schedules(_LoaderContext(conn))),
+        "fee_schedules": (True, _load_fee_schedules),
+        "modifier_map": (False, lambda: load_modifier_map(modifier_path)),
+    }
+    if not preload_fee_schedules:
+        # the "database" fee schedule source loads each schedule when a term needs it
+        del loaders["fee_schedules"]
+    return loaders
+
+def load_reference_data(
+    shared_config,
+    networx_connection_string: str,
+    modifier_path: str,
+    max_workers: int = STARTUP_LOADER_MAX_WORKERS,
+    preload_fee_schedules: bool = True
+) -> dict[str, float]:
+    """
+    Loads every startup reference dataset onto shared_config and returns the
+    seconds each one took. If any load fails the error is raised once the
+    others have finished, and shared_config is left untouched. Without
+    preload_fee_schedules, shared_config.fee_schedules is left empty.
+    """
+    loaders = reference_loaders(modifier_path, preload_fee_schedules)
+    results: dict[str, Any] = {}
+    timings: dict[str, float] = {}
+    errors: dict[str, Exception] = {}
+
+    def timed(name: str, needs_connection: bool, loader: Callable) -> tuple[Any, float]:
+        start = time.perf_counter()
+        if needs_connection:
+            result = _load_with_connection(networx_connection_string, loader)
+        else:
+            result = loader()
+        return result, time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="reference-loader") as executor:
+        futures = {
+            executor.submit(timed, name, needs_connection, loader): name
+            for name, (needs_connection, loader) in loaders.items()
+        }
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                results[name], timings[name] = future.result()
+            except Exception as e:
+                errors[name] = e
+    wall_time = time.perf_counter() - start
+
+    if errors:
+        for name, e in errors.items():
+            print(f"❌ Loading reference data {name} failed: {e}")
+        raise next(iter(errors.values()))
+
+    fee_schedules, fee_schedule_types = results.pop("fee_schedules", ({}, {}))
+    shared_config.fee_schedules = fee_schedules
+    shared_config.fee_schedule_types = fee_schedule_types
+    for name, result in results.items():
+        setattr(shared_config, name, result)
+
+    print_reference_timings(timings, wall_time)
+    return timings
+
+def print_reference_timings(timings: dict[str, float], wall_time: float) -> None:
+    print(f"Reference data loaded in {wall_time:.2f}s (sequential total {sum(timings.values()):.2f}s)")
+    for name, seconds in sorted(timings.items(), key=lambda item: item[1], reverse=True):
+        print(f"  {name:<24} {seconds:8.2f}s")
@@ -0,0 +1,152 @@
+"""
+reference_snapshot.py
+
+On-disk snapshot of the reference data SharedConfig carries into every run:
+code groups, ambulatory surgery codes, NDC pricing, DRG weights, locality
+zip ranges, the modifier map and the fee schedules.
+
+A snapshot file is one JSON header line followed by a gzip'd pickle of the
+data. It is keyed by the extraction date (the source queries filter on
+GETDATE()) and by a hash of the source queries, the source database and the
+modifier map file, so it is only reused when a fresh load would return
+the same thing. A run that doesn't preload the standard fee schedules
+leaves their query out of the hash, so it never shares a snapshot with one
+that does.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import pickle
+from datetime import date, datetime
+from typing import Any
+
+import codegroup_loader
+import fee_schedule_loader
+from connection_pool import describe_connection
+
+# bump whenever the shape of the snapshot data or how it is built changes
+SNAPSHOT_FORMAT_VERSION = 5
+SNAPSHOT_MAGIC = "cms-reference-snapshot"
+SNAPSHOT_PREFIX = "reference_snapshot_"
+SNAPSHOT_EXT = ".pkl.gz"
+
+SOURCE_QUERIES = [
+    codegroup_loader.CODE_GROUPS_QUERY,
+    codegroup_loader.AMBSURG_CODES_QUERY,
+    codegroup_loader.NDC_CODES_QUERY,
+    codegroup_loader.DRG_WEIGHTS_QUERY,
+    codegroup_loader.LOCALITY_ZIP_RANGES_QUERY,
+    fee_schedule_loader.LOCALITY_FEE_SCHEDULES_QUERY,
+    fee_schedule_loader.FEE_SCHEDULE_NAMES_QUERY,
+]
+
+# SharedConfig attributes captured in a snapshot
+REFERENCE_ATTRIBUTES = [
+    "codegroups",
+    "amb_surg_codes",
+    "ndc_codes",
+    "drg_weights",
+    "locality_zip_ranges",
+    "modifier_map",
+    "locality_fee_schedules",
+    "fee_schedules",
+    "fee_schedule_types",
+    # pickled in the same dump, so its strings are the objects the data above holds
+    "code_table",
+]
+
+def source_hash(networx_connection_string: str, modifier_path: str, preload_fee_schedules: bool = True) -> str:
+    digest = hashlib.sha256()
+    digest.update(str(SNAPSHOT_FORMAT_VERSION).encode("utf-8"))
+    digest.update(describe_connection(networx_connection_string).encode("utf-8"))
+    for query in SOURCE_QUERIES:
+        if query is fee_schedule_loader.FEE_SCHEDULE_NAMES_QUERY and not preload_fee_schedules:
+            continue
+        # whitespace-only edits to a query shouldn't invalidate the snapshot
+        digest.update(" ".join(query.split()).encode("utf-8"))
+    if os.path.exists(modifier_path):
+        with open(modifier_path, "rb") as modifier_file:
+            digest.update(modifier_file.read())
+    return digest.hexdigest()[:16]
+
+def snapshot_path(snapshot_dir: str, extraction_date: date, content_hash: str) -> str:
+    return os.path.join(
+        snapshot_dir,
+        f"{SNAPSHOT_PREFIX}{extraction_date.strftime('%Y%m%d')}_{content_hash}{SNAPSHOT_EXT}"
+    )
+
+def load_reference_snapshot(
+    snapshot_dir: str, networx_connection_string: str, modifier_path: str, preload_fee_schedules: bool = True
+) -> dict[str, Any] | None:
+    """
+    Returns the snapshot data for today's extraction, or None when there is
+    no fresh snapshot to warm-start from.
+    """
+    content_hash = source_hash(networx_connection_string, modifier_path, preload_fee_schedules)
+    path = snapshot_path(snapshot_dir, date.today(), content_hash)
+    if not os.path.exists(path):
+        return None
+
+    try:
+        with open(path, "rb") as snapshot_file:
+            header = json.loads(snapshot_file.readline().decode("utf-8"))
+            if (
+                header.get("magic") != SNAPSHOT_MAGIC
+                or header.get("version") != SNAPSHOT_FORMAT_VERSION
+                or header.get("source_hash") != content_hash
+            ):
+                print(f"⚠️ Ignoring reference snapshot with a stale header: {path}")
+                return None
+            with gzip.GzipFile(fileobj=snapshot_file, mode="rb") as payload:
+                data = pickle.load(payload)
+    except (OSError, EOFError, ValueError, pickle.UnpicklingError) as e:
+        print(f"⚠️ Could not read reference snapshot {path}: {e}")
+        return None
+
+    missing = [attribute for attribute in REFERENCE_ATTRIBUTES if attribute not in data]
+    if missing:
+        print(f"⚠️ Reference snapshot {path} is missing {missing}")
+        return None
+
+    print(f"✅ Warm start from reference snapshot {os.path.basename(path)}")
+    return data
+
+def save_reference_snapshot(
+    snapshot_dir: str, shared_config, networx_connection_string: str, modifier_path: str, preload_fee_schedules: bool = True
+) -> str:
+    """
+    Writes the reference data on shared_config to today's snapshot and
+    removes older snapshots. The file is written under a temp name and
+    renamed so a crashed run never leaves a half-written snapshot behind.
+    """
+    os.makedirs(snapshot_dir, exist_ok=True)
+    content_hash = source_hash(networx_connection_string, modifier_path, preload_fee_schedules)
+    path = snapshot_path(snapshot_dir, date.today(), content_hash)
+
+    header = {
+        "magic": SNAPSHOT_MAGIC,
+        "version": SNAPSHOT_FORMAT_VERSION,
+        "extraction_date": date.today().isoformat(),
+        "source_hash": content_hash,
+        "created": datetime.now().isoformat(timespec="seconds"),
+    }
+    data = {attribute: getattr(shared_config, attribute) for attribute in REFERENCE_ATTRIBUTES}
+
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as snapshot_file:
+        snapshot_file.write((json.dumps(header) + "\n").encode("utf-8"))
+        with gzip.GzipFile(fileobj=snapshot_file, mode="wb", compresslevel=3) as payload:
+            pickle.dump(data, payload, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temp_path, path)
+
+    for file_name in os.listdir(snapshot_dir):
+        if file_name.startswith(SNAPSHOT_PREFIX) and file_name != os.path.basename(path):
+            os.remove(os.path.join(snapshot_dir, file_name))
+
+    return path
+
+def apply_reference_snapshot(shared_config, data: dict[str, Any]) -> None:
+    for attribute in REFERENCE_ATTRIBUTES:
+        setattr(shared_config, attribute, data[attribute])
@@ -0,0 +1,74 @@
+"""
+service_combination_memo.py
+
+process_term needs three things per term: the code group tree, its provider
+ranges and its service combinations. Walking the tree, expanding numeric
+ranges and sorting the product costs the same on every term, and hundreds of
+terms across a batch's rate sheets share a CODEGROUPID. The memo keeps the
+finished results per code group, or per low/high/type for terms without
+one, so each is expanded once per context.
+
+The cached combinations and provider ranges are shared by every term that
+hits them, so the calcs must only read term_bundle.service_mod_pos_list and
+provider_ranges.
+"""
+
+from codegroup_tree import (
+    build_code_group_tree_from_term,
+    generate_service_combinations,
+    extract_provider_ranges_from_tree
+)
+from context import Context
+from term_bundle import TermBundle
+
+class ServiceCombinationEntry:
+    def __init__(self, code_group_tree: dict, provider_ranges: dict, service_combinations: dict):
+        self.code_group_tree = code_group_tree
+        self.provider_ranges = provider_ranges
+        self.combinations = service_combinations["combinations"]
+        self.has_services = service_combinations["has_services"]
+        self.has_service_filter = service_combinations["has_service_filter"]
+
+class ServiceCombinationMemo:
+    def __init__(self):
+        self.entries: dict[tuple, ServiceCombinationEntry] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, context: Context, term_bundle: TermBundle) -> ServiceCombinationEntry:
+        key = memo_key(term_bundle)
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            return entry
+
+        self.misses += 1
+        tree = build_code_group_tree_from_term(context, term_bundle)
+        entry = ServiceCombinationEntry(
+            tree,
+            dict(extract_provider_ranges_from_tree(tree, context)),
+            generate_service_combinations(context, tree)
+        )
+        self.entries[key] = entry
+        return entry
+
+    def statistics(self) -> dict[str, int]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(100 * self.hits / lookups, 1) if lookups else 0.0,
+        }
+
+def memo_key(term_bundle: TermBundle) -> tuple:
+    # a code group's tree depends only on its id; a term without one is
+    # built from its own range
+    if term_bundle.code_group_id:
+        return (term_bundle.code_group_id,)
+    return (None, term_bundle.code_low, term_bundle.code_high, term_bundle.code_type)
+
+def get_service_combination_memo(context: Context) -> ServiceCombinationMemo:
+    if getattr(context, "service_combination_memo", None) is None:
+        context.service_combination_memo = ServiceCombinationMemo()
+    return context.service_combination_memo
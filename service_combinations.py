@@ -0,0 +1,57 @@
+"""
+service_combinations.py
+
+The (service, modifier, POS, code type) combinations of a term, kept as the
+blocks generate_service_combinations builds them from instead of as their
+Cartesian product. A block is the sorted services, modifiers and POS values
+of one code type. Iterating yields the same tuples, in the same order, as
+the materialized list used to hold, and can be repeated. Membership and
+the size are worked out from the blocks without building the product.
+"""
+
+from itertools import product
+from typing import Iterator
+
+ServiceCombination = tuple[str, str, str, str]
+
+class ServiceCombinations:
+    def __init__(self):
+        # (services, modifiers, pos_values, code_type), in emission order
+        self.blocks: list[tuple[tuple[str, ...], tuple[str, ...], tuple[str, ...], str]] = []
+        self._block_sets: list[tuple[frozenset, frozenset, frozenset, str]] | None = None
+
+    def add(self, services, modifiers, pos_values, code_type: str) -> None:
+        block = (tuple(services), tuple(modifiers), tuple(pos_values), code_type)
+        if block[0] and block[1] and block[2]:
+            self.blocks.append(block)
+            self._block_sets = None
+
+    def __iter__(self) -> Iterator[ServiceCombination]:
+        for services, modifiers, pos_values, code_type in self.blocks:
+            for service, modifier, pos in product(services, modifiers, pos_values):
+                yield (service, modifier, pos, code_type)
+
+    def __len__(self) -> int:
+        # the number of combinations iteration will yield
+        return sum(len(services) * len(modifiers) * len(pos_values) for services, modifiers, pos_values, _ in self.blocks)
+
+    def __bool__(self) -> bool:
+        return bool(self.blocks)
+
+    def __contains__(self, combination) -> bool:
+        try:
+            service, modifier, pos, code_type = combination
+        except (TypeError, ValueError):
+            return False
+        if self._block_sets is None:
+            self._block_sets = [
+                (frozenset(services), frozenset(modifiers), frozenset(pos_values), block_code_type)
+                for services, modifiers, pos_values, block_code_type in self.blocks
+            ]
+        return any(
+            code_type == block_code_type and service in services and modifier in modifiers and pos in pos_values
+            for services, modifiers, pos_values, block_code_type in self._block_sets
+        )
+
+    def __repr__(self) -> str:
+        return f"ServiceCombinations({len(self.blocks)} blocks, {len(self)} combinations)"
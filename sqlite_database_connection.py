@@ -0,0 +1,61 @@
+"""
+sqlite_database_connection.py
+
+Local stand-in for DatabaseConnection backed by a SQLite file, so the pipeline
+can be profiled and benchmarked without pyodbc or a SQL Server. Build the
+file with offline_database.py and point the config at it with sqlite_path.
+
+Only the T-SQL the project actually uses is bridged: GETDATE() is registered
+as a function and DATETIME columns come back as datetime objects, the same
+as pyodbc returns them.
+"""
+
+import os
+import sqlite3
+from datetime import datetime
+from constants import DB_FETCH_ARRAYSIZE, SQLITE_CONNECTION_PREFIX
+from database_connection import DatabaseConnection
+
+SQLITE_DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+def _convert_datetime(value: bytes) -> datetime:
+    # stored as SQLITE_DATETIME_FORMAT text, which fromisoformat parses directly
+    return datetime.fromisoformat(value.decode("utf-8"))
+
+sqlite3.register_converter("DATETIME", _convert_datetime)
+
+def _getdate() -> str:
+    # same text format the DATETIME columns are stored in, so BETWEEN compares correctly
+    return datetime.now().strftime(SQLITE_DATETIME_FORMAT)
+
+def sqlite_path_from_connection_string(connection_string: str) -> str:
+    return connection_string[len(SQLITE_CONNECTION_PREFIX):]
+
+def open_sqlite_connection(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, detect_types=sqlite3.PARSE_DECLTYPES)
+    conn.create_function("GETDATE", 0, _getdate)
+    return conn
+
+class SQLiteDatabaseConnection(DatabaseConnection):
+    driver_errors = (sqlite3.Error,)
+
+    def __init__(self, connection_string, arraysize: int = DB_FETCH_ARRAYSIZE):
+        # opening a SQLite file is cheap - no pool, one connection per instance
+        self.connection_string = connection_string
+        self.arraysize = arraysize
+        self.path = sqlite_path_from_connection_string(connection_string)
+        self.pool = None
+        self.conn = None
+
+    def connect(self) -> None:
+        if not os.path.exists(self.path):
+            raise FileNotFoundError(f"SQLite database not found: {self.path} - build it with offline_database.py")
+        self.conn = open_sqlite_connection(self.path)
+
+    def disconnect(self) -> None:
+        if self.conn:
+            self.conn.close()
+            self.conn = None
+
+    def _discard_connection(self) -> None:
+        self.disconnect()
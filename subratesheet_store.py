@@ -0,0 +1,63 @@
+# subratesheet_store.py
+
+from typing import Any
+
+class SubRateSheetStore:
+    """
+    Raw effective terms for every sub rate sheet a run references, keyed by
+    SUBRATESHEETID. The parent fills it once and it ships read-only with
+    shared_config, so workers never query a sub rate sheet themselves.
+    Rows are kept untouched - each parent term gets its own copies with its
+    FULLTERMDISPLAYID prefix, RATESHEETCODE and parent section/seq applied.
+    """
+    def __init__(self):
+        self.terms_by_id: dict[str, list[dict[str, Any]]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __contains__(self, rate_sheet_id) -> bool:
+        return str(rate_sheet_id) in self.terms_by_id
+
+    def __len__(self) -> int:
+        return len(self.terms_by_id)
+
+    def __getstate__(self) -> dict:
+        # counters are per process - a worker starts from zero
+        state = self.__dict__.copy()
+        state["hits"] = 0
+        state["misses"] = 0
+        return state
+
+    def add(self, rate_sheet_id, rows: list[dict[str, Any]]) -> None:
+        self.terms_by_id.setdefault(str(rate_sheet_id), []).extend(rows)
+
+    def get_subterms(self, rate_sheet_id, parent_term: dict) -> list[dict[str, Any]] | None:
+        if rate_sheet_id not in self:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return self.build_subterms(rate_sheet_id, parent_term)
+
+    def build_subterms(self, rate_sheet_id, parent_term: dict) -> list[dict[str, Any]]:
+        rate_sheet_code: str = parent_term.get("RATESHEETCODE", "")
+        parent_section_number = int(parent_term.get("DISPLAYSECTIONNUMBER") or 0)
+        parent_seq_number = int(parent_term.get("SEQNUMBER") or 0)
+        parent_full_term_display_id = parent_term.get("FULLTERMDISPLAYID")
+
+        subterms = []
+        for row in self.terms_by_id.get(str(rate_sheet_id), []):
+            subterm = dict(row)
+            if rate_sheet_code:
+                subterm["RATESHEETCODE"] = rate_sheet_code
+            subterm["PARENTSECTIONNUMBER"] = parent_section_number
+            subterm["PARENTSEQNUMBER"] = parent_seq_number
+            subterm["FULLTERMDISPLAYID"] = str(parent_full_term_display_id) + "." + str(subterm["SEQNUMBER"])
+            subterms.append(subterm)
+        return subterms
+
+    def statistics(self) -> dict[str, int]:
+        return {
+            "sub_rate_sheets": len(self.terms_by_id),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
@@ -1,5 +1,6 @@
 from typing import Any, Dict, Optional
 from decimal import Decimal, ROUND_HALF_UP
+from service_combinations import ServiceCombinations
 
 class TermBundle:
     def __init__(self, term: Dict[str, Any], parent_code_group_id: Optional[int] = 0, rate_type_desc: Optional[str] = 'professional', is_exclusion=False) -> None:
@@ -41,11 +42,16 @@ class TermBundle:
         self.disabled: int = int(term.get("DISABLED") or 0)
 
         self.subterms: Optional[list["TermBundle"]] = None
-        self.service_mod_pos_list: Optional[Dict[str, Any]] = None
+        # lazy and shared between terms of a code group - iterate it, don't modify it
+        self.service_mod_pos_list: Optional[ServiceCombinations] = None
         self.has_services: Optional[bool]
+        # the term filters on services, even if every one of them was an invalid code
+        self.has_service_filter: bool = False
         self.provider_ranges = {}
         self.code_group_tree: Optional[dict] = None
         self.locality_fee_schedule_keys: Optional[tuple[str,str,str]] = None
+        # the standard schedule named by ACTIONPARM1, set by process_term
+        self.fee_schedule_values = None
         self.was_poa: bool = False
         self.is_exclusion: bool = is_exclusion
         self.full_term_display_id = term.get("FULLTERMDISPLAYID","")
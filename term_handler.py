@@ -1,12 +1,8 @@
-from codegroup_tree import (
-    build_code_group_tree_from_term,
-    generate_service_combinations,
-    extract_provider_ranges_from_tree
-)
 from context import Context
 from rate_group_key_factory import RateGroupKeyFactory
 from term_bundle import TermBundle
-from fee_schedule_loader import load_fee_schedule
+from fee_schedule_provider import get_fee_schedule_provider
+from service_combination_memo import get_service_combination_memo
 from calculation_router import CALCULATION_ROUTER
 import time
 
@@ -25,25 +21,35 @@ def process_term(context: Context, term_bundle: TermBundle, rate_cache: dict, ra
     if disabled or not calc_bean or not seq_number:
         return
     
-    term_bundle.code_group_tree = build_code_group_tree_from_term(context, term_bundle)
-    term_bundle.provider_ranges = extract_provider_ranges_from_tree(term_bundle.code_group_tree, context)
-    service_combinations = generate_service_combinations(context, term_bundle.code_group_tree)
+    # tree, provider ranges and combinations are memoized per code group -
+    # the lists are shared between terms, read them only
+    service_combinations = get_service_combination_memo(context).get(context, term_bundle)
+    term_bundle.code_group_tree = service_combinations.code_group_tree
+    term_bundle.provider_ranges = service_combinations.provider_ranges
 
     # if a code group exists on the term and has not been populated
     # populate the code group information
     if term_bundle.service_mod_pos_list is None and (term_bundle.code_group_id or term_bundle.code_low):
-        term_bundle.service_mod_pos_list = service_combinations["combinations"]
-        term_bundle.has_services = service_combinations["has_services"]
+        term_bundle.service_mod_pos_list = service_combinations.combinations
+        term_bundle.has_services = service_combinations.has_services
+        term_bundle.has_service_filter = service_combinations.has_service_filter
 
     # fee schedule name - load the values - will be used in the calculation routines
     # action_parm1 contains the fee_schedule name
     # in most cases, fee schedules are only used for Outpatient
     fee_schedule_name: str = term_bundle.fee_schedule_name
     if fee_schedule_name:
-        if fee_schedule_name not in context.fee_schedules:
-            locality_keys = load_fee_schedule(context, fee_schedule_name)
-            if locality_keys:
-                term_bundle.locality_fee_schedule_keys = locality_keys
+        fee_schedule_provider = get_fee_schedule_provider(context.shared_config)
+        locality_keys = None
+        # only the first term in a context naming the schedule picks up its
+        # locality keys - later ones price off the standard schedule
+        if fee_schedule_name not in context.fee_schedules and fee_schedule_name not in context.fee_schedule_names:
+            context.fee_schedule_names.add(fee_schedule_name)
+            locality_keys = fee_schedule_provider.locality_keys(context, fee_schedule_name)
+        if locality_keys:
+            term_bundle.locality_fee_schedule_keys = locality_keys
+        else:
+            term_bundle.fee_schedule_values = fee_schedule_provider.get(context, fee_schedule_name)
     
     # see the calculation_router module
     # each calculation type is in there
@@ -0,0 +1,50 @@
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from code_interning import CodeTable
+
+def expand_ranges(make_code, range_count: int, first: int, last: int) -> list[list[str]]:
+    # the same code range expanded for several terms, as generate_service_combinations does
+    return [[make_code(i) for i in range(first, last)] for _ in range(range_count)]
+
+def measure(label: str, build):
+    tracemalloc.start()
+    result = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"{label:<18} {size / 1_048_576:8.1f} MB")
+    return result, size
+
+def time_probes(label: str, keys: list, index, to_key=None, repeats: int = 20) -> float:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for key in keys:
+            (to_key(key) if to_key else key) in index
+    elapsed = time.perf_counter() - start
+    print(f"{label:<18} {elapsed:8.3f}s")
+    return elapsed
+
+if __name__ == "__main__":
+    range_count = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    first, last = 10000, 100000
+    print(f"{range_count} expansions of {last - first:,} codes")
+
+    _, plain_size = measure("str(i)", lambda: expand_ranges(str, range_count, first, last))
+    code_table = CodeTable()
+    _, interned_size = measure("numeric_code", lambda: expand_ranges(code_table.numeric_code, range_count, first, last))
+
+    codes = [code_table.numeric_code(i) for i in range(first, last)]
+    fresh_codes = [str(i) for i in range(first, last)]
+    code_set = set(codes)
+    time_probes("interned probes", codes, code_set)
+    time_probes("fresh str probes", fresh_codes, code_set)
+
+    # integer ids only pay off if nothing has to map a code to its id on the way in
+    code_ids = {code: code_id for code_id, code in enumerate(codes)}
+    id_set = set(code_ids.values())
+    time_probes("int id probes", list(code_ids.values()), id_set)
+    time_probes("code -> id probes", fresh_codes, id_set, code_ids.__getitem__)
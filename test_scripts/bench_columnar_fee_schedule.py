@@ -0,0 +1,61 @@
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_locality_fee_schedules import make_rows
+from fee_schedule_loader import build_locality_fee_schedules
+
+def measure(label: str, build):
+    tracemalloc.start()
+    result = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"{label:<10} {size / 1_048_576:8.1f} MB")
+    return result, size
+
+def iterate_dicts(schedules: dict) -> int:
+    # the full-schedule expansion the fee schedule calcs used to do
+    count = 0
+    for schedule in schedules.values():
+        for modifier, proc_codes in schedule.items():
+            for proc_code, entry in proc_codes.items():
+                if entry.get("allowed", 0) > 0 or entry.get("percentage", 0) > 0:
+                    count += 1
+    return count
+
+def iterate_columnar(schedules: dict) -> int:
+    count = 0
+    for schedule in schedules.values():
+        for proc_code, modifier, code_type, allowed, percentage, _ in schedule.rows():
+            if allowed > 0 or percentage > 0:
+                count += 1
+    return count
+
+def time_it(label: str, func, schedules: dict, repeats: int = 5) -> tuple[float, int]:
+    # best of a few runs - the first pass pays for cold caches
+    elapsed = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        count = func(schedules)
+        elapsed = min(elapsed, time.perf_counter() - start)
+    print(f"{label:<10} {elapsed:8.3f}s  {count:,} rows")
+    return elapsed, count
+
+if __name__ == "__main__":
+    row_count = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    rows = make_rows(row_count)
+    today = datetime(2026, 1, 1)
+    print(f"{row_count:,} locality rows")
+
+    columnar, columnar_size = measure("columnar", lambda: build_locality_fee_schedules(rows, today))
+    dicts, dict_size = measure("dicts", lambda: {key: schedule.to_dict() for key, schedule in columnar.items()})
+    print(f"memory     {dict_size / columnar_size:8.2f}x smaller")
+
+    dict_time, dict_count = time_it("dicts", iterate_dicts, dicts)
+    columnar_time, columnar_count = time_it("columnar", iterate_columnar, columnar)
+    assert dict_count == columnar_count, "columnar iteration returned a different row count"
+    print(f"iteration  {dict_time / columnar_time:8.2f}x faster")
@@ -0,0 +1,59 @@
+import random
+import sys
+import time
+from decimal import Decimal
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from drg_weight_table import DrgWeightTable
+from valid_code_index import ValidCodeIndex
+
+def make_weights(drg_count: int, seed: int = 25) -> set[tuple]:
+    # shaped like load_drg_weights - one row per DRG, source type and year
+    rng = random.Random(seed)
+    return {
+        (f"{code:03d}", Decimal(f"{rng.uniform(0.1, 25):.4f}"), source_type, year)
+        for code in range(1, drg_count + 1)
+        for source_type, year in (("MS", 2024), ("MS", 2025))
+    }
+
+def by_row(drg_weights, valid_code_index, base_rates) -> list[list[str]]:
+    # the pre-change loop - float(), round() and str() per row per term
+    term_rates = []
+    for base_rate in base_rates:
+        rates = []
+        for drg_code, relative_weight, source_type, year in drg_weights:
+            if not valid_code_index.is_valid(drg_code, "DRG"):
+                continue
+            rates.append(str(round(base_rate * float(relative_weight), 2)))
+        term_rates.append(rates)
+    return term_rates
+
+def by_table(drg_weights, valid_code_index, base_rates) -> list[list[str]]:
+    table = DrgWeightTable(drg_weights, valid_code_index)
+    return [list(table.columns(base_rate, "institutional")[4]) for base_rate in base_rates]
+
+def measure(label: str, run) -> tuple[list[list[str]], float]:
+    start = time.perf_counter()
+    result = run()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<8} {elapsed:8.3f}s")
+    return result, elapsed
+
+if __name__ == "__main__":
+    drg_count = int(sys.argv[1]) if len(sys.argv) > 1 else 800
+    term_count = int(sys.argv[2]) if len(sys.argv) > 2 else 2_000
+    distinct_rates = int(sys.argv[3]) if len(sys.argv) > 3 else 150
+    rng = random.Random(26)
+    drg_weights = make_weights(drg_count)
+    valid_code_index = ValidCodeIndex((code, "DRG") for code, *_ in drg_weights)
+    # DRG terms repeat the same few base rates across rate sheets
+    rate_pool = [round(rng.uniform(3_000, 20_000), 2) for _ in range(distinct_rates)]
+    base_rates = [rng.choice(rate_pool) for _ in range(term_count)]
+    print(f"{len(drg_weights):,} weight rows, {term_count:,} terms, {distinct_rates} base rates")
+
+    rows, row_time = measure("rows", lambda: by_row(drg_weights, valid_code_index, base_rates))
+    table, table_time = measure("table", lambda: by_table(drg_weights, valid_code_index, base_rates))
+    assert rows == table, "table produced different rates"
+    print(f"speedup  {row_time / table_time:8.1f}x")
@@ -0,0 +1,80 @@
+import os
+import random
+import sys
+import tempfile
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import fee_schedule_loader
+from fee_schedule_dedup import fee_schedule_statistics
+from mmap_reference_store import ReferenceStore, write_reference_store
+
+def make_rows(codes_per_schedule: int, localities: int, seed: int = 5) -> list[dict]:
+    # one table: most localities carry the national body, some adjust a few
+    # codes, a few have their own pricing
+    rng = random.Random(seed)
+    body = [(str(rng.randint(10000, 99999)), rng.choice(["", "", "26", "TC"]), round(rng.uniform(5, 900), 2))
+            for _ in range(codes_per_schedule)]
+    rows = []
+    for locality in range(localities):
+        kind = rng.random()
+        for position, (proc_code, modifier, allowed) in enumerate(body):
+            if kind > 0.9:
+                allowed = round(allowed * rng.uniform(0.8, 1.2), 2)
+            elif kind > 0.6 and position % 40 == locality % 40:
+                allowed = round(allowed * 1.05, 2)
+            rows.append({
+                "TABLENAME": "MCR_PHYS", "CARRIERNUMBER": str(1100 + locality // 30),
+                "LOCALITYNUMBER": str(locality % 30).zfill(2), "PROCEDURECODE": proc_code,
+                "MODIFIER": modifier, "ALLOWED": allowed, "PERCENTAGE": 0,
+                "TERMINATIONDATE": datetime(2099, 12, 31),
+            })
+    return rows
+
+def measure(label: str, build) -> tuple[dict, int]:
+    tracemalloc.start()
+    result = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"{label:<10} {size / 1_048_576:8.1f} MB")
+    return result, size
+
+def store_size(locality_fee_schedules: dict, directory: str, label: str) -> tuple[int, ReferenceStore]:
+    # the mmap store the rate sheet workers map
+    shared_config = SimpleNamespace(
+        fee_schedules={}, locality_fee_schedules=locality_fee_schedules,
+        valid_service_codes=set(), codegroups={}
+    )
+    path = write_reference_store(os.path.join(directory, f"{label}.bin"), shared_config)
+    size = os.path.getsize(path)
+    print(f"{label:<10} {size / 1_048_576:8.1f} MB store")
+    return size, ReferenceStore(path)
+
+if __name__ == "__main__":
+    codes_per_schedule = int(sys.argv[1]) if len(sys.argv) > 1 else 8_000
+    localities = int(sys.argv[2]) if len(sys.argv) > 2 else 90
+    rows = make_rows(codes_per_schedule, localities)
+    print(f"{localities} localities x {codes_per_schedule:,} codes")
+
+    # the pre-change layout - one schedule object per locality
+    dedup = fee_schedule_loader.deduplicate_locality_fee_schedules
+    fee_schedule_loader.deduplicate_locality_fee_schedules = lambda schedules: schedules
+    separate, separate_size = measure("separate", lambda: fee_schedule_loader.build_locality_fee_schedules(rows))
+    fee_schedule_loader.deduplicate_locality_fee_schedules = dedup
+    shared, shared_size = measure("shared", lambda: fee_schedule_loader.build_locality_fee_schedules(rows))
+
+    for key, schedule in separate.items():
+        assert shared[key].to_dict() == schedule.to_dict(), f"{key} changed by deduplication"
+    print(fee_schedule_statistics(shared))
+    print(f"memory     {separate_size / shared_size:8.2f}x smaller")
+
+    with tempfile.TemporaryDirectory() as directory:
+        separate_store_size, _ = store_size(separate, directory, "separate")
+        shared_store_size, store = store_size(shared, directory, "shared")
+        for key, schedule in separate.items():
+            assert sorted(store.locality_fee_schedules[key].rows()) == sorted(schedule.rows()), f"{key} changed in the store"
+        print(f"store      {separate_store_size / shared_store_size:8.2f}x smaller")
@@ -0,0 +1,56 @@
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from interval_set import CodeSet
+from valid_code_index import ValidCodeIndex
+
+def make_ranges(range_count: int, seed: int = 20) -> list[tuple[int, int, bool]]:
+    # a wide CPT range or two with NOT ranges carved out of them
+    rng = random.Random(seed)
+    ranges = [(0, 99999, False), (10000, 69999, False)]
+    for _ in range(range_count):
+        low = rng.randint(0, 99_000)
+        ranges.append((low, low + rng.choice([0, 9, 99, 999]), True))
+    return ranges
+
+def by_string_sets(ranges, index: ValidCodeIndex) -> list[str]:
+    # the pre-change expansion - every number in every range becomes a string
+    included, excluded = set(), set()
+    for low, high, is_not in ranges:
+        codes = {str(i) for i in range(low, high + 1) if index.is_valid_number(i)}
+        (excluded if is_not else included).update(codes)
+    return sorted(included - excluded)
+
+def by_interval_sets(ranges, index: ValidCodeIndex) -> list[str]:
+    included, excluded = CodeSet(), CodeSet()
+    for low, high, is_not in ranges:
+        (excluded if is_not else included).add_range(low, high)
+    return sorted(included.difference(excluded).codes(index))
+
+def measure(label: str, run) -> tuple[list[str], float]:
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = run()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"{label:<10} {elapsed:8.3f}s {peak / 1_048_576:8.1f} MB peak")
+    return result, elapsed
+
+if __name__ == "__main__":
+    range_count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    valid_count = int(sys.argv[2]) if len(sys.argv) > 2 else 12_000
+    rng = random.Random(21)
+    index = ValidCodeIndex((str(rng.randint(0, 99_999)), "CPT") for _ in range(valid_count))
+    ranges = make_ranges(range_count)
+    print(f"{len(ranges)} ranges, {len(index.number_list):,} valid numbers")
+
+    strings, string_time = measure("strings", lambda: by_string_sets(ranges, index))
+    intervals, interval_time = measure("intervals", lambda: by_interval_sets(ranges, index))
+    assert strings == intervals, "interval sets produced different codes"
+    print(f"speedup    {string_time / interval_time:8.1f}x")
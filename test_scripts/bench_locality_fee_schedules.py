@@ -0,0 +1,58 @@
+import random
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fee_schedule_loader import build_locality_fee_schedules, process_fee_schedule_rows
+
+def make_rows(row_count: int, seed: int = 7) -> list[dict]:
+    rng = random.Random(seed)
+    term_dates = [datetime(2020, 12, 31), datetime(2026, 12, 31), datetime(2027, 6, 30), datetime(2099, 12, 31)]
+    modifiers = ["", "", "", "26", "TC", "50 "]
+    rows = []
+    for _ in range(row_count):
+        rows.append({
+            "TABLENAME": f"MCR_PHYS_{rng.randint(1, 4)}",
+            "CARRIERNUMBER": str(rng.choice([1112, 1182, 2302, 4412])),
+            "LOCALITYNUMBER": str(rng.randint(1, 30)).zfill(2),
+            "PROCEDURECODE": str(rng.randint(10000, 99999)) if rng.random() < 0.9 else f"J{rng.randint(1000, 9999)}",
+            "MODIFIER": rng.choice(modifiers),
+            "ALLOWED": round(rng.uniform(5, 900), 2),
+            "PERCENTAGE": 0,
+            "TERMINATIONDATE": rng.choice(term_dates),
+        })
+    return rows
+
+def build_per_row(rows: list[dict]) -> dict:
+    # the pre-change preload: one process_fee_schedule_rows call per row
+    locality_fee_schedules = {}
+    for row in rows:
+        key = (row["TABLENAME"], row["CARRIERNUMBER"], row["LOCALITYNUMBER"])
+        parsed = process_fee_schedule_rows(None, row["TABLENAME"], [row]).to_dict()
+        if key not in locality_fee_schedules:
+            locality_fee_schedules[key] = {}
+        for mod, procs in parsed.items():
+            locality_fee_schedules[key].setdefault(mod, {}).update(procs)
+    return locality_fee_schedules
+
+def time_it(label: str, func, rows: list[dict]) -> tuple[float, dict]:
+    start = time.perf_counter()
+    result = func(rows)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<12} {elapsed:8.3f}s  {len(rows) / elapsed:12,.0f} rows/s")
+    return elapsed, result
+
+if __name__ == "__main__":
+    row_count = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    rows = make_rows(row_count)
+    print(f"{row_count:,} locality rows")
+
+    per_row_time, per_row_result = time_it("per row", build_per_row, rows)
+    bulk_time, bulk_result = time_it("single pass", build_locality_fee_schedules, rows)
+
+    bulk_as_dicts = {key: schedule.to_dict() for key, schedule in bulk_result.items()}
+    assert per_row_result == bulk_as_dicts, "single pass builder produced a different structure"
+    print(f"speedup      {per_row_time / bulk_time:8.2f}x")
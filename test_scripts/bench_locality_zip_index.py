@@ -0,0 +1,75 @@
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from locality_zip_index import LocalityZipIndex
+
+def make_ranges(range_count: int, seed: int = 11) -> list[tuple[str, str, str, str]]:
+    # mostly ZIP3-sized blocks, with gaps, a few overlaps and the odd bad row
+    rng = random.Random(seed)
+    carriers = ["01112", "01182", "02302", "04412", "05302"]
+    ranges = []
+    for _ in range(range_count):
+        begin = rng.randint(0, 99_000)
+        end = begin + rng.choice([0, 9, 99, 99, 99, 499])
+        ranges.append((rng.choice(carriers), str(rng.randint(1, 99)).zfill(2), str(begin).zfill(5), str(end).zfill(5)))
+    ranges[rng.randrange(range_count)] = ("01112", "01", "N/A", "99999")
+    return ranges
+
+def make_provider_zips(provider_count: int, seed: int = 12) -> list[str]:
+    # providers cluster in a few thousand ZIPs; some ZIP+4, blanks and junk
+    rng = random.Random(seed)
+    zips = [str(rng.randint(0, 99_999)).zfill(5) for _ in range(5_000)]
+    zips += ["123456789", "ABCDE", "00000"]
+    return [rng.choice(zips) for _ in range(provider_count)]
+
+def find_by_scan(provider_zip: str, locality_zip_ranges: list) -> tuple[str, str] | None:
+    # the pre-change find_matching_locality
+    try:
+        zip_int = int(provider_zip)
+    except ValueError:
+        return None
+
+    for carrier, locality, begin_zip, end_zip in locality_zip_ranges:
+        try:
+            if int(begin_zip) <= zip_int <= int(end_zip):
+                return (carrier, locality)
+        except ValueError:
+            continue
+
+    return None
+
+if __name__ == "__main__":
+    range_count = int(sys.argv[1]) if len(sys.argv) > 1 else 3_000
+    provider_count = int(sys.argv[2]) if len(sys.argv) > 2 else 250_000
+    ranges = make_ranges(range_count)
+    provider_zips = make_provider_zips(provider_count)
+    print(f"{range_count:,} zip ranges, {provider_count:,} providers")
+
+    # the scan is far too slow to run at full size - time a sample and scale it
+    sample = provider_zips[:5_000]
+    start = time.perf_counter()
+    scan_results = [find_by_scan(provider_zip, ranges) for provider_zip in sample]
+    scan_time = (time.perf_counter() - start) * provider_count / len(sample)
+    print(f"scan       {scan_time:8.3f}s  (estimated from {len(sample):,} providers)")
+
+    start = time.perf_counter()
+    index = LocalityZipIndex(ranges)
+    build_time = time.perf_counter() - start
+    print(f"build      {build_time:8.3f}s  {len(index):,} segments")
+
+    start = time.perf_counter()
+    index_results = [index.find(provider_zip) for provider_zip in provider_zips]
+    index_time = time.perf_counter() - start
+    print(f"index      {index_time:8.3f}s")
+
+    assert index_results[:len(sample)] == scan_results, "index returned a different locality than the scan"
+    # memoization hides the bisect - check uncached lookups against the scan too
+    fresh = LocalityZipIndex(ranges)
+    for number in range(0, 100_000, 7):
+        provider_zip = str(number).zfill(5)
+        assert fresh.find(provider_zip) == find_by_scan(provider_zip, ranges), provider_zip
+    print(f"speedup    {scan_time / (build_time + index_time):8.1f}x")
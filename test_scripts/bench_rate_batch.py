@@ -0,0 +1,76 @@
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from rate_batch import RateBatch
+from rate_record import RateRecord
+from rate_storage import store_rate_batch, store_rate_record
+from service_combinations import ServiceCombinations
+from valid_code_index import ValidCodeIndex
+
+def make_term(service_count: int) -> SimpleNamespace:
+    combinations = ServiceCombinations()
+    combinations.add([str(code) for code in range(10000, 10000 + service_count)], ["", "26", "TC"], ["", "11", "21"], "CPT")
+    combinations.add([str(code) for code in range(100, 400)], [""], ["", "22"], "RC")
+    return SimpleNamespace(
+        rate_sheet_code="RS1", service_mod_pos_list=combinations, rate_type_desc="professional",
+        is_exclusion=False, was_poa=False, full_term_display_id="10.1.1", provider_ranges={}
+    )
+
+def new_index() -> dict:
+    return {"by_proc": {}, "by_modifier": {}, "by_pos": {}}
+
+def by_record(term_bundle, valid_code_index, valid_service_codes) -> tuple[dict, dict]:
+    # the pre-change handler loop - one RateRecord and one store_rate_record per rate
+    rate_cache, rate_cache_index = {}, new_index()
+    for proc_code, modifier, pos, code_type in term_bundle.service_mod_pos_list:
+        if not valid_code_index.is_valid(proc_code, code_type):
+            continue
+        if pos == '' or pos == '11':
+            pos = '21' if term_bundle.rate_type_desc == 'institutional' else '11'
+        rate_record = RateRecord(
+            "INS", "RS1#limit", code_type, proc_code, pos,
+            "negotiated", "125.5", modifier, term_bundle.rate_type_desc, "99991231",
+            "10.1", "CalcLimit"
+        )
+        code_tuple = (proc_code, modifier, pos)
+        dict_key = (term_bundle.rate_sheet_code, proc_code, modifier, pos, code_type)
+        store_rate_record(rate_cache, dict_key, rate_record, "RS1#limit", None, code_tuple, valid_service_codes, rate_cache_index, term_bundle=term_bundle)
+    return rate_cache, rate_cache_index
+
+def by_batch(term_bundle, valid_code_index, valid_service_codes) -> tuple[dict, dict]:
+    rate_cache, rate_cache_index = {}, new_index()
+    rate_batch = RateBatch(
+        "INS", "RS1#limit", "negotiated", "125.5", term_bundle.rate_type_desc, "99991231",
+        "10.1", "CalcLimit"
+    )
+    rate_batch.add_services(term_bundle.service_mod_pos_list, valid_code_index, '21' if term_bundle.rate_type_desc == 'institutional' else '11')
+    store_rate_batch(rate_cache, rate_batch, valid_service_codes, rate_cache_index, term_bundle=term_bundle)
+    return rate_cache, rate_cache_index
+
+def measure(label: str, run, rounds: int) -> tuple[tuple[dict, dict], float]:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        result = run()
+    elapsed = (time.perf_counter() - start) / rounds
+    print(f"{label:<8} {elapsed * 1000:10.1f} ms/term {len(result[0]) / elapsed:12,.0f} rates/s")
+    return result, elapsed
+
+if __name__ == "__main__":
+    service_count = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    valid_service_codes = {(str(code), "CPT") for code in range(10000, 10000 + service_count, 2)}
+    valid_service_codes |= {(f"{code:04d}", "RC") for code in range(100, 400)}
+    valid_code_index = ValidCodeIndex(valid_service_codes)
+    term_bundle = make_term(service_count)
+    print(f"{len(term_bundle.service_mod_pos_list):,} combinations")
+
+    records, record_time = measure("record", lambda: by_record(term_bundle, valid_code_index, valid_service_codes), rounds)
+    batch, batch_time = measure("batch", lambda: by_batch(term_bundle, valid_code_index, valid_service_codes), rounds)
+    assert {key: {group: entry.to_dict() for group, entry in groups.items()} for key, groups in records[0].items()} == \
+        {key: {group: entry.to_dict() for group, entry in groups.items()} for key, groups in batch[0].items()}, "batch stored different rates"
+    assert records[1] == batch[1], "batch built different indexes"
+    print(f"speedup  {record_time / batch_time:10.1f}x")
@@ -0,0 +1,74 @@
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from constants import FIELD_DELIM, rate_template
+from rate_record import RateRecord
+
+def build_dicts(count: int) -> list[dict]:
+    # the pre-change records - template copy, update, then the store_rate_record flags
+    records = []
+    for i in range(count):
+        rate_dict = rate_template.copy()
+        rate_dict.update({
+            "update_type": "A",
+            "insurer_code": "INS",
+            "prov_grp_contract_key": "RS1#limit",
+            "negotiation_arrangement": "ffs",
+            "billing_code_type": "CPT",
+            "billing_code_type_ver": "10",
+            "billing_code": "99213",
+            "pos_collection_key": "11",
+            "negotiated_type": "negotiated",
+            "rate": "125.5",
+            "modifier": "",
+            "billing_class": "professional",
+            "expiration_date": "99991231",
+            "full_term_section_id": "10.1",
+            "calc_bean": "CalcLimit"
+        })
+        rate_dict["was_poa"] = False
+        rate_dict["full_term_display_id"] = "10.1.1"
+        rate_dict["qualified"] = False
+        records.append(rate_dict)
+    return records
+
+def build_records(count: int) -> list[RateRecord]:
+    records = []
+    for i in range(count):
+        rate_record = RateRecord(
+            "INS", "RS1#limit", "CPT", "99213", "11",
+            "negotiated", "125.5", "", "professional", "99991231",
+            "10.1", "CalcLimit"
+        )
+        rate_record.was_poa = False
+        rate_record.full_term_display_id = "10.1.1"
+        rate_record.qualified = False
+        records.append(rate_record)
+    return records
+
+def dict_line(rate_dict: dict) -> str:
+    return FIELD_DELIM.join(str(rate_dict.get(field, "")) for field in rate_template.keys()) + FIELD_DELIM + "\n"
+
+def measure(label: str, build, to_line, count: int) -> list[str]:
+    tracemalloc.start()
+    records = build(count)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del records
+
+    start = time.perf_counter()
+    records = build(count)
+    lines = [to_line(record) for record in records]
+    elapsed = time.perf_counter() - start
+    print(f"{label:<8} {count / elapsed:12,.0f} records/s {size / count:8.1f} bytes/record")
+    return lines
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    dict_lines = measure("dict", build_dicts, dict_line, count)
+    record_lines = measure("record", build_records, RateRecord.to_line, count)
+    assert dict_lines == record_lines, "records write different lines"
@@ -0,0 +1,92 @@
+"""
+valid_code_index.py
+
+Lookup structure over valid_service_codes, built once after the billing
+code extract, so the calculations and generate_service_combinations can
+drop a code before they build anything for it - store_rate_record only
+checks validity after the rate dict and cache keys already exist.
+
+- codes_by_type: billing code type -> frozenset of codes, for the per-record
+  check (is_valid applies the RC zero-padding rule, same as store_rate_record)
+- valid_numbers: one bit per number 0..MAX_RANGE_CODE, set when str(number)
+  is valid under any code type; range expansion tests the bit before it
+  makes the code string
+- number_list: the same numbers sorted, so the valid numbers inside a range
+  come from two bisects (valid_numbers_between)
+
+A code is "valid under any type" when (code, type) is valid for some type, or
+its 4-digit zero-padded form is a valid RC code. The fee schedule calcs bill
+a code with the schedule's code type rather than the term's, so the
+combination filter can only drop codes that no type would accept.
+"""
+
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import chain
+from typing import Iterable
+
+# generate_service_combinations caps numeric ranges here
+MAX_RANGE_CODE = 99999
+
+def pad_revenue_code(code: str) -> str:
+    return code.zfill(4)
+
+class ValidCodeIndex:
+    def __init__(self, valid_service_codes: Iterable[tuple[str, str]]):
+        codes_by_type: dict[str, set[str]] = {}
+        for code, code_type in valid_service_codes:
+            codes_by_type.setdefault(code_type, set()).add(code)
+        self.codes_by_type: dict[str, frozenset[str]] = {
+            code_type: frozenset(codes) for code_type, codes in codes_by_type.items()
+        }
+        self.any_codes: frozenset[str] = frozenset().union(*self.codes_by_type.values())
+        self.valid_numbers = bytearray(MAX_RANGE_CODE // 8 + 1)
+
+        for code_type, codes in self.codes_by_type.items():
+            for code in codes:
+                if not code.isdigit():
+                    continue
+                number = int(code)
+                if number > MAX_RANGE_CODE:
+                    continue
+                # the bit stands for str(number) - a code with leading zeros only
+                # matches it through the RC padding rule
+                if str(number) == code or (code_type == "RC" and pad_revenue_code(str(number)) == code):
+                    self.valid_numbers[number >> 3] |= 1 << (number & 7)
+
+        self.number_list = array("l", (number for number in range(MAX_RANGE_CODE + 1) if self.is_valid_number(number)))
+
+    def is_valid(self, code: str, code_type: str) -> bool:
+        if code_type == "RC":
+            code = pad_revenue_code(code)
+        codes = self.codes_by_type.get(code_type)
+        return codes is not None and code in codes
+
+    def is_valid_any(self, code: str) -> bool:
+        if code in self.any_codes:
+            return True
+        revenue_codes = self.codes_by_type.get("RC")
+        return revenue_codes is not None and pad_revenue_code(code) in revenue_codes
+
+    def is_valid_number(self, number: int) -> bool:
+        # number stands for the code str(number)
+        if 0 <= number <= MAX_RANGE_CODE:
+            return bool(self.valid_numbers[number >> 3] & (1 << (number & 7)))
+        return self.is_valid_any(str(number))
+
+    def valid_numbers_between(self, low: int, high: int) -> Iterable[int]:
+        # the valid numbers in low..high, ascending
+        numbers = self.number_list
+        inside = numbers[bisect_left(numbers, max(low, 0)):bisect_right(numbers, high)]
+        if low >= 0 and high <= MAX_RANGE_CODE:
+            return inside
+        return chain(
+            filter(self.is_valid_number, range(low, min(high, -1) + 1)),
+            inside,
+            filter(self.is_valid_number, range(max(low, MAX_RANGE_CODE + 1), high + 1))
+        )
+
+    def statistics(self) -> dict[str, int]:
+        stats = {code_type: len(codes) for code_type, codes in self.codes_by_type.items()}
+        stats["valid_numbers"] = len(self.number_list)
+        return stats